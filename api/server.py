@@ -0,0 +1,214 @@
+"""
+API Server Module
+HTTP API for the NL-to-SQL pipeline, served by uvicorn with multiple worker processes
+"""
+
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+from sse_starlette.sse import EventSourceResponse
+
+from backend.system import API_CONFIG, DB_CONFIG, QUERY_CONFIG
+from backend.async_pipeline import process_user_prompt_async, run_db, close_async_llm_client
+from backend.db_tools import execute_query, get_schema_map, get_schema_version, is_read_only_select
+from backend.sql_connector import QueryTimeoutError, QueryCancelledError
+from backend.connection_pool import close_all_pools, get_pool_stats
+from backend.result_cache import get_result_cache
+from backend.audit_logger import get_audit_writer
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class AskRequest(BaseModel):
+    prompt: str = Field(..., min_length=1)
+    database: Optional[str] = None
+    use_cache: bool = True
+    include_debug: bool = False
+
+
+class AskResponse(BaseModel):
+    response: str
+    sql: Optional[str] = None
+    generation_cache: Optional[str] = None
+    debug_info: Optional[Dict[str, Any]] = None
+
+
+class ExecuteSQLRequest(BaseModel):
+    query: str = Field(..., min_length=1)
+    database: Optional[str] = None
+    max_rows: Optional[int] = Field(None, gt=0)
+    use_cache: bool = True
+
+
+class ExecuteSQLResponse(BaseModel):
+    columns: List[str]
+    rows: List[Dict[str, Any]]
+    row_count: int
+    truncated: bool = False
+    truncated_reason: Optional[str] = None
+
+
+class SchemaResponse(BaseModel):
+    database: str
+    schema_version: Optional[str] = None
+    schema_map: Dict[str, Any]
+
+
+def _database(name: Optional[str]) -> str:
+    """Requested database, or the configured default."""
+    database = name or os.getenv("DATABASE_NAME") or DB_CONFIG.get('database')
+    if not database:
+        raise HTTPException(status_code=400, detail="No database given and DATABASE_NAME is not configured")
+    return database
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Each uvicorn worker is its own process with its own connection pools and caches
+    logger.info(f"API worker {os.getpid()} started")
+    yield
+    await close_async_llm_client()
+    get_audit_writer().close()
+    close_all_pools()
+    logger.info(f"API worker {os.getpid()} stopped")
+
+
+app = FastAPI(title="SQL Chatbot API", version="1", lifespan=lifespan)
+
+
+@app.post("/v1/ask", response_model=AskResponse)
+async def ask(request: AskRequest) -> AskResponse:
+    """Turn a question into SQL, run it, and return the formatted answer."""
+    result = await process_user_prompt_async(request.prompt, _database(request.database), use_cache=request.use_cache)
+    debug_info = result.get("debug_info", {})
+    return AskResponse(
+        response=result["response"],
+        sql=debug_info.get("final_query") or debug_info.get("initial_query"),
+        generation_cache=debug_info.get("generation_cache"),
+        debug_info=debug_info if request.include_debug else None
+    )
+
+
+@app.get("/v1/ask/stream")
+async def ask_stream(prompt: str, database: Optional[str] = None, use_cache: bool = True) -> EventSourceResponse:
+    """
+    Server-sent events for one question, sent as each pipeline step happens.
+
+    Every process_user_prompt progress event (schema_loaded, token, candidate_sql,
+    validation, rows, ...) becomes an SSE event with a JSON payload, followed by a
+    final "done" event holding the AskResponse. If the client disconnects, the
+    request is cancelled along with its running query.
+    """
+    if not prompt.strip():
+        raise HTTPException(status_code=400, detail="prompt must not be empty")
+    database = _database(database)
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    def on_event(event: str, data: Dict[str, Any]) -> None:
+        # Execution events arrive from DB executor threads
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    async def stream():
+        task = asyncio.create_task(
+            process_user_prompt_async(prompt, database, use_cache=use_cache, on_event=on_event)
+        )
+        task.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, finished))
+        try:
+            while True:
+                item = await events.get()
+                if item is finished:
+                    break
+                event, data = item
+                yield {"event": event, "data": json.dumps(data, default=str)}
+
+            result = task.result()
+            debug_info = result.get("debug_info", {})
+            done = AskResponse(
+                response=result["response"],
+                sql=debug_info.get("final_query") or debug_info.get("initial_query"),
+                generation_cache=debug_info.get("generation_cache")
+            )
+            yield {"event": "done", "data": done.model_dump_json()}
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return EventSourceResponse(stream())
+
+
+@app.post("/v1/sql/execute", response_model=ExecuteSQLResponse)
+async def execute_sql(request: ExecuteSQLRequest) -> ExecuteSQLResponse:
+    """Run a read-only SQL query and return its rows."""
+    if not is_read_only_select(request.query):
+        raise HTTPException(status_code=400, detail="Only a single SELECT statement can be executed through the API")
+    try:
+        rows = await run_db(
+            execute_query,
+            request.query,
+            _database(request.database),
+            use_cache=request.use_cache,
+            max_rows=min(request.max_rows or QUERY_CONFIG['max_rows'], QUERY_CONFIG['max_rows'])
+        )
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except QueryCancelledError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Query failed: {str(e)}")
+    return ExecuteSQLResponse(
+        columns=rows.columns,
+        rows=rows.to_dicts(),
+        row_count=len(rows),
+        truncated=rows.truncated,
+        truncated_reason=rows.truncated_reason
+    )
+
+
+@app.get("/v1/schema/{database}", response_model=SchemaResponse)
+async def schema(database: str) -> SchemaResponse:
+    """Return the cached schema map of a database."""
+    schema_map = await run_db(get_schema_map, database)
+    if not schema_map:
+        raise HTTPException(status_code=404, detail=f"No schema available for database '{database}'")
+    return SchemaResponse(
+        database=database,
+        schema_version=await run_db(get_schema_version, database),
+        schema_map=schema_map
+    )
+
+
+@app.get("/healthz")
+async def healthz() -> Dict[str, Any]:
+    """Liveness probe with this worker's pool and result cache statistics."""
+    return {
+        "status": "ok",
+        "worker_pid": os.getpid(),
+        "pools": get_pool_stats(),
+        "result_cache": get_result_cache().stats()
+    }
+
+
+def main():
+    """Serve the API with uvicorn using API_CONFIG's host, port and worker count."""
+    uvicorn.run(
+        "api.server:app",
+        host=API_CONFIG['host'],
+        port=API_CONFIG['port'],
+        workers=API_CONFIG['workers']
+    )
+
+
+if __name__ == "__main__":
+    main()
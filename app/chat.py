@@ -12,9 +12,15 @@ This module handles the chat interface and database interactions.
 
 import streamlit as st
 from backend.db_tools import get_databases, get_schema_map_from_cache, get_cache_path
+from backend.schema_registry import get_schema_registry
+from backend.result_cache import get_result_cache
 from backend.system import test_db_connection
-from backend.llm_engine import get_llm_instance, process_user_prompt
+from backend.llm_engine import get_llm_instance, process_user_prompt, execute_confirmed_query, start_prefix_warmup
+from backend.sql_connector import QueryCancelledError, cancel_query
 import os
+import queue
+import threading
+import uuid
 from dotenv import load_dotenv
 import pandas as pd
 import logging
@@ -64,13 +70,17 @@ def display_schema_cache_debug():
         else:
             st.write("Cache Status: ❌ File does not exist")
         
-        # Show session state cache
-        st.write("\nSession State Cache:")
-        session_cache = {k: v for k, v in st.session_state.items() if k.startswith('schema_map_')}
-        if session_cache:
-            st.json(session_cache)
+        # Show shared in-memory cache
+        st.write("\nShared Schema Registry:")
+        registry_stats = get_schema_registry().stats()
+        if registry_stats["databases"]:
+            st.json(registry_stats)
         else:
-            st.write("No schema cache in session state")
+            st.write("No schema loaded in the shared registry")
+        
+        # Show query result cache metrics
+        st.write("\nQuery Result Cache:")
+        st.json(get_result_cache().stats())
 
 def check_configuration():
     """Check if all required configurations are set."""
@@ -151,6 +161,105 @@ def process_chat(prompt: str):
     except Exception as e:
         st.error(f"Error processing chat: {str(e)}")
 
+# How often the UI checks the worker while waiting (also lets Streamlit deliver a Stop click)
+RESPONSE_POLL_SECONDS = 0.25
+
+def describe_progress(event: str, data: dict) -> Optional[str]:
+    """One markdown line for a process_user_prompt progress event, or None to skip it."""
+    if event == "schema_loaded":
+        return f"📚 Schema loaded: {data['tables']} tables (version `{data['schema_version']}`)"
+    if event == "cache_hit":
+        return f"♻️ Reusing validated SQL from the {'semantic' if data['kind'] == 'semantic' else 'generation'} cache"
+    if event == "prompt_built":
+        line = f"📝 Prompt built (~{data['tokens']:,} of {data['budget']:,} tokens, ~{data['prefix_tokens']:,} cached, {data['tables']} tables"
+        return line + (f", {data['omitted_tables']} omitted to fit)" if data["omitted_tables"] else ")")
+    if event == "candidate_sql":
+        label = "Refined SQL" if data["stage"] == "refined" else "Generated SQL"
+        return f"🧾 {label}:\n```sql\n{data['sql'] or ''}\n```"
+    if event == "validation":
+        return "✅ SQL passed validation" if data["valid"] else f"❌ Validation failed: {data['error']}"
+    if event == "cost_gate":
+        return f"💰 Cost check: {data['decision']}"
+    if event == "executing":
+        return "▶️ Running query..."
+    if event == "rows":
+        line = f"📊 {data['row_count']:,} rows returned"
+        return line + (f" (truncated: {data['truncated_reason']})" if data["truncated"] else "")
+    if event == "query_error":
+        return f"⚠️ {data['error']}"
+    return None
+
+def run_prompt_with_stop(prompt: str, output_placeholder) -> Optional[dict]:
+    """
+    Run process_user_prompt on a worker thread while the script thread renders
+    its progress events, tokens and a Stop button as they happen.
+    
+    Clicking Stop makes Streamlit interrupt this script at its next UI update;
+    the finally block then stops token generation and cancels the running
+    query on the server, so neither keeps a thread or connection busy.
+    
+    Args:
+        prompt (str): User request
+        output_placeholder: st.empty() slot for the streamed model output
+        
+    Returns:
+        Optional[dict]: The process_user_prompt response
+    """
+    query_id = uuid.uuid4().hex
+    events = queue.Queue()
+    stop_requested = threading.Event()
+    database = os.getenv("DATABASE_NAME", "")
+    
+    def on_event(event: str, data: dict):
+        if stop_requested.is_set():
+            raise QueryCancelledError("Generation stopped")
+        events.put(("event", (event, data)))
+    
+    def worker():
+        try:
+            events.put(("done", process_user_prompt(prompt, database, query_id=query_id, on_event=on_event)))
+        except Exception as e:
+            events.put(("error", e))
+    
+    st.button("⏹️ Stop", key=f"stop_{query_id}", help="Stop generating and cancel the running query")
+    status = st.status("Working...", expanded=True)
+    threading.Thread(target=worker, name="chat-prompt", daemon=True).start()
+    
+    streamed = []
+    started = time.monotonic()
+    finished = False
+    try:
+        while True:
+            try:
+                kind, payload = events.get(timeout=RESPONSE_POLL_SECONDS)
+            except queue.Empty:
+                status.update(label=f"Working... {time.monotonic() - started:.0f}s")
+                continue
+            if kind == "event":
+                event, data = payload
+                if event == "token":
+                    streamed.append(data["text"])
+                    output_placeholder.markdown("".join(streamed) + "▌")
+                    continue
+                line = describe_progress(event, data)
+                if line:
+                    status.markdown(line)
+            elif kind == "done":
+                finished = True
+                status.update(label=f"Done in {time.monotonic() - started:.1f}s", state="complete", expanded=False)
+                return payload
+            else:
+                finished = True
+                status.update(label="Failed", state="error")
+                raise payload
+    finally:
+        if not finished:
+            # The script was interrupted (Stop clicked or page left) while the worker was busy
+            stop_requested.set()
+            cancel_query(query_id)
+            st.session_state.messages.append({"role": "assistant", "content": "⏹️ Stopped."})
+            logger.info(f"Stopped request {query_id}")
+
 def get_bot_response(prompt: str) -> str:
     """Get response from LLM"""
     try:
@@ -158,50 +267,35 @@ def get_bot_response(prompt: str) -> str:
         if not llm:
             return "Error: LLM not configured properly"
         
-        # Create a placeholder for streaming output
-        output_placeholder = st.empty()
-        messages = []
-        
         # Add initial thinking message
         st.markdown("🤔 Let me think about this...")
-        time.sleep(0.5)  # Small delay to make it visible
         
-        # Process the prompt
-        response = process_user_prompt(prompt, os.getenv("DATABASE_NAME", ""))
+        # Render the model output live as tokens stream in
+        output_placeholder = st.empty()
         
-        # Stream tool calls as they happen
-        if response and "debug_info" in response and response["debug_info"].get("tool_calls"):
-            st.markdown("\n**Tool Calls and Prompts:**")
-            time.sleep(0.5)
-            
-            for tool_call in response["debug_info"]["tool_calls"]:
-                # Format the tool call based on its type
-                if tool_call.startswith("USER PROMPT:"):
-                    st.markdown(f"\n**User Request:**\n```\n{tool_call.replace('USER PROMPT:', '').strip()}\n```")
-                elif tool_call.startswith("REFINEMENT PROMPT:"):
-                    st.markdown(f"\n**Refinement Request:**\n```\n{tool_call.replace('REFINEMENT PROMPT:', '').strip()}\n```")
-                elif tool_call.startswith("ERROR:"):
-                    st.markdown(f"\n❌ **Error:** {tool_call.replace('ERROR:', '').strip()}")
-                else:
-                    st.markdown(f"```\n{tool_call}\n```")
-                time.sleep(0.5)  # Add a small delay to make the streaming visible
+        # Process the prompt
+        response = run_prompt_with_stop(prompt, output_placeholder)
+        output_placeholder.empty()
         
-        # Show the initial query if available
-        if response and "debug_info" in response and response["debug_info"].get("initial_query"):
-            st.markdown("\n**Initial SQL Query:**")
-            st.markdown(f"```sql\n{response['debug_info']['initial_query']}\n```")
-            time.sleep(0.5)
+        # Hold queries the cost gate flagged until the user confirms them
+        cost_gate = response.get("debug_info", {}).get("cost_gate") if response else None
+        if cost_gate and cost_gate["decision"] == "confirm":
+            st.session_state.pending_confirmation = {"prompt": prompt, "sql": cost_gate["sql"]}
         
-        # Show validation error if any
-        if response and "debug_info" in response and response["debug_info"].get("validation_error"):
-            st.markdown(f"\n❌ **Validation Error:** {response['debug_info']['validation_error']}")
-            time.sleep(0.5)
-            
-            # Show final query if available
-            if response["debug_info"].get("final_query"):
-                st.markdown("\n**Final SQL Query:**")
-                st.markdown(f"```sql\n{response['debug_info']['final_query']}\n```")
-                time.sleep(0.5)
+        # Generated SQL and validation were shown live; the prompts sent to the model are debug detail
+        tool_calls = response.get("debug_info", {}).get("tool_calls") if response else None
+        if tool_calls and st.session_state.get("show_llm_debug", True):
+            with st.expander("Tool Calls and Prompts", expanded=False):
+                for tool_call in tool_calls:
+                    # Format the tool call based on its type
+                    if tool_call.startswith("USER PROMPT:"):
+                        st.markdown(f"\n**User Request:**\n```\n{tool_call.replace('USER PROMPT:', '').strip()}\n```")
+                    elif tool_call.startswith("REFINEMENT PROMPT:"):
+                        st.markdown(f"\n**Refinement Request:**\n```\n{tool_call.replace('REFINEMENT PROMPT:', '').strip()}\n```")
+                    elif tool_call.startswith("ERROR:"):
+                        st.markdown(f"\n❌ **Error:** {tool_call.replace('ERROR:', '').strip()}")
+                    else:
+                        st.markdown(f"```\n{tool_call}\n```")
         
         # Show the final response
         if response and "response" in response:
@@ -226,6 +320,30 @@ def get_bot_response(prompt: str) -> str:
         st.markdown(error_msg)
         return error_msg
 
+def display_pending_confirmation():
+    """Offer to run a query the cost gate held for confirmation."""
+    pending = st.session_state.get("pending_confirmation")
+    if not pending:
+        return
+    
+    with st.chat_message("assistant"):
+        st.markdown("This query is waiting for your confirmation:")
+        st.code(pending["sql"], language="sql")
+        col1, col2 = st.columns(2)
+        run = col1.button("▶️ Run anyway", key="confirm_expensive_query")
+        dismiss = col2.button("✖️ Dismiss", key="dismiss_expensive_query")
+    
+    if dismiss:
+        st.session_state.pending_confirmation = None
+        st.rerun()
+    if run:
+        st.session_state.pending_confirmation = None
+        with st.chat_message("assistant"):
+            with st.spinner("Running query..."):
+                response = execute_confirmed_query(pending["prompt"], pending["sql"])
+            st.markdown(response["response"])
+        st.session_state.messages.append({"role": "assistant", "content": response["response"]})
+
 def main():
     st.header("🤖 SQL Chatbot")
     
@@ -235,6 +353,12 @@ def main():
         st.session_state.show_llm_debug = st.checkbox("Show LLM Debug Info", value=True)
         st.session_state.show_schema_debug = st.checkbox("Show Schema Cache Debug", value=False)
     
+    # Load the model and its prompt prefix for the configured database while the user types
+    database = os.getenv("DATABASE_NAME", "")
+    if database and st.session_state.get("primed_database") != database:
+        st.session_state.primed_database = database
+        start_prefix_warmup(database)
+    
     # Simple chat interface without advanced options
     if "messages" not in st.session_state:
         st.session_state.messages = []
@@ -244,6 +368,8 @@ def main():
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
+    display_pending_confirmation()
+
     # Chat input
     if prompt := st.chat_input("Ask me about your data..."):
         # Add user message
@@ -252,9 +378,13 @@ def main():
             st.markdown(prompt)
 
         # Get bot response with streaming
+        st.session_state.pending_confirmation = None
         with st.chat_message("assistant"):
             response = get_bot_response(prompt)
             st.session_state.messages.append({"role": "assistant", "content": response})
+        if st.session_state.get("pending_confirmation"):
+            # Show the confirmation buttons below the answer
+            st.rerun()
     
     # Show schema cache debug info if enabled
     if st.session_state.get("show_schema_debug", False):
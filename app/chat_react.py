@@ -13,9 +13,7 @@ from dotenv import load_dotenv
 from pathlib import Path
 import time
 import logging
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import List, Dict, Any, Union
 import plotly.express as px
 
 from backend.db_tools import (
@@ -32,13 +30,15 @@ from backend.db_tools import (
 
 from config.database_config import load_database_config
 from backend.sql_connector import validate_db_connection, SQLConnector, execute_sql_query
+from backend.query_result import ColumnarResult
 from backend.db_tools import clean_pretty_sql, format_sql_query
 from backend.audit_logger import log_query_event, AuditLogger
 from backend.system import DB_CONFIG, test_db_connection
 from backend.llm_engine import (
     LocalLLM, 
     process_user_prompt, 
-    extract_sql_query
+    extract_sql_query,
+    start_prefix_warmup
 )
 
 # Important: Load environment variables at startup
@@ -49,20 +49,12 @@ logger = logging.getLogger(__name__)
 audit_logger = AuditLogger()
 llm = LocalLLM()
 
-app = FastAPI()
-
-class ChatRequest(BaseModel):
-    prompt: str
-    execute: bool = False
-    database: Optional[str] = None
-    schema_name: Optional[str] = None
-
 # Ensure session state setup
 st.session_state.setdefault("messages", [])
 st.session_state.setdefault("llm_trace", [])
 st.session_state.setdefault("sql_output", None)
 
-def display_results(results: List[Dict[str, Any]], allow_viz: bool = True):
+def display_results(results: Union[ColumnarResult, List[Dict[str, Any]]], allow_viz: bool = True):
     """Display query results in a table with optional visualization"""
     if not results:
         st.write("No results returned")
@@ -77,8 +69,8 @@ def display_results(results: List[Dict[str, Any]], allow_viz: bool = True):
                 st.write(f"Error parsing results: {results}")
                 return
     
-    # Convert results to DataFrame
-    df = pd.DataFrame(results)
+    # Convert results to DataFrame (columnar results wrap their arrays without copying)
+    df = results.to_pandas() if isinstance(results, ColumnarResult) else pd.DataFrame(results)
     
     # Display as table
     st.dataframe(df)
@@ -198,9 +190,6 @@ def initialize_session_state():
     if "databases" not in st.session_state:
         st.session_state.databases = []
     
-    if "schema_map" not in st.session_state:
-        st.session_state.schema_map = {}
-    
     if "current_database" not in st.session_state:
         # Seed with configured database from DB_CONFIG
         st.session_state.current_database = DB_CONFIG.get("database")
@@ -234,15 +223,12 @@ def process_user_input(user_input: str) -> str:
         return f"I apologize, but I encountered an error: {str(e)}"
 
 def get_schema_map_from_cache(database_name=None):
-    """Get schema map from cache or generate it if not present."""
-    if 'schema_map' not in st.session_state:
-        try:
-            st.session_state.schema_map = get_schema_map()
-        except Exception as e:
-            st.error(f"Error getting schema map: {str(e)}")
-            return {}
-    
-    return st.session_state.schema_map
+    """Get the process-wide shared schema map (read-only) instead of a per-session copy."""
+    try:
+        return get_schema_map(database_name)
+    except Exception as e:
+        st.error(f"Error getting schema map: {str(e)}")
+        return {}
 
 def get_databases_from_cache():
     """Get list of databases from cache."""
@@ -258,11 +244,12 @@ def get_databases_from_cache():
 def display_query_results(query: str, database: str):
     """Execute and display query results."""
     try:
-        columns, results = execute_query(query, database)
+        results = execute_query(query, database)
         if results:
-            df = pd.DataFrame(results, columns=columns)
-            st.dataframe(df)
+            st.dataframe(results.to_pandas())
             st.caption(f"Found {len(results)} rows")
+            if results.truncated:
+                st.warning(f"Result truncated: {results.truncated_reason}")
         else:
             st.info("Query executed successfully but returned no results.")
     except Exception as e:
@@ -394,7 +381,11 @@ def main():
             
             if selected_db != st.session_state.current_database:
                 st.session_state.current_database = selected_db
-                st.session_state.schema_map = get_schema_map()
+            
+            # Load the model and its prompt prefix for this database while the user types
+            if st.session_state.get("primed_database") != selected_db:
+                st.session_state.primed_database = selected_db
+                start_prefix_warmup(selected_db)
         
         # Display schema in Advanced mode
         if advanced_mode:
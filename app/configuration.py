@@ -15,6 +15,7 @@ import logging
 from backend.system import (
     test_db_connection,
     test_llm_connection,
+    get_system_status,
     DB_CONFIG,
     LLM_CONFIG
 )
@@ -22,7 +23,8 @@ from backend.llm_engine import (
     list_local_models
 )
 from backend.db_tools import get_databases, clear_schema_cache
-import requests
+from backend.llm_transport import get_llm_transport
+from backend.health_monitor import get_health_monitor
 
 # Get the project root directory and load .env file
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -154,11 +156,8 @@ def get_available_models():
         return st.session_state.available_models
         
     try:
-        base_url = os.getenv("OPENAI_API_BASE", "http://localhost:11434/").rstrip("/")
-        if base_url.endswith("/v1"):
-            base_url = base_url[:-3].rstrip("/")
-        url = f"{base_url}/api/tags" 
-        response = requests.get(url)
+        base_url = os.getenv("OPENAI_API_BASE", "http://localhost:11434/")
+        response = get_llm_transport().get("/api/tags", base_url=base_url)
         response.raise_for_status()
         data = response.json()
         models = [m["name"] for m in data.get("models", [])]
@@ -176,6 +175,7 @@ def test_model_connection(model_name: str) -> Tuple[bool, str]:
     try:
         # First set the model
         set_llm_instance(model_name)
+        get_health_monitor().refresh()
         
         # Then test the connection
         success, message = test_llm_connection()
@@ -192,13 +192,8 @@ def test_database_connection():
 def get_raw_model_info():
     """Get raw model information from Ollama API"""
     try:
-        base_url = os.getenv("OPENAI_API_BASE", "http://localhost:11434/").rstrip("/")
-        if base_url.endswith("/v1"):
-            base_url = base_url[:-3].rstrip("/")
-        url = f"{base_url}/api/tags"
-        
-        import requests
-        response = requests.get(url)
+        base_url = os.getenv("OPENAI_API_BASE", "http://localhost:11434/")
+        response = get_llm_transport().get("/api/tags", base_url=base_url)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -268,13 +263,12 @@ def get_env_status(env_var: str) -> bool:
 def show_status_overview():
     """Show overall status of system components."""
     col1, col2 = st.columns(2)
+    db_status, llm_status = get_system_status()
     
     with col1:
-        db_status, db_message = test_db_connection()
         st.markdown(f"**Database Status:** {'🟢' if db_status else '🔴'}")
         
     with col2:
-        llm_status, llm_message = test_llm_connection()
         st.markdown(f"**LLM Status:** {'🟢' if llm_status else '🔴'}")
 
 def update_status_displays():
@@ -22,6 +22,7 @@ from dotenv import load_dotenv
 from streamlit_option_menu import option_menu
 import logging.handlers
 from datetime import datetime
+import time
 
 # Add project root to Python path if not already there
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -29,8 +30,8 @@ if root_dir not in sys.path:
     sys.path.insert(0, root_dir)
 
 # Backend imports
-from backend.system import get_system_status, get_status_emoji, test_db_connection, LOG_CONFIG
-from backend.system import test_llm_connection
+from backend.system import get_system_status, get_status_emoji, LOG_CONFIG
+from backend.health_monitor import get_health_monitor
 from backend.db_tools import get_databases
 
 # App imports
@@ -111,9 +112,24 @@ def show_system_status():
     # Get status from backend
     db_status, llm_status = get_system_status()
     
+    # Probe details cached by the background health monitor
+    monitor = get_health_monitor()
+    status = monitor.get_status()
+    
     # Display status
-    st.sidebar.markdown(f"{get_status_emoji(db_status)} **Database**")
-    st.sidebar.markdown(f"{get_status_emoji(llm_status)} **LLM**")
+    for name, label, ok in (("database", "Database", db_status), ("llm", "LLM", llm_status)):
+        result = status[name]
+        st.sidebar.markdown(
+            f"{get_status_emoji(ok)} **{label}**",
+            help=f"{result['message']} ({result['latency_ms']} ms)"
+        )
+    
+    checked_at = min(result["checked_at"] for result in status.values())
+    col1, col2 = st.sidebar.columns([0.7, 0.3])
+    col1.caption(f"Checked {int(time.time() - checked_at)}s ago")
+    if col2.button("↻", key="refresh_system_status", help="Check again now"):
+        monitor.check_now()
+        st.rerun()
 
 def main():
     """Main application interface."""
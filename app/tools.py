@@ -1,11 +1,14 @@
 import streamlit as st
-from backend.db_tools import get_schema_map, get_schema_map_formatted, clear_schema_cache
+from backend.db_tools import get_schema_map, get_schema_map_formatted, clear_schema_cache, export_query_results, EXPORT_FORMATS
+from backend.generation_cache import get_generation_cache
+from backend.semantic_cache import get_semantic_cache
 import json
 import logging
 import logging.handlers
 from pathlib import Path
 from datetime import datetime
 import os
+import tempfile
 
 logger = logging.getLogger(__name__)
 
@@ -216,9 +219,14 @@ def show_schema_viewer():
     st.header("Schema Viewer")
     
     # Add a refresh button
-    if st.button("Refresh Schema"):
+    col1, col2 = st.columns(2)
+    if col1.button("Refresh Schema"):
         clear_schema_cache()
         st.rerun()
+    if col2.button("Clear Generated SQL Cache", help="Forget SQL remembered for previously asked questions"):
+        removed = get_generation_cache().invalidate()
+        get_semantic_cache().invalidate()
+        st.success(f"Removed {removed} cached queries")
     
     # Get schema map
     schema_map = get_schema_map()
@@ -268,18 +276,72 @@ def show_schema_viewer():
                         for fk in table_info['foreign_keys']:
                             st.markdown(f"- {fk['column']} → {fk['references']}")
 
+def _remove_export_file(export):
+    """Delete the temporary file of an earlier export, if any."""
+    if export and export.get("path"):
+        try:
+            os.remove(export["path"])
+        except OSError:
+            pass
+
+def show_query_export():
+    """Show query export tool."""
+    st.header("Query Export")
+    st.caption("Streams the result as Arrow record batches straight into a Parquet or CSV file.")
+    
+    query = st.text_area("SQL Query", key="export_query", height=150)
+    file_format = st.selectbox("Format", EXPORT_FORMATS, key="export_format")
+    
+    if st.button("Run Export", disabled=not query.strip()):
+        # Batches go to a file on disk; only its path and the summary are kept per session
+        _remove_export_file(st.session_state.pop("export_result", None))
+        fd, path = tempfile.mkstemp(prefix="query_export_", suffix=f".{file_format}")
+        try:
+            with st.spinner("Exporting..."):
+                with os.fdopen(fd, "wb") as sink:
+                    summary = export_query_results(query, sink, database=os.getenv("DATABASE_NAME"), file_format=file_format)
+            st.session_state.export_result = {
+                "path": path,
+                "format": file_format,
+                **summary
+            }
+        except Exception as e:
+            st.error(f"Export failed: {str(e)}")
+            _remove_export_file({"path": path})
+    
+    export = st.session_state.get("export_result")
+    if not export or not os.path.exists(export["path"]):
+        return
+    
+    st.success(f"Exported {export['rows']:,} rows ({os.path.getsize(export['path']) / (1024 * 1024):.1f} MB)")
+    if export["truncated"]:
+        st.warning(f"Export truncated: {export['truncated_reason']}")
+    with open(export["path"], "rb") as export_file:
+        st.download_button(
+            f"Download {export['format'].upper()}",
+            data=export_file,
+            file_name=f"query_export_{datetime.now():%Y%m%d_%H%M%S}.{export['format']}",
+            mime="application/octet-stream" if export["format"] == "parquet" else "text/csv"
+        )
+    if export["preview"] is not None:
+        st.markdown(f"Preview (first {export['preview'].num_rows:,} rows)")
+        st.dataframe(export["preview"])
+
 def main():
     """Main function for the Tools page."""
     st.title("Tools")
     
     # Add tabs for different tools
-    tab1, tab2 = st.tabs(["Schema Viewer", "Debug Logs"])
+    tab1, tab2, tab3 = st.tabs(["Schema Viewer", "Debug Logs", "Query Export"])
     
     with tab1:
         show_schema_viewer()
     
     with tab2:
         show_debug_logs()
+    
+    with tab3:
+        show_query_export()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
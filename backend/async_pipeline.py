@@ -0,0 +1,420 @@
+"""
+Async Pipeline Module
+asyncio version of process_user_prompt: async Ollama client and executor-backed database calls
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+import numpy as np
+
+from backend.system import (
+    LLM_CONFIG,
+    LLM_TRANSPORT_CONFIG,
+    ASYNC_PIPELINE_CONFIG,
+    GENERATION_CACHE_CONFIG,
+    SEMANTIC_CACHE_CONFIG
+)
+from backend.llm_transport import get_ollama_base_url
+from backend.db_tools import get_schema_map, get_schema_version
+from backend.sql_connector import QueryCancelledError, cancel_query
+from backend.generation_cache import get_generation_cache
+from backend.semantic_cache import get_semantic_cache
+from backend.prompt_assembler import record_prompt_eval
+from backend.llm_engine import (
+    SQLPrompt,
+    get_llm_instance,
+    clean_sql_response,
+    has_complete_sql_block,
+    refine_sql_query,
+    emit_progress,
+    with_token_events,
+    ProgressCallback,
+    _validate_generated_query,
+    _execute_validated_query,
+    _execute_cached_query
+)
+
+logger = logging.getLogger(__name__)
+
+TokenCallback = Callable[[str], Optional[Awaitable[None]]]
+
+
+class AsyncLLMClient:
+    """
+    Ollama client on a pooled httpx.AsyncClient.
+
+    Many in-flight requests share one connection pool and the event loop's
+    thread. Connection failures are retried by the transport; read errors are
+    not, so a slow generation is never started twice.
+    """
+
+    def __init__(
+        self,
+        base_url: str = None,
+        pool_size: int = 10,
+        connect_timeout: float = 5,
+        read_timeout: float = 120,
+        max_retries: int = 3
+    ):
+        self.base_url = get_ollama_base_url(base_url)
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=httpx.AsyncHTTPTransport(retries=max_retries)
+        )
+
+    async def complete(
+        self,
+        model: str,
+        prompt: str,
+        system_prompt: str = None,
+        on_token: Optional[TokenCallback] = None,
+        options: Optional[Dict[str, Any]] = None,
+        stop_at_sql_block: bool = True
+    ) -> str:
+        """
+        Stream a chat completion and return its text.
+
+        Args:
+            model (str): Model name
+            prompt (str): User prompt
+            system_prompt (str, optional): System prompt
+            on_token (TokenCallback, optional): Called (or awaited) with each chunk
+            options (Dict[str, Any], optional): Ollama sampling options
+            stop_at_sql_block (bool): Stop generating once the first ```sql block is closed
+
+        Returns:
+            str: Completion text
+        """
+        messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        messages.append({"role": "user", "content": prompt})
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+            "keep_alive": LLM_CONFIG['keep_alive'],
+            "options": {"temperature": 0.1, "top_p": 0.1, "num_predict": 1024, **(options or {})}
+        }
+
+        text = ""
+        async with self._client.stream("POST", "/api/chat", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+
+                token = chunk.get("message", {}).get("content", "")
+                if token:
+                    text += token
+                    if on_token is not None:
+                        result = on_token(token)
+                        if asyncio.iscoroutine(result):
+                            await result
+
+                if chunk.get("done"):
+                    record_prompt_eval(model, prompt, system_prompt, chunk)
+                    break
+                if stop_at_sql_block and has_complete_sql_block(text):
+                    logger.info(f"SQL block complete after {len(text)} characters, stopping generation")
+                    break
+        return text
+
+    async def embed(self, text: str, model: str = None) -> np.ndarray:
+        """Embed text with /api/embed and return a unit-length float32 vector."""
+        response = await self._client.post(
+            "/api/embed",
+            json={"model": model or SEMANTIC_CACHE_CONFIG['embedding_model'], "input": text}
+        )
+        response.raise_for_status()
+        vector = np.asarray(response.json()["embeddings"][0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def warmup(self, model: str) -> bool:
+        """
+        Ask Ollama to load a model into memory without generating anything.
+
+        Returns:
+            bool: True if the model is loaded
+        """
+        try:
+            response = await self._client.post(
+                "/api/generate",
+                json={"model": model, "prompt": "", "stream": False, "keep_alive": LLM_CONFIG['keep_alive']}
+            )
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.warning(f"Model warmup failed: {str(e)}")
+            return False
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# httpx async clients belong to the event loop that created them
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncLLMClient]" = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+# Blocking database, SQLite and ODBC work runs here instead of on the event loop
+_db_executor = ThreadPoolExecutor(max_workers=ASYNC_PIPELINE_CONFIG['db_workers'], thread_name_prefix="async-db")
+
+
+def get_async_llm_client() -> AsyncLLMClient:
+    """Get the Ollama client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = AsyncLLMClient(
+                base_url=LLM_CONFIG['api_base'],
+                pool_size=LLM_TRANSPORT_CONFIG['pool_size'],
+                connect_timeout=LLM_TRANSPORT_CONFIG['connect_timeout'],
+                read_timeout=LLM_TRANSPORT_CONFIG['read_timeout'],
+                max_retries=LLM_TRANSPORT_CONFIG['max_retries']
+            )
+            _async_clients[loop] = client
+    return client
+
+
+async def close_async_llm_client() -> None:
+    """Close the running event loop's Ollama client, e.g. on application shutdown."""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+async def run_db(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking database call on the shared DB executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(func, *args, **kwargs))
+
+
+async def _load_schema(database_name: str):
+    schema_map = await run_db(get_schema_map, database_name)
+    schema_version = await run_db(get_schema_version, database_name)
+    return schema_map, schema_version
+
+
+async def process_user_prompt_async(
+    prompt: str,
+    database_name: str,
+    on_token: Optional[TokenCallback] = None,
+    use_cache: bool = True,
+    query_id: Optional[str] = None,
+    on_event: Optional[ProgressCallback] = None
+) -> dict:
+    """
+    Async version of llm_engine.process_user_prompt with the same response shape.
+
+    The schema is loaded while the model is warmed up, LLM calls stream over
+    an async HTTP client, and database, cache and audit work runs on a small
+    thread pool, so many requests can be in flight on one event loop.
+    Cancelling the task cancels the running query on the server.
+
+    Args:
+        prompt (str): User request
+        database_name (str): Database to query
+        on_token (TokenCallback, optional): Called (or awaited) with each generated chunk
+        use_cache (bool): Set to False to always generate new SQL
+        query_id (str, optional): Id under which the query can be cancelled
+        on_event (ProgressCallback, optional): Progress events as in process_user_prompt.
+            Events of the execution step are sent from a DB executor thread, so the
+            callback must be thread-safe (e.g. loop.call_soon_threadsafe)
+
+    Returns:
+        dict: {"response": ..., "debug_info": ...}
+    """
+    query_id = query_id or uuid.uuid4().hex
+    started = time.monotonic()
+    try:
+        on_token = with_token_events(on_token, on_event)
+        llm = get_llm_instance()
+        client = get_async_llm_client()
+
+        # Prefetch the schema while Ollama loads the model
+        (schema_map, schema_version), _ = await asyncio.gather(
+            _load_schema(database_name),
+            client.warmup(llm.model)
+        )
+        emit_progress(
+            on_event, "schema_loaded",
+            database=database_name,
+            schema_version=schema_version,
+            tables=sum(len(schema.get('tables', {})) for schema in schema_map.values())
+        )
+
+        use_cache = use_cache and GENERATION_CACHE_CONFIG['enabled']
+        if use_cache:
+            cached_query = await run_db(get_generation_cache().get, prompt, database_name, schema_version, llm.model)
+            if cached_query:
+                debug_info = {
+                    "initial_query": cached_query,
+                    "generation_cache": "hit",
+                    "tool_calls": [
+                        f"USER PROMPT: {prompt}",
+                        f"CACHE HIT: reusing validated SQL for schema version {schema_version}"
+                    ]
+                }
+                emit_progress(on_event, "cache_hit", kind="exact", sql=cached_query)
+                result = await _execute_async(cached_query, debug_info, prompt, query_id, schema_version, on_event, cached=True)
+                if result is not None:
+                    return result
+                await run_db(get_generation_cache().remove, prompt, database_name, schema_version, llm.model)
+                get_semantic_cache().remove(cached_query, database_name, schema_version, llm.model)
+
+        prompt_vector = None
+        if use_cache and SEMANTIC_CACHE_CONFIG['enabled']:
+            semantic_cache = get_semantic_cache()
+            try:
+                prompt_vector = await client.embed(prompt, semantic_cache.embedding_model)
+            except Exception as e:
+                logger.warning(f"Semantic cache embedding failed: {str(e)}")
+            match = None
+            if prompt_vector is not None:
+                match = semantic_cache.lookup(prompt_vector, database_name, schema_version, llm.model)
+            if match:
+                cached_query, matched_prompt, similarity = match
+                debug_info = {
+                    "initial_query": cached_query,
+                    "generation_cache": "semantic hit",
+                    "semantic_match": {"prompt": matched_prompt, "similarity": round(similarity, 4)},
+                    "tool_calls": [
+                        f"USER PROMPT: {prompt}",
+                        f"SEMANTIC CACHE HIT: reusing validated SQL of '{matched_prompt}' (similarity {similarity:.3f})"
+                    ]
+                }
+                emit_progress(on_event, "cache_hit", kind="semantic", sql=cached_query, similarity=round(similarity, 4))
+                result = await _execute_async(cached_query, debug_info, prompt, query_id, schema_version, on_event, cached=True)
+                if result is not None:
+                    if result["debug_info"].get("executed"):
+                        await run_db(get_generation_cache().put, prompt, database_name, schema_version, llm.model, cached_query)
+                    return result
+                semantic_cache.remove(cached_query, database_name, schema_version, llm.model)
+
+        assembled = SQLPrompt(
+            prompt=prompt,
+            schema_map=schema_map,
+            description="Generate SQL query for user request",
+            schema_version=schema_version,
+            model=llm.model
+        ).assemble()
+        full_prompt = assembled.text
+        emit_progress(
+            on_event, "prompt_built",
+            characters=len(full_prompt),
+            tokens=assembled.tokens,
+            prefix_tokens=assembled.prefix_tokens,
+            budget=assembled.budget,
+            tables=len(assembled.tables),
+            omitted_tables=len(assembled.omitted_tables)
+        )
+
+        initial_response = await client.complete(llm.model, full_prompt, system_prompt=assembled.system, on_token=on_token)
+        initial_query = clean_sql_response(initial_response)
+        debug_info = {
+            "initial_prompt": full_prompt,
+            "initial_response": initial_response,
+            "initial_query": initial_query,
+            "system_prompt": assembled.system,
+            "prompt_tokens": {
+                "estimated": assembled.tokens,
+                "prefix": assembled.prefix_tokens,
+                "budget": assembled.budget,
+                "omitted_tables": assembled.omitted_tables
+            },
+            "generation_cache": "miss" if use_cache else "disabled",
+            "tool_calls": [f"USER PROMPT: {prompt}"]
+        }
+
+        final_query = initial_query
+        error = _validate_generated_query(initial_query, schema_map)
+        emit_progress(on_event, "candidate_sql", stage="initial", sql=initial_query)
+        emit_progress(on_event, "validation", stage="initial", valid=error is None, error=error)
+        if error:
+            debug_info["validation_error"] = error
+            debug_info["tool_calls"].append(f"ERROR: {error}")
+
+            refinement_prompt = refine_sql_query(initial_query, error, schema_map)
+            debug_info["tool_calls"].append(f"REFINEMENT PROMPT: {refinement_prompt}")
+            refinement_response = await client.complete(llm.model, refinement_prompt, on_token=on_token)
+            final_query = clean_sql_response(refinement_response)
+            debug_info.update({
+                "refinement_prompt": refinement_prompt,
+                "refinement_response": refinement_response,
+                "final_query": final_query
+            })
+
+            refined_error = _validate_generated_query(final_query, schema_map)
+            emit_progress(on_event, "candidate_sql", stage="refined", sql=final_query)
+            emit_progress(on_event, "validation", stage="refined", valid=refined_error is None, error=refined_error)
+            if refined_error:
+                debug_info["tool_calls"].append(f"ERROR: {refined_error}")
+                return {
+                    "response": f"I apologize, but I'm having trouble generating a valid SQL query. The error is: {refined_error}",
+                    "debug_info": debug_info
+                }
+
+        result = await _execute_async(final_query, debug_info, prompt, query_id, schema_version, on_event)
+        # Only SQL that actually ran is worth replaying for the same question
+        if use_cache and result["debug_info"].get("executed"):
+            await run_db(get_generation_cache().put, prompt, database_name, schema_version, llm.model, final_query)
+            if prompt_vector is not None:
+                get_semantic_cache().add(prompt_vector, prompt, final_query, database_name, schema_version, llm.model)
+        return result
+
+    except QueryCancelledError:
+        logger.info("Request stopped before its query ran")
+        return {
+            "response": "⏹️ Stopped.",
+            "debug_info": {"cancelled": True}
+        }
+    except Exception as e:
+        logger.error(f"Error in process_user_prompt_async: {str(e)}")
+        return {
+            "response": f"I apologize, but I encountered an error: {str(e)}",
+            "debug_info": {}
+        }
+    finally:
+        logger.debug(f"Async request {query_id} finished in {time.monotonic() - started:.2f}s")
+
+
+async def _execute_async(
+    query: str,
+    debug_info: dict,
+    prompt: str,
+    query_id: str,
+    schema_version: Optional[str],
+    on_event: Optional[ProgressCallback] = None,
+    cached: bool = False
+) -> Optional[dict]:
+    """
+    Run cost gate, execution and audit on the DB executor; cancel the query if the task is cancelled.
+
+    With cached=True the SQL came from a cache, and None is returned if it fails
+    or is rejected (see llm_engine._execute_cached_query).
+    """
+    execute = _execute_cached_query if cached else _execute_validated_query
+    try:
+        return await run_db(execute, query, debug_info, prompt, query_id, schema_version, on_event=on_event)
+    except asyncio.CancelledError:
+        # The executor thread keeps running until the server stops the query
+        cancel_query(query_id)
+        raise
+
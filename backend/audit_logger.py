@@ -1,5 +1,9 @@
 import sqlite3
 import os
+import atexit
+import queue
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 import logging
@@ -7,6 +11,11 @@ from typing import Optional, Dict, Any
 from backend.sql_connector import SQLConnector
 import json
 
+try:
+    import fcntl
+except ImportError:  # Windows: legacy log migration is then only serialized within the process
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 AUDIT_FOLDER = Path("data/audit")
@@ -25,17 +34,44 @@ CREATE TABLE IF NOT EXISTS query_audit_log (
 );
 """
 
+# Entries written before an fsync is forced, and the longest an entry may wait for one
+# (enforced by a background flusher once writes stop)
+FSYNC_BATCH_SIZE = 20
+FSYNC_INTERVAL_SECONDS = 1.0
+
+# Block size used when reading the log backwards from the end
+TAIL_READ_BLOCK_SIZE = 64 * 1024
+
 class AuditLogger:
-    def __init__(self, log_file='audit_log.json'):
+    """
+    Append-only JSONL audit log.
+    
+    Each event is one JSON line written with a single O_APPEND write, so logging
+    costs the same no matter how large the file is and concurrent writers never
+    overwrite each other. Writes reach the OS immediately; fsync is batched every
+    FSYNC_BATCH_SIZE entries, and a background thread fsyncs whatever is left
+    FSYNC_INTERVAL_SECONDS after it was written, and on close/exit.
+    A legacy JSON array log (audit_log.json) is migrated on first use, under a
+    file lock shared with other processes.
+    """
+    
+    def __init__(self, log_file='audit_log.jsonl'):
         self.logger = logging.getLogger(__name__)
-        self.log_file = Path('logs') / log_file
+        self.log_file = (Path('logs') / log_file).with_suffix('.jsonl')
         
         # Ensure logs directory exists
         self.log_file.parent.mkdir(exist_ok=True)
         
-        # Create log file if it doesn't exist
-        if not self.log_file.exists():
-            self.log_file.write_text('[]')
+        self._lock = threading.Lock()
+        self._pending_fsync = 0
+        self._last_fsync = time.monotonic()
+        
+        self._migrate_legacy_log(self.log_file.with_suffix('.json'))
+        self._fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="audit-log-fsync", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
         
     def log_query_event(self, query, params=None, user="system", status="completed", row_count=None, error=None):
         """Log a query event to the audit log.
@@ -49,9 +85,6 @@ class AuditLogger:
             error (str, optional): Error message if query failed
         """
         try:
-            # Read existing logs
-            logs = self._read_logs()
-            
             # Create new log entry
             log_entry = {
                 "timestamp": datetime.now().isoformat(),
@@ -62,10 +95,15 @@ class AuditLogger:
                 "row_count": row_count,
                 "error": error
             }
+            line = (json.dumps(log_entry, default=str) + "\n").encode("utf-8")
             
-            # Add new entry and write back
-            logs.append(log_entry)
-            self._write_logs(logs)
+            with self._lock:
+                # One write() per entry keeps concurrent appends from interleaving
+                os.write(self._fd, line)
+                self._pending_fsync += 1
+                if (self._pending_fsync >= FSYNC_BATCH_SIZE
+                        or time.monotonic() - self._last_fsync >= FSYNC_INTERVAL_SECONDS):
+                    self._fsync()
             
         except Exception as e:
             self.logger.error(f"Failed to log query event: {str(e)}")
@@ -73,46 +111,149 @@ class AuditLogger:
     def get_logs(self, limit=None, status=None, user=None):
         """Get audit logs with optional filtering.
         
+        With a limit, the file is read backwards from the end only until enough
+        matching entries are found.
+        
         Args:
             limit (int, optional): Maximum number of logs to return
             status (str, optional): Filter by status
             user (str, optional): Filter by user
         
         Returns:
-            list: List of log entries
+            list: List of log entries, oldest first
         """
         try:
-            logs = self._read_logs()
+            def matches(log):
+                return (not status or log.get('status') == status) and (not user or log.get('user') == user)
             
-            # Apply filters
-            if status:
-                logs = [log for log in logs if log.get('status') == status]
-            if user:
-                logs = [log for log in logs if log.get('user') == user]
+            if not limit:
+                return [log for log in self._read_logs() if matches(log)]
             
-            # Apply limit
-            if limit:
-                logs = logs[-limit:]
-                
+            logs = []
+            for log in self._read_logs_reversed():
+                if matches(log):
+                    logs.append(log)
+                    if len(logs) >= limit:
+                        break
+            logs.reverse()
             return logs
         except Exception as e:
             self.logger.error(f"Failed to get logs: {str(e)}")
             return []
     
+    def close(self):
+        """Fsync outstanding entries and close the log file."""
+        self._stopped.set()
+        with self._lock:
+            if self._fd is None:
+                return
+            try:
+                self._fsync()
+                os.close(self._fd)
+            except Exception as e:
+                self.logger.error(f"Failed to close audit log: {str(e)}")
+            self._fd = None
+    
+    def _flush_periodically(self):
+        """Fsync entries left behind by a burst once they are FSYNC_INTERVAL_SECONDS old."""
+        while not self._stopped.wait(FSYNC_INTERVAL_SECONDS / 4):
+            with self._lock:
+                if (self._fd is not None and self._pending_fsync
+                        and time.monotonic() - self._last_fsync >= FSYNC_INTERVAL_SECONDS):
+                    try:
+                        self._fsync()
+                    except Exception as e:
+                        self.logger.error(f"Failed to fsync audit log: {str(e)}")
+    
+    def _fsync(self):
+        """Flush written entries to disk. Caller must hold the lock."""
+        if self._pending_fsync:
+            os.fsync(self._fd)
+        self._pending_fsync = 0
+        self._last_fsync = time.monotonic()
+    
     def _read_logs(self):
-        """Read logs from file."""
+        """Read all logs from file, oldest first."""
         try:
-            return json.loads(self.log_file.read_text())
+            with open(self.log_file, 'rb') as f:
+                return [log for log in map(self._parse_line, f) if log is not None]
+        except FileNotFoundError:
+            return []
         except Exception as e:
             self.logger.error(f"Failed to read logs: {str(e)}")
             return []
     
-    def _write_logs(self, logs):
-        """Write logs to file."""
+    def _read_logs_reversed(self):
+        """Yield logs newest first, reading the file in blocks from the end."""
+        try:
+            with open(self.log_file, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                position = f.tell()
+                remainder = b""
+                while position > 0:
+                    read_size = min(TAIL_READ_BLOCK_SIZE, position)
+                    position -= read_size
+                    f.seek(position)
+                    lines = (f.read(read_size) + remainder).split(b"\n")
+                    # The first piece may be the tail of a line that starts in the previous block
+                    remainder = lines.pop(0)
+                    for line in reversed(lines):
+                        log = self._parse_line(line)
+                        if log is not None:
+                            yield log
+                log = self._parse_line(remainder)
+                if log is not None:
+                    yield log
+        except FileNotFoundError:
+            return
+    
+    def _parse_line(self, line):
+        """Parse one JSONL line, skipping blanks and partially written entries."""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            self.logger.warning(f"Skipping unreadable audit log line: {line[:80]!r}")
+            return None
+    
+    def _migrate_legacy_log(self, legacy_file):
+        """
+        Convert a JSON array log to JSONL once, keeping the original as *.json.migrated.
+        
+        Other processes may already have the JSONL file open for appending, so
+        the entries are appended to it rather than the file being replaced. A
+        lock file serializes the migration between processes, and the legacy
+        file is checked again once the lock is held.
+        """
+        if not legacy_file.exists() or legacy_file == self.log_file:
+            return
         try:
-            self.log_file.write_text(json.dumps(logs, indent=2))
+            with self._lock, open(self.log_file.with_suffix('.jsonl.lock'), 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                if not legacy_file.exists():
+                    return
+                logs = json.loads(legacy_file.read_text() or "[]")
+                lines = "".join(json.dumps(log, default=str) + "\n" for log in logs).encode("utf-8")
+                existing_size = self.log_file.stat().st_size if self.log_file.exists() else 0
+                already_migrated = False
+                if existing_size:
+                    # An earlier migration that stopped before the rename left the entries at the start
+                    with open(self.log_file, 'rb') as f:
+                        already_migrated = bool(lines) and f.read(len(lines)) == lines
+                    if not already_migrated:
+                        self.logger.warning(f"Audit log {self.log_file} is not empty; legacy entries are appended after its entries")
+                if not already_migrated:
+                    with open(self.log_file, 'ab') as f:
+                        f.write(lines)
+                        f.flush()
+                        os.fsync(f.fileno())
+                legacy_file.rename(legacy_file.with_suffix('.json.migrated'))
+            self.logger.info(f"Migrated {len(logs)} audit entries from {legacy_file} to {self.log_file}")
         except Exception as e:
-            self.logger.error(f"Failed to write logs: {str(e)}")
+            self.logger.error(f"Failed to migrate legacy audit log {legacy_file}: {str(e)}")
 
 def init_audit_log():
     """
@@ -127,37 +268,172 @@ def init_audit_log():
     except Exception as e:
         logger.warning("[AuditLogger] Could not initialize audit log: %s", e)
 
+# Background writer for the sqlite audit log
+AUDIT_QUEUE_SIZE = 10000
+AUDIT_BATCH_SIZE = 100
+AUDIT_FLUSH_INTERVAL_MS = 200
+
+INSERT_EVENT_SQL = """
+INSERT INTO query_audit_log
+(timestamp, user_prompt, generated_sql, success, error_message, execution_time_ms)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+class AuditWriter:
+    """
+    Writes audit rows to sqlite from a single background thread.
+    
+    Callers only enqueue a tuple; the writer holds one long-lived connection
+    and commits rows in batches of up to batch_size, or whatever has arrived
+    within flush_interval_ms. When the bounded queue is full, events are
+    dropped and counted rather than blocking the request.
+    """
+    
+    def __init__(
+        self,
+        db_path: Path = AUDIT_DB_PATH,
+        queue_size: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval_ms: int = AUDIT_FLUSH_INTERVAL_MS
+    ):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stats_lock = threading.Lock()
+        self._stats = {"written": 0, "dropped": 0, "batches": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def submit(self, row: tuple) -> bool:
+        """Queue a row for insertion. Returns False if it was dropped because the queue is full."""
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self._stats["dropped"] += 1
+            return False
+    
+    def flush(self, timeout: float = 5) -> bool:
+        """Wait until every row queued so far is committed. Returns False on timeout."""
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+    
+    def close(self, timeout: float = 5) -> None:
+        """Flush outstanding rows and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self.flush(timeout)
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return written/dropped/batch counters and the current queue depth."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
+    
+    def _run(self) -> None:
+        conn = None
+        running = True
+        while running:
+            item = self._queue.get()
+            batch, waiters = [], []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    running = False
+                    break
+                if isinstance(item, threading.Event):
+                    # A flush marker: commit what we have now
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            if batch:
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    with conn:
+                        conn.executemany(INSERT_EVENT_SQL, batch)
+                    with self._stats_lock:
+                        self._stats["written"] += len(batch)
+                        self._stats["batches"] += 1
+                except Exception as e:
+                    logger.warning("[AuditLogger] Failed to write %d audit events: %s", len(batch), e)
+                    with self._stats_lock:
+                        self._stats["failed"] += len(batch)
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+            for waiter in waiters:
+                waiter.set()
+        
+        if conn is not None:
+            conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=WAL;')
+        conn.execute('PRAGMA synchronous=NORMAL;')
+        conn.execute(CREATE_TABLE_SQL)
+        conn.commit()
+        return conn
+
+# Global writer instance
+_audit_writer = None
+_audit_writer_lock = threading.Lock()
+
+def get_audit_writer() -> AuditWriter:
+    """Get the process-wide audit writer, starting it on first use."""
+    global _audit_writer
+    if _audit_writer is None:
+        with _audit_writer_lock:
+            if _audit_writer is None:
+                _audit_writer = AuditWriter()
+    return _audit_writer
+
 def log_query_event(user_prompt: str, generated_sql: str, success: bool, error_message: str = None, execution_time_ms: int = None):
     """
-    Log a query event safely and synchronously to the audit log.
+    Queue a query event for the audit log. The row is written by the background audit writer.
     """
-    try:
-        with sqlite3.connect(AUDIT_DB_PATH) as conn:
-            conn.execute(
-                """
-                INSERT INTO query_audit_log
-                (timestamp, user_prompt, generated_sql, success, error_message, execution_time_ms)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    datetime.now().isoformat(timespec="seconds"),
-                    user_prompt,
-                    generated_sql,
-                    1 if success else 0,
-                    error_message,
-                    execution_time_ms
-                )
-            )
-            conn.commit()
-        logger.info("[AuditLogger] Logged query event successfully.")
-    except Exception as e:
-        logger.warning("[AuditLogger] Failed to log query event: %s", e)
+    queued = get_audit_writer().submit((
+        datetime.now().isoformat(timespec="seconds"),
+        user_prompt,
+        generated_sql,
+        1 if success else 0,
+        error_message,
+        execution_time_ms
+    ))
+    if not queued:
+        logger.warning("[AuditLogger] Audit queue full, dropped query event")
 
 def fetch_recent_audit_logs(limit: int = 50):
     """
     Retrieves the N most recent audit logs.
     """
     try:
+        # Make events still queued in the writer visible to this read
+        get_audit_writer().flush(timeout=1)
         with sqlite3.connect(AUDIT_DB_PATH) as conn:
             cursor = conn.execute(
                 """
@@ -0,0 +1,278 @@
+"""
+Connection Pool Module
+Bounded, thread-safe pool of pyodbc connections keyed by (server, database, user)
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+import pyodbc
+
+from backend.system import DB_CONFIG, POOL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out within the acquire timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of pyodbc connections for a single connection string.
+
+    Connections are checked out with acquire() and returned with release().
+    Idle connections older than max_idle_seconds are closed instead of reused,
+    and connections idle for longer than validate_after_seconds are pinged
+    with SELECT 1 before being handed out.
+    """
+
+    def __init__(
+        self,
+        conn_str: str,
+        max_size: int = 10,
+        acquire_timeout: float = 30,
+        max_idle_seconds: float = 300,
+        validate_after_seconds: float = 30,
+        name: str = "default"
+    ):
+        self.conn_str = conn_str
+        self.max_size = max(1, max_size)
+        self.acquire_timeout = acquire_timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.validate_after_seconds = validate_after_seconds
+        self.name = name
+
+        self._idle = deque()  # (connection, returned_at) pairs, most recent on the right
+        self._size = 0  # idle + checked out connections
+        self._cond = threading.Condition(threading.Lock())
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "creations": 0,
+            "recycled": 0,
+            "invalidated": 0,
+            "discarded": 0
+        }
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """
+        Check a connection out of the pool.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free slot. Defaults to acquire_timeout.
+
+        Returns:
+            pyodbc.Connection: A validated connection owned by the caller until release()
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            candidate = None
+            waited = False
+            with self._cond:
+                expired = self._pop_expired()
+                if self._idle:
+                    candidate, returned_at = self._idle.pop()
+                elif self._size < self.max_size:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+                    self._stats["misses"] += 1
+                else:
+                    self._stats["waits"] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout}s waiting for a connection from pool '{self.name}'"
+                        )
+                    waited = True
+
+            self._close_quietly(expired)
+            if waited:
+                continue
+
+            if candidate is None:
+                return self._create()
+
+            if time.monotonic() - returned_at < self.validate_after_seconds or self._is_alive(candidate):
+                with self._cond:
+                    self._stats["hits"] += 1
+                return candidate
+
+            logger.info(f"Discarding dead connection from pool '{self.name}'")
+            self._close_quietly([candidate])
+            with self._cond:
+                self._stats["invalidated"] += 1
+                self._size -= 1
+                self._cond.notify()
+
+    def release(self, conn: Any, discard: bool = False) -> None:
+        """
+        Return a checked-out connection to the pool.
+
+        Args:
+            conn: Connection previously returned by acquire()
+            discard (bool): Close the connection instead of reusing it (e.g. after a broken session)
+        """
+        if conn is None:
+            return
+
+        if not discard:
+            try:
+                # Never hand an open transaction to the next borrower
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Rollback on release failed, discarding connection: {str(e)}")
+                discard = True
+
+        if discard:
+            self._close_quietly([conn])
+
+        with self._cond:
+            if discard:
+                self._size -= 1
+                self._stats["discarded"] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self) -> None:
+        """Close all idle connections. Checked-out connections are closed when released."""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        self._close_quietly(idle)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool counters and current occupancy."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size
+            })
+        return stats
+
+    def _pop_expired(self) -> list:
+        """Remove idle connections past max_idle_seconds. Caller must hold the lock."""
+        expired = []
+        now = time.monotonic()
+        # Oldest connections sit on the left of the deque
+        while self._idle and now - self._idle[0][1] > self.max_idle_seconds:
+            conn, _ = self._idle.popleft()
+            expired.append(conn)
+            self._size -= 1
+            self._stats["recycled"] += 1
+        if expired:
+            self._cond.notify(len(expired))
+        return expired
+
+    def _create(self) -> Any:
+        """Open a new connection for a slot that has already been reserved."""
+        try:
+            conn = pyodbc.connect(self.conn_str)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["creations"] += 1
+        logger.info(f"Opened new connection for pool '{self.name}'")
+        return conn
+
+    @staticmethod
+    def _is_alive(conn: Any) -> bool:
+        """Check that a connection still answers a trivial query."""
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connections) -> None:
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+# Pools keyed by (server or DSN, database, user)
+_pools: Dict[Tuple[str, str, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def build_connection_string(database: str = None) -> str:
+    """Build the ODBC connection string for the configured server and the given database."""
+    if DB_CONFIG["mode"] == "DSN":
+        return (
+            f"DSN={DB_CONFIG['dsn']};"
+            f"UID={DB_CONFIG['user']};"
+            f"PWD={DB_CONFIG['password']}"
+        )
+    return (
+        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+        f"SERVER={DB_CONFIG['server']};"
+        f"DATABASE={database or DB_CONFIG['database']};"
+        f"UID={DB_CONFIG['user']};"
+        f"PWD={DB_CONFIG['password']}"
+    )
+
+
+def get_pool_key(database: str = None) -> Tuple[str, str, str]:
+    """Return the (server, database, user) key for a database on the configured server."""
+    if DB_CONFIG["mode"] == "DSN":
+        # DSN connections ignore the database override
+        return (f"DSN:{DB_CONFIG['dsn']}", "", DB_CONFIG['user'])
+    return (DB_CONFIG['server'], database or DB_CONFIG['database'], DB_CONFIG['user'])
+
+
+def get_connection_pool(database: str = None) -> ConnectionPool:
+    """Get or create the connection pool for a database."""
+    key = get_pool_key(database)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                build_connection_string(database),
+                max_size=POOL_CONFIG['max_size'],
+                acquire_timeout=POOL_CONFIG['acquire_timeout'],
+                max_idle_seconds=POOL_CONFIG['max_idle_seconds'],
+                validate_after_seconds=POOL_CONFIG['validate_after_seconds'],
+                name="/".join(part for part in key if part)
+            )
+            _pools[key] = pool
+            logger.info(f"Created connection pool '{pool.name}' (max_size={pool.max_size})")
+        return pool
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Return stats for every pool, keyed by pool name."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def close_all_pools() -> None:
+    """Close idle connections in every pool and forget the pools."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
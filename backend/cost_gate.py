@@ -0,0 +1,243 @@
+"""
+Cost Gate Module
+Estimated-plan (SHOWPLAN_XML) checks that stop expensive generated queries before they run
+"""
+
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from backend.system import COST_GATE_CONFIG
+from backend.sql_connector import SQLConnector
+from backend.result_cache import canonicalize_sql
+
+logger = logging.getLogger(__name__)
+
+SHOWPLAN_NAMESPACE = {"sp": "http://schemas.microsoft.com/sqlserver/2004/07/showplan"}
+
+# Physical operators that read a whole table or index
+SCAN_OPERATORS = {"Table Scan", "Clustered Index Scan", "Index Scan", "Columnstore Index Scan"}
+
+ALLOW = "allow"
+CONFIRM = "confirm"
+REJECT = "reject"
+
+
+class ScanOperator(BaseModel):
+    operator: str
+    table: Optional[str] = None
+    estimated_rows_read: float = 0
+
+
+class PlanEstimate(BaseModel):
+    estimated_rows: float = 0
+    subtree_cost: float = 0
+    scans: List[ScanOperator] = Field(default_factory=list)
+
+
+class CostDecision(BaseModel):
+    decision: str = ALLOW
+    reasons: List[str] = Field(default_factory=list)
+    estimate: Optional[PlanEstimate] = None
+    plan_cached: bool = False
+
+
+def parse_showplan_xml(plans: List[str]) -> PlanEstimate:
+    """
+    Summarize SHOWPLAN_XML documents.
+
+    Args:
+        plans (List[str]): One showplan document per result set of the batch
+
+    Returns:
+        PlanEstimate: Totals over all statements and the full scans found in them
+    """
+    estimate = PlanEstimate()
+    for plan in plans:
+        root = ET.fromstring(plan)
+        for statement in root.iterfind(".//sp:StmtSimple", SHOWPLAN_NAMESPACE):
+            estimate.subtree_cost += float(statement.get("StatementSubTreeCost", 0))
+            estimate.estimated_rows += float(statement.get("StatementEstRows", 0))
+        for rel_op in root.iterfind(".//sp:RelOp", SHOWPLAN_NAMESPACE):
+            operator = rel_op.get("PhysicalOp")
+            if operator not in SCAN_OPERATORS:
+                continue
+            table = None
+            target = rel_op.find("./*/sp:Object", SHOWPLAN_NAMESPACE)
+            if target is not None:
+                table = ".".join(
+                    part.strip("[]") for part in (target.get("Schema"), target.get("Table")) if part
+                ) or None
+            rows_read = rel_op.get("EstimatedRowsRead") or rel_op.get("TableCardinality") or rel_op.get("EstimateRows") or 0
+            estimate.scans.append(ScanOperator(operator=operator, table=table, estimated_rows_read=float(rows_read)))
+    return estimate
+
+
+def fetch_estimated_plan(sql: str, database: str = None) -> PlanEstimate:
+    """
+    Get the estimated plan of a query without running it.
+
+    SHOWPLAN_XML is a session setting, so it is switched on and off on the same
+    pooled connection; if switching it off fails, the connection is discarded
+    rather than returned to the pool in showplan mode.
+
+    Args:
+        sql (str): Query to estimate
+        database (str, optional): Database name
+
+    Returns:
+        PlanEstimate: Parsed plan summary
+    """
+    connector = SQLConnector(database=database)
+    discard = False
+    try:
+        cursor = connector.cursor
+        cursor.execute("SET SHOWPLAN_XML ON")
+        try:
+            cursor.execute(sql)
+            plans = []
+            while True:
+                row = cursor.fetchone()
+                if row is not None:
+                    plans.append(row[0])
+                if not cursor.nextset():
+                    break
+        finally:
+            try:
+                cursor.execute("SET SHOWPLAN_XML OFF")
+            except Exception as e:
+                logger.warning(f"Could not switch SHOWPLAN_XML off, discarding connection: {str(e)}")
+                discard = True
+        return parse_showplan_xml(plans)
+    finally:
+        connector.close(discard=discard)
+
+
+class CostGate:
+    """
+    Decides whether a generated query may run, from its estimated plan.
+
+    Queries whose estimated subtree cost or result rows exceed the reject
+    thresholds are refused; those above the confirm thresholds, or that fully
+    scan a large table, need the user's confirmation. Plans are cached per
+    database, schema version and canonical SQL, so re-asking a question does
+    not pay for another compilation.
+    """
+
+    def __init__(
+        self,
+        confirm_cost: float = 50,
+        reject_cost: float = 1000,
+        confirm_rows: float = 1_000_000,
+        reject_rows: float = 100_000_000,
+        scan_rows: float = 1_000_000,
+        plan_cache_size: int = 500
+    ):
+        self.confirm_cost = confirm_cost
+        self.reject_cost = reject_cost
+        self.confirm_rows = confirm_rows
+        self.reject_rows = reject_rows
+        self.scan_rows = scan_rows
+        self.plan_cache_size = plan_cache_size
+        self._plans: "OrderedDict[Tuple, PlanEstimate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"checks": 0, "plan_hits": 0, "allowed": 0, "confirm": 0, "rejected": 0, "errors": 0}
+
+    def check(self, sql: str, database: str = None, schema_version: Optional[str] = None) -> CostDecision:
+        """
+        Estimate a query and decide whether it may run.
+
+        The gate fails open: if the plan cannot be estimated the query is allowed
+        and the error is logged.
+
+        Args:
+            sql (str): Query to check
+            database (str, optional): Database name
+            schema_version (str, optional): Schema version stamp, part of the plan cache key
+
+        Returns:
+            CostDecision: allow / confirm / reject with the reasons and the estimate
+        """
+        key = (database or "default", schema_version, canonicalize_sql(sql))
+        with self._lock:
+            self._stats["checks"] += 1
+            estimate = self._plans.get(key)
+            if estimate is not None:
+                self._plans.move_to_end(key)
+                self._stats["plan_hits"] += 1
+        plan_cached = estimate is not None
+
+        if estimate is None:
+            try:
+                estimate = fetch_estimated_plan(sql, database)
+            except Exception as e:
+                logger.warning(f"Cost estimation failed, allowing query: {str(e)}")
+                with self._lock:
+                    self._stats["errors"] += 1
+                return CostDecision(decision=ALLOW, reasons=[f"Plan estimate unavailable: {str(e)}"])
+            with self._lock:
+                self._plans[key] = estimate
+                while len(self._plans) > self.plan_cache_size:
+                    self._plans.popitem(last=False)
+
+        decision = self.evaluate(estimate)
+        decision.plan_cached = plan_cached
+        with self._lock:
+            self._stats[{ALLOW: "allowed", CONFIRM: "confirm", REJECT: "rejected"}[decision.decision]] += 1
+        logger.info(f"Cost gate: {decision.decision} (cost {estimate.subtree_cost:.2f}, rows {estimate.estimated_rows:.0f})")
+        return decision
+
+    def evaluate(self, estimate: PlanEstimate) -> CostDecision:
+        """Apply the thresholds to a plan estimate."""
+        rejects, confirms = [], []
+        if estimate.subtree_cost > self.reject_cost:
+            rejects.append(f"estimated cost {estimate.subtree_cost:,.1f} exceeds the limit of {self.reject_cost:,.0f}")
+        elif estimate.subtree_cost > self.confirm_cost:
+            confirms.append(f"estimated cost {estimate.subtree_cost:,.1f} is above {self.confirm_cost:,.0f}")
+        if estimate.estimated_rows > self.reject_rows:
+            rejects.append(f"about {estimate.estimated_rows:,.0f} rows estimated, above the limit of {self.reject_rows:,.0f}")
+        elif estimate.estimated_rows > self.confirm_rows:
+            confirms.append(f"about {estimate.estimated_rows:,.0f} rows estimated")
+        for scan in estimate.scans:
+            if scan.estimated_rows_read > self.scan_rows:
+                confirms.append(f"{scan.operator} of {scan.table or 'a table'} reads about {scan.estimated_rows_read:,.0f} rows")
+
+        if rejects:
+            return CostDecision(decision=REJECT, reasons=rejects + confirms, estimate=estimate)
+        if confirms:
+            return CostDecision(decision=CONFIRM, reasons=confirms, estimate=estimate)
+        return CostDecision(decision=ALLOW, estimate=estimate)
+
+    def invalidate(self, database: str = None) -> None:
+        """Drop cached plans for one database, or all of them when database is None."""
+        with self._lock:
+            for key in list(self._plans):
+                if database is None or key[0] == database:
+                    del self._plans[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return decision counters and the number of cached plans."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_plans"] = len(self._plans)
+        return stats
+
+
+# Global gate instance
+_cost_gate = CostGate(
+    confirm_cost=COST_GATE_CONFIG['confirm_cost'],
+    reject_cost=COST_GATE_CONFIG['reject_cost'],
+    confirm_rows=COST_GATE_CONFIG['confirm_rows'],
+    reject_rows=COST_GATE_CONFIG['reject_rows'],
+    scan_rows=COST_GATE_CONFIG['scan_rows'],
+    plan_cache_size=COST_GATE_CONFIG['plan_cache_size']
+)
+
+
+def get_cost_gate() -> CostGate:
+    """Get the process-wide cost gate."""
+    return _cost_gate
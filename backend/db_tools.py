@@ -14,11 +14,15 @@ import sqlalchemy as sa
 import sqlparse
 from sqlparse.sql import Identifier
 import pyodbc
-from backend.system import DB_CONFIG
+from backend.system import DB_CONFIG, RESULT_CACHE_CONFIG, QUERY_CONFIG
 from functools import lru_cache
-from backend.sql_connector import SQLConnector
+from backend.sql_connector import SQLConnector, execute_query_arrow, register_query, unregister_query
+from backend.query_result import ColumnarResult
+from backend.schema_registry import get_schema_registry
+from backend.result_cache import get_result_cache, is_cacheable
+from backend.cost_gate import get_cost_gate
 from enum import Enum
-from sqlglot import parse_one, exp
+from sqlglot import parse, parse_one, exp
 from sqlglot.schema import MappingSchema
 import streamlit as st
 
@@ -47,6 +51,8 @@ class ExecuteQueryInput(BaseModel):
 
 class ExecuteQueryOutput(BaseModel):
     rows: list[dict[str, Any]]
+    truncated: bool = False
+    truncated_reason: Optional[str] = None
 
 class SchemaMapOutput(BaseModel):
     schemas: dict[str, list[str]]
@@ -67,6 +73,10 @@ def clear_all_caches():
         clear_schema_cache()
         # Clear table description cache
         clear_table_cache()
+        # Clear cached query results
+        get_result_cache().invalidate()
+        # Clear cached estimated plans
+        get_cost_gate().invalidate()
         logger.info("Successfully cleared all caches")
         return True
     except Exception as e:
@@ -77,15 +87,15 @@ def clear_schema_cache():
     """Clear the schema cache"""
     logger.info("Clearing schema cache")
     
-    # Clear session state cache
-    for key in list(st.session_state.keys()):
-        if key.startswith('schema_map_'):
-            del st.session_state[key]
+    # Clear shared in-memory cache
+    get_schema_registry().invalidate()
     
     # Clear file cache
     try:
         for cache_file in CACHE_DIR.glob("*_schema.json"):
             cache_file.unlink()
+        for catalog_file in CACHE_DIR.glob("*_catalog.json"):
+            catalog_file.unlink()
     except Exception as e:
         logger.error(f"Error clearing cache files: {str(e)}")
 
@@ -95,6 +105,11 @@ def get_cache_path(database: str = None) -> Path:
     safe_db_name = database.replace('/', '_').replace('\\', '_') if database else 'default'
     return CACHE_DIR / f"{safe_db_name}_schema.json"
 
+def get_catalog_path(database: str = None) -> Path:
+    """Get path of the catalog snapshot (object_id/modify_date per table) stored next to the schema cache"""
+    cache_path = get_cache_path(database)
+    return cache_path.with_name(cache_path.name.replace("_schema.json", "_catalog.json"))
+
 def is_cache_valid(cache_path: Path) -> bool:
     """Check if cache is still valid"""
     if not cache_path.exists():
@@ -102,53 +117,183 @@ def is_cache_valid(cache_path: Path) -> bool:
     return time.time() - cache_path.stat().st_mtime < CACHE_DURATION
 
 def get_schema_map_from_cache(database: str = None) -> Dict:
-    """Get schema map from cache or build it"""
+    """
+    Get schema map from the shared registry, the file cache, or build it.
+    
+    The returned dict is shared by every session in the process and must not be mutated.
+    """
     try:
         cache_path = get_cache_path(database)
-        logger.info(f"Attempting to get schema map from cache. Cache path: {cache_path}")
-        
-        # Check session state first for faster access
-        cache_key = f"schema_map_{database or 'default'}"
-        if cache_key in st.session_state:
-            logger.info("Using schema map from session state")
-            return st.session_state[cache_key]
-        
-        # If not in session state, try file cache
-        if is_cache_valid(cache_path):
-            logger.info("Cache is valid, reading from cache file")
-            with open(cache_path, 'r') as f:
-                schema_map = json.load(f)
-                # Store in session state for faster access
-                st.session_state[cache_key] = schema_map
+        registry = get_schema_registry()
+        
+        # Shared in-memory copy is current as long as the cache file it came from is
+        schema_map = _get_current_registry_map(database, cache_path)
+        if schema_map is not None:
+            return schema_map
+        
+        # Only one session loads or builds a given database at a time
+        with registry.load_lock(database):
+            schema_map = _get_current_registry_map(database, cache_path)
+            if schema_map is not None:
+                return schema_map
+            
+            logger.info(f"Attempting to get schema map from cache. Cache path: {cache_path}")
+            
+            # Try file cache
+            if is_cache_valid(cache_path):
+                logger.info("Cache is valid, reading from cache file")
+                payload = cache_path.read_text()
+                schema_map = json.loads(payload)
+                registry.put(database, schema_map, payload, cache_path.stat().st_mtime)
                 logger.info(f"Successfully loaded schema map from cache with {len(schema_map)} schemas")
                 return schema_map
+            
+            # An expired cache with a catalog snapshot only needs the tables that changed
+            schema_map = None
+            catalog_path = get_catalog_path(database)
+            if cache_path.exists() and catalog_path.exists():
+                logger.info("Cache has expired, checking catalog for changed tables")
+                try:
+                    with open(cache_path, 'r') as f:
+                        cached_map = json.load(f)
+                    with open(catalog_path, 'r') as f:
+                        cached_catalog = json.load(f)
+                    schema_map, catalog = _refresh_schema_map(database, cached_map, cached_catalog)
+                except Exception as e:
+                    logger.warning(f"Incremental schema refresh failed, rebuilding: {str(e)}")
+                    schema_map = None
+            
+            # If no valid cache exists, build new schema map
+            if schema_map is None:
+                logger.info("Cache is invalid or doesn't exist, building new schema map")
+                schema_map, catalog = _build_schema_map_with_catalog(database)
+            
+            if not schema_map:
+                logger.error("Failed to build schema map - returned empty dictionary")
+                return {}
                 
-        # If no valid cache exists, build new schema map
-        logger.info("Cache is invalid or doesn't exist, building new schema map")
-        schema_map = _build_schema_map(database)
-        
-        if not schema_map:
-            logger.error("Failed to build schema map - returned empty dictionary")
-            return {}
+            logger.info(f"Successfully built schema map with {len(schema_map)} schemas")
             
-        logger.info(f"Successfully built schema map with {len(schema_map)} schemas")
-        
-        # Save to file cache
-        try:
-            with open(cache_path, 'w') as f:
-                json.dump(schema_map, f)
-            # Store in session state for faster access
-            st.session_state[cache_key] = schema_map
-            logger.info("Successfully saved schema map to cache")
-        except Exception as e:
-            logger.error(f"Failed to save schema map to cache: {str(e)}")
+            # Save to file cache
+            payload = json.dumps(schema_map)
+            source_mtime = None
+            try:
+                cache_path.write_text(payload)
+                with open(catalog_path, 'w') as f:
+                    json.dump(catalog, f)
+                source_mtime = cache_path.stat().st_mtime
+                logger.info("Successfully saved schema map to cache")
+            except Exception as e:
+                logger.error(f"Failed to save schema map to cache: {str(e)}")
             
-        return schema_map
+            registry.put(database, schema_map, payload, source_mtime)
+            return schema_map
         
     except Exception as e:
         logger.error(f"Error getting schema map from cache: {str(e)}")
         return {}
 
+def _get_current_registry_map(database: str, cache_path: Path) -> Optional[Dict]:
+    """Return the registry's schema map if the cache file it was loaded from is still valid and unchanged."""
+    entry = get_schema_registry().get(database)
+    if entry is None:
+        return None
+    try:
+        if entry.source_mtime is None:
+            # Cache file could not be written; keep the in-memory map for one cache period
+            return entry.schema_map if time.time() - entry.loaded_at < CACHE_DURATION else None
+        if is_cache_valid(cache_path) and cache_path.stat().st_mtime == entry.source_mtime:
+            return entry.schema_map
+    except OSError:
+        pass
+    return None
+
+def get_schema_version(database: str = None) -> Optional[str]:
+    """
+    Get the version stamp of the schema map currently shared for a database.
+    
+    Args:
+        database (str, optional): Database name
+        
+    Returns:
+        Optional[str]: Version stamp, or None if the schema has not been loaded yet
+    """
+    return get_schema_registry().get_version(database)
+
+# Set-based catalog queries used to introspect a whole database in a few round trips
+CATALOG_SCHEMAS_QUERY = """
+SELECT DISTINCT s.name as schema_name
+FROM sys.schemas s
+WHERE s.name NOT IN ('sys', 'INFORMATION_SCHEMA')
+ORDER BY s.name;
+"""
+
+CATALOG_TABLES_QUERY = """
+SELECT 
+    tab.object_id,
+    s.name as schema_name,
+    tab.name as table_name,
+    tab.modify_date
+FROM sys.tables tab
+INNER JOIN sys.schemas s ON tab.schema_id = s.schema_id
+WHERE s.name NOT IN ('sys', 'INFORMATION_SCHEMA');
+"""
+
+# {table_filter} is empty for a full build or restricts the query to specific object_ids
+CATALOG_COLUMNS_QUERY = """
+SELECT 
+    s.name as schema_name,
+    tab.name as table_name,
+    tab.object_id,
+    tab.modify_date,
+    c.name as column_name,
+    t.name as data_type,
+    c.is_nullable,
+    c.is_identity,
+    c.max_length,
+    c.precision,
+    c.scale
+FROM sys.tables tab
+INNER JOIN sys.schemas s ON tab.schema_id = s.schema_id
+INNER JOIN sys.columns c ON c.object_id = tab.object_id
+INNER JOIN sys.types t ON c.user_type_id = t.user_type_id
+WHERE s.name NOT IN ('sys', 'INFORMATION_SCHEMA') {table_filter}
+ORDER BY s.name, tab.name, c.column_id;
+"""
+
+CATALOG_PRIMARY_KEYS_QUERY = """
+SELECT 
+    ic.object_id,
+    c.name as column_name
+FROM sys.indexes i
+INNER JOIN sys.index_columns ic ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+INNER JOIN sys.columns c ON ic.object_id = c.object_id AND ic.column_id = c.column_id
+INNER JOIN sys.tables t ON i.object_id = t.object_id
+WHERE i.is_primary_key = 1 {table_filter}
+ORDER BY ic.object_id, ic.key_ordinal;
+"""
+
+CATALOG_FOREIGN_KEYS_QUERY = """
+SELECT 
+    fkc.parent_object_id as object_id,
+    c.name as column_name,
+    rs.name as referenced_schema,
+    rt.name as referenced_table,
+    rc.name as referenced_column
+FROM sys.foreign_keys fk
+INNER JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
+INNER JOIN sys.tables t ON fk.parent_object_id = t.object_id
+INNER JOIN sys.columns c ON fkc.parent_object_id = c.object_id AND fkc.parent_column_id = c.column_id
+INNER JOIN sys.objects rt ON fkc.referenced_object_id = rt.object_id
+INNER JOIN sys.schemas rs ON rt.schema_id = rs.schema_id
+INNER JOIN sys.columns rc ON fkc.referenced_object_id = rc.object_id AND fkc.referenced_column_id = rc.column_id
+WHERE 1 = 1 {table_filter}
+ORDER BY fkc.parent_object_id, fk.name, fkc.constraint_column_id;
+"""
+
+# Above this many changed tables an incremental refresh falls back to a full build
+INCREMENTAL_REFRESH_MAX_TABLES = 500
+
 def _build_schema_map(database: str = None) -> Dict:
     """
     Build schema map for the specified database.
@@ -159,170 +304,224 @@ def _build_schema_map(database: str = None) -> Dict:
     Returns:
         Dict: Schema map containing tables and columns
     """
+    schema_map, _ = _build_schema_map_with_catalog(database)
+    return schema_map
+
+def _build_schema_map_with_catalog(database: str = None) -> Tuple[Dict, Dict]:
+    """
+    Build schema map and catalog snapshot for the specified database.
+    
+    Pulls schemas, columns, primary keys and foreign keys for every table with
+    one set-based catalog query each, then assembles the map in memory, so the
+    number of round trips does not grow with the number of tables.
+    
+    Args:
+        database (str, optional): Database name. If None, uses current database.
+        
+    Returns:
+        Tuple[Dict, Dict]: Schema map, and catalog snapshot of object_id/modify_date per table
+    """
     try:
         logger.info(f"Building schema map for database: {database}")
-        schema_map = {}
+        start_time = time.time()
         
-        # Test database connection first
-        if not validate_db_connection():
-            logger.error("Database connection validation failed")
-            return {}
-            
-        # Get all schemas
-        schema_query = """
-        SELECT DISTINCT s.name as schema_name
-        FROM sys.schemas s
-        WHERE s.name NOT IN ('sys', 'INFORMATION_SCHEMA')
-        ORDER BY s.name;
-        """
-        logger.info("Executing schema query...")
-        schemas = execute_query(schema_query, database)
-        # Convert pyodbc.Row to dict if needed
-        schemas = [dict(row) if hasattr(row, 'keys') and hasattr(row, '__getitem__') else row for row in schemas]
-        if not schemas:
-            logger.error("No schemas returned from database")
-            return {}
-            
-        logger.info(f"Found {len(schemas)} schemas: {[s['schema_name'] for s in schemas]}")
+        try:
+            connector = SQLConnector(database=database)
+        except Exception as e:
+            logger.error(f"Database connection validation failed: {str(e)}")
+            return {}, {}
         
-        for schema in schemas:
-            schema_name = schema['schema_name']
-            logger.info(f"\nProcessing schema: {schema_name}")
-            schema_map[schema_name] = {"tables": {}}
-            
-            # Get all tables in the schema
-            table_query = f"""
-            SELECT t.name as table_name
-            FROM sys.tables t
-            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
-            WHERE s.name = '{schema_name}'
-            ORDER BY t.name;
-            """
-            logger.info(f"Executing table query for schema {schema_name}...")
-            tables = execute_query(table_query, database)
-            tables = [dict(row) if hasattr(row, 'keys') and hasattr(row, '__getitem__') else row for row in tables]
-            if not tables:
-                logger.warning(f"No tables found in schema {schema_name}")
-                continue
-                
-            logger.info(f"Found {len(tables)} tables in schema {schema_name}: {[t['table_name'] for t in tables]}")
-            
-            for table in tables:
-                table_name = table['table_name']
-                logger.info(f"\nProcessing table: {schema_name}.{table_name}")
-                schema_map[schema_name]["tables"][table_name] = {
-                    "columns": {},
-                    "primary_keys": [],
-                    "foreign_keys": []
-                }
-                
-                # Get columns
-                column_query = f"""
-                SELECT 
-                    c.name as column_name,
-                    t.name as data_type,
-                    c.is_nullable,
-                    c.is_identity,
-                    c.max_length,
-                    c.precision,
-                    c.scale
-                FROM sys.columns c
-                INNER JOIN sys.types t ON c.user_type_id = t.user_type_id
-                INNER JOIN sys.tables tab ON c.object_id = tab.object_id
-                INNER JOIN sys.schemas s ON tab.schema_id = s.schema_id
-                WHERE s.name = '{schema_name}'
-                AND tab.name = '{table_name}'
-                ORDER BY c.column_id;
-                """
-                logger.info(f"Executing column query for {schema_name}.{table_name}...")
-                columns = execute_query(column_query, database)
-                columns = [dict(row) if hasattr(row, 'keys') and hasattr(row, '__getitem__') else row for row in columns]
-                if not columns:
-                    logger.warning(f"No columns found for table {schema_name}.{table_name}")
-                    continue
-                    
-                logger.info(f"Found {len(columns)} columns in {schema_name}.{table_name}")
-                
-                for column in columns:
-                    schema_map[schema_name]["tables"][table_name]["columns"][column['column_name']] = {
-                        "type": column['data_type'],
-                        "nullable": column['is_nullable'],
-                        "identity": column['is_identity'],
-                        "max_length": column['max_length'],
-                        "precision": column['precision'],
-                        "scale": column['scale']
-                    }
-                
-                # Get primary keys
-                pk_query = f"""
-                SELECT c.name as column_name
-                FROM sys.indexes i
-                INNER JOIN sys.index_columns ic ON i.object_id = ic.object_id AND i.index_id = ic.index_id
-                INNER JOIN sys.columns c ON ic.object_id = c.object_id AND ic.column_id = c.column_id
-                INNER JOIN sys.tables t ON i.object_id = t.object_id
-                INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
-                WHERE i.is_primary_key = 1
-                AND s.name = '{schema_name}'
-                AND t.name = '{table_name}'
-                ORDER BY ic.key_ordinal;
-                """
-                logger.info(f"Executing primary key query for {schema_name}.{table_name}...")
-                primary_keys = execute_query(pk_query, database)
-                primary_keys = [dict(row) if hasattr(row, 'keys') and hasattr(row, '__getitem__') else row for row in primary_keys]
-                schema_map[schema_name]["tables"][table_name]["primary_keys"] = [pk['column_name'] for pk in primary_keys]
-                logger.info(f"Found {len(primary_keys)} primary keys in {schema_name}.{table_name}")
-                
-                # Get foreign keys
-                fk_query = f"""
-                SELECT 
-                    fk.name as fk_name,
-                    c.name as column_name,
-                    OBJECT_SCHEMA_NAME(fk.referenced_object_id) as referenced_schema,
-                    OBJECT_NAME(fk.referenced_object_id) as referenced_table,
-                    COL_NAME(fk.referenced_object_id, fkc.referenced_column_id) as referenced_column
-                FROM sys.foreign_keys fk
-                INNER JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
-                INNER JOIN sys.columns c ON fkc.parent_object_id = c.object_id AND fkc.parent_column_id = c.column_id
-                INNER JOIN sys.tables t ON fk.parent_object_id = t.object_id
-                INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
-                WHERE s.name = '{schema_name}'
-                AND t.name = '{table_name}'
-                ORDER BY fk.name, fkc.constraint_column_id;
-                """
-                logger.info(f"Executing foreign key query for {schema_name}.{table_name}...")
-                foreign_keys = execute_query(fk_query, database)
-                foreign_keys = [dict(row) if hasattr(row, 'keys') and hasattr(row, '__getitem__') else row for row in foreign_keys]
-                schema_map[schema_name]["tables"][table_name]["foreign_keys"] = [
-                    {
-                        "column": fk['column_name'],
-                        "references": f"{fk['referenced_schema']}.{fk['referenced_table']}.{fk['referenced_column']}"
-                    }
-                    for fk in foreign_keys
-                ]
-                logger.info(f"Found {len(foreign_keys)} foreign keys in {schema_name}.{table_name}")
+        try:
+            _, schemas = connector.execute_query(CATALOG_SCHEMAS_QUERY)
+            if not schemas:
+                logger.error("No schemas returned from database")
+                return {}, {}
+            columns, primary_keys, foreign_keys = _fetch_table_definitions(connector)
+        finally:
+            connector.close()
+        
+        schema_map = {schema['schema_name']: {"tables": {}} for schema in schemas}
+        tables_by_id = _assemble_tables(schema_map, columns, primary_keys, foreign_keys)
         
         if not schema_map:
             logger.error("No schema information was built")
-            return {}
-            
-        logger.info("\nFinal schema map structure:")
+            return {}, {}
+        
+        # Column rows carry each table's modify_date, so the snapshot needs no extra query
+        catalog = {"tables": {}}
+        for column in columns:
+            catalog["tables"].setdefault(str(column['object_id']), _catalog_entry(column))
+        
+        logger.info(
+            f"Built schema map with {len(schema_map)} schemas and {len(tables_by_id)} tables "
+            f"in {time.time() - start_time:.2f}s"
+        )
         for schema_name, schema_info in schema_map.items():
-            logger.info(f"\nSchema: {schema_name}")
             for table_name, table_info in schema_info["tables"].items():
-                logger.info(f"  Table: {table_name}")
-                logger.info(f"    Columns: {list(table_info['columns'].keys())}")
-                logger.info(f"    Primary Keys: {table_info['primary_keys']}")
-                logger.info(f"    Foreign Keys: {[fk['column'] for fk in table_info['foreign_keys']]}")
+                logger.debug(
+                    f"  {schema_name}.{table_name}: columns={list(table_info['columns'].keys())} "
+                    f"pks={table_info['primary_keys']} fks={[fk['column'] for fk in table_info['foreign_keys']]}"
+                )
         
-        return schema_map
+        return schema_map, catalog
         
     except Exception as e:
         logger.error(f"Error building schema map: {str(e)}")
         raise
 
+def _refresh_schema_map(database: str, schema_map: Dict, catalog: Dict) -> Tuple[Optional[Dict], Dict]:
+    """
+    Patch a cached schema map with the tables that changed since it was built.
+    
+    Compares object_id and modify_date from sys.tables with the stored catalog
+    snapshot and re-introspects only added, altered or renamed tables. Dropped
+    tables are removed, and tables whose foreign keys pointed at a dropped or
+    renamed table are refreshed too.
+    
+    Args:
+        database (str): Database name
+        schema_map (Dict): Cached schema map, patched in place
+        catalog (Dict): Catalog snapshot stored with the cached map
+        
+    Returns:
+        Tuple[Optional[Dict], Dict]: Patched schema map (None if a full rebuild is needed) and new catalog
+    """
+    start_time = time.time()
+    stored = catalog.get("tables", {})
+    connector = SQLConnector(database=database)
+    try:
+        _, schemas = connector.execute_query(CATALOG_SCHEMAS_QUERY)
+        _, tables = connector.execute_query(CATALOG_TABLES_QUERY)
+        current = {str(table['object_id']): _catalog_entry(table) for table in tables}
+        
+        refresh_ids = {object_id for object_id, entry in current.items() if stored.get(object_id) != entry}
+        removed_ids = {object_id for object_id in stored if object_id not in current or object_id in refresh_ids}
+        
+        # Tables whose FKs reference a removed or renamed table need their references rewritten
+        removed_prefixes = tuple(
+            f"{stored[object_id]['schema_name']}.{stored[object_id]['table_name']}."
+            for object_id in removed_ids
+            if object_id not in current
+            or (stored[object_id]['schema_name'], stored[object_id]['table_name'])
+            != (current[object_id]['schema_name'], current[object_id]['table_name'])
+        )
+        if removed_prefixes:
+            for object_id, entry in current.items():
+                table_info = schema_map.get(entry['schema_name'], {}).get("tables", {}).get(entry['table_name'], {})
+                if any(fk['references'].startswith(removed_prefixes) for fk in table_info.get("foreign_keys", [])):
+                    refresh_ids.add(object_id)
+                    removed_ids.add(object_id)
+        
+        if len(refresh_ids) > INCREMENTAL_REFRESH_MAX_TABLES:
+            logger.info(f"{len(refresh_ids)} tables changed, falling back to a full rebuild")
+            return None, {}
+        
+        for object_id in removed_ids:
+            entry = stored.get(object_id) or current[object_id]
+            schema_map.get(entry['schema_name'], {}).get("tables", {}).pop(entry['table_name'], None)
+        
+        if refresh_ids:
+            columns, primary_keys, foreign_keys = _fetch_table_definitions(connector, [int(object_id) for object_id in refresh_ids])
+            _assemble_tables(schema_map, columns, primary_keys, foreign_keys)
+    finally:
+        connector.close()
+    
+    # Keep the schema list in step with the database, including empty schemas
+    schema_names = [schema['schema_name'] for schema in schemas]
+    for schema_name in schema_names:
+        schema_map.setdefault(schema_name, {"tables": {}})
+    for schema_name in list(schema_map):
+        if schema_name not in schema_names:
+            del schema_map[schema_name]
+    
+    logger.info(
+        f"Incremental schema refresh: {len(refresh_ids)} tables re-introspected, "
+        f"{len(removed_ids - refresh_ids)} dropped in {time.time() - start_time:.2f}s"
+    )
+    return schema_map, {"tables": current}
+
+def _fetch_table_definitions(connector: SQLConnector, object_ids: Optional[List[int]] = None) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    Run the set-based column, primary key and foreign key catalog queries.
+    
+    Args:
+        connector (SQLConnector): Open connector for the target database
+        object_ids (List[int], optional): Restrict the queries to these tables. All tables if None.
+        
+    Returns:
+        Tuple[List[Dict], List[Dict], List[Dict]]: Column, primary key and foreign key rows
+    """
+    def table_filter(column: str) -> str:
+        if object_ids is None:
+            return ""
+        return f"AND {column} IN ({', '.join(str(int(object_id)) for object_id in object_ids)})"
+    
+    _, columns = connector.execute_query(CATALOG_COLUMNS_QUERY.format(table_filter=table_filter("tab.object_id")))
+    _, primary_keys = connector.execute_query(CATALOG_PRIMARY_KEYS_QUERY.format(table_filter=table_filter("ic.object_id")))
+    _, foreign_keys = connector.execute_query(CATALOG_FOREIGN_KEYS_QUERY.format(table_filter=table_filter("fkc.parent_object_id")))
+    return columns, primary_keys, foreign_keys
+
+def _catalog_entry(row: Dict) -> Dict:
+    """Catalog snapshot entry for a table row carrying schema_name, table_name and modify_date."""
+    modify_date = row['modify_date']
+    return {
+        "schema_name": row['schema_name'],
+        "table_name": row['table_name'],
+        "modify_date": modify_date.isoformat() if hasattr(modify_date, 'isoformat') else str(modify_date)
+    }
+
+def _assemble_tables(schema_map: Dict, columns: List[Dict], primary_keys: List[Dict], foreign_keys: List[Dict]) -> Dict[int, Dict]:
+    """
+    Fill schema_map with tables from flat catalog rows.
+    
+    Args:
+        schema_map (Dict): Schema map to add tables to, keyed by schema name
+        columns (List[Dict]): Rows from CATALOG_COLUMNS_QUERY, ordered by table and column_id
+        primary_keys (List[Dict]): Rows from CATALOG_PRIMARY_KEYS_QUERY, ordered by key_ordinal
+        foreign_keys (List[Dict]): Rows from CATALOG_FOREIGN_KEYS_QUERY
+        
+    Returns:
+        Dict[int, Dict]: Table entries keyed by object_id
+    """
+    tables_by_id = {}
+    for column in columns:
+        table = tables_by_id.get(column['object_id'])
+        if table is None:
+            table = {
+                "columns": {},
+                "primary_keys": [],
+                "foreign_keys": []
+            }
+            tables_by_id[column['object_id']] = table
+            schema_map.setdefault(column['schema_name'], {"tables": {}})["tables"][column['table_name']] = table
+        table["columns"][column['column_name']] = {
+            "type": column['data_type'],
+            "nullable": column['is_nullable'],
+            "identity": column['is_identity'],
+            "max_length": column['max_length'],
+            "precision": column['precision'],
+            "scale": column['scale']
+        }
+    
+    for pk in primary_keys:
+        table = tables_by_id.get(pk['object_id'])
+        if table is not None:
+            table["primary_keys"].append(pk['column_name'])
+    
+    for fk in foreign_keys:
+        table = tables_by_id.get(fk['object_id'])
+        if table is not None:
+            table["foreign_keys"].append({
+                "column": fk['column_name'],
+                "references": f"{fk['referenced_schema']}.{fk['referenced_table']}.{fk['referenced_column']}"
+            })
+    
+    return tables_by_id
+
 # --- Tool Functions ---
 def list_tables(input: ListTablesInput) -> ListTablesOutput:
     """List tables in the database."""
+    connector = None
     try:
         connector = SQLConnector()
         if input.schema_name:
@@ -351,7 +550,8 @@ def list_tables(input: ListTablesInput) -> ListTablesOutput:
         logger.info("[list_tables] Tables: %s", tables)
         return ListTablesOutput(tables=tables)
     finally:
-        connector.close()
+        if connector:
+            connector.close()
 
 def describe_table(table_name: str, schema_name: str = 'dbo', connector: Optional[SQLConnector] = None) -> Dict:
     """
@@ -425,10 +625,30 @@ def is_destructive_query(sql: str) -> bool:
     sql_upper = sql.upper()
     return any(keyword in sql_upper for keyword in destructive_keywords)
 
+def is_read_only_select(sql: str) -> bool:
+    """
+    Check that SQL is exactly one SELECT statement (plain, WITH or UNION) that does not write INTO a table.
+
+    Unlike is_destructive_query this parses the query, so reads of columns such as
+    IsDeleted or LastUpdatedAt pass while SELECT ... INTO, EXEC, MERGE, CREATE or
+    GRANT are rejected. SQL that does not parse is not considered read-only.
+    """
+    if not sql or not sql.strip():
+        return False
+    try:
+        statements = [statement for statement in parse(sql, read="tsql") if statement is not None]
+    except Exception:
+        return False
+    if len(statements) != 1 or not isinstance(statements[0], exp.Query):
+        return False
+    return statements[0].find(exp.Into, exp.DML, exp.DDL, exp.Command) is None
+
 def validate_db_connection() -> bool:
     """
     Validate database connection.
     
+    Uses the connection pool, so repeated checks reuse an existing session.
+    
     Returns:
         bool: True if connection is valid, False otherwise
     """
@@ -440,17 +660,46 @@ def validate_db_connection() -> bool:
         logger.error(f"Database connection validation failed: {str(e)}")
         return False
 
-def execute_query(query_or_input: Union[str, ExecuteQueryInput], database: str = None) -> Union[ExecuteQueryOutput, List[Dict]]:
+def execute_query(
+    query_or_input: Union[str, ExecuteQueryInput],
+    database: str = None,
+    use_cache: bool = True,
+    max_rows: Optional[int] = None,
+    timeout: Optional[float] = None,
+    query_id: Optional[str] = None
+) -> Union[ExecuteQueryOutput, ColumnarResult]:
     """
-    Execute a SQL query and return results as dictionaries.
+    Execute a SQL query and return its results.
+    
+    Rows are packed into a ColumnarResult (one array per column) that still
+    indexes like a list of dicts. Rows are fetched in batches and fetching stops at QUERY_CONFIG's row and
+    byte budget, so memory stays bounded whatever the query returns; the
+    result's truncated / truncated_reason attributes report when that happened.
+    
+    Read-only queries are served from the result cache when the same canonical
+    SQL was run against the same database and schema version within the TTL.
+    Queries using volatile functions (GETDATE, NEWID, ...) always hit the server.
+    
+    Queries are cancelled on the server once they run past the timeout, and a
+    query started with a query_id can be stopped from another thread with
+    sql_connector.cancel_query(query_id).
     
     Args:
         query_or_input (Union[str, ExecuteQueryInput]): Either a query string or ExecuteQueryInput object
         database (str, optional): Database name to use for the query
+        use_cache (bool): Set to False to always run the query against the server
+        max_rows (int, optional): Row cap for this call. Defaults to QUERY_CONFIG['max_rows'].
+        timeout (float, optional): Seconds allowed for the query. Defaults to QUERY_CONFIG['timeout_seconds'].
+        query_id (str, optional): Id under which the running query can be cancelled
         
     Returns:
-        Union[ExecuteQueryOutput, List[Dict]]: Query results as list of dictionaries
+        Union[ExecuteQueryOutput, ColumnarResult]: Query results (ExecuteQueryOutput holds row dicts)
+        
+    Raises:
+        QueryTimeoutError: The query ran past its timeout
+        QueryCancelledError: The query was cancelled through its query_id
     """
+    connector = None
     try:
         # Handle both string queries and ExecuteQueryInput objects
         if isinstance(query_or_input, ExecuteQueryInput):
@@ -459,38 +708,133 @@ def execute_query(query_or_input: Union[str, ExecuteQueryInput], database: str =
         else:
             query = query_or_input
             return_type = "List[Dict]"
+        
+        cache_key = None
+        if use_cache and RESULT_CACHE_CONFIG['enabled']:
+            result_cache = get_result_cache()
+            if is_cacheable(query):
+                database_name = database or DB_CONFIG.get('database')
+                cache_key = result_cache.make_key(query, database_name, get_schema_version(database_name), max_rows)
+                cached_rows = result_cache.get(cache_key)
+                if cached_rows is not None:
+                    logger.info("[execute_query] %d rows returned from result cache", len(cached_rows))
+                    if return_type == "ExecuteQueryOutput":
+                        return ExecuteQueryOutput(
+                            rows=cached_rows.to_dicts(),
+                            truncated=cached_rows.truncated,
+                            truncated_reason=cached_rows.truncated_reason
+                        )
+                    return cached_rows
+            else:
+                result_cache.record_skip()
             
         connector = SQLConnector(database=database)
-        columns, results = connector.execute_query(query)
+        if query_id:
+            register_query(query_id, connector)
+        stream = connector.stream_query(
+            query,
+            max_rows=max_rows if max_rows is not None else QUERY_CONFIG['max_rows'],
+            max_bytes=QUERY_CONFIG['max_bytes'],
+            timeout=timeout if timeout is not None else QUERY_CONFIG['timeout_seconds']
+        )
         
-        # Convert results to list of dictionaries
-        rows = []
-        if results:
-            for row in results:
-                if isinstance(row, (list, tuple)):
-                    row_dict = dict(zip(columns, row))
-                elif isinstance(row, dict):
-                    row_dict = row
-                elif hasattr(row, 'keys') and hasattr(row, '__getitem__'):
-                    # Likely a pyodbc.Row
-                    row_dict = {k: row[k] for k in row.keys()}
-                else:
-                    logger.warning(f"Unexpected row type: {type(row)}")
-                    continue
-                rows.append(row_dict)
+        # Pack row batches straight into column arrays as they arrive
+        rows = ColumnarResult.from_stream(stream)
         
         logger.info("[execute_query] %d rows returned", len(rows))
         
+        if cache_key is not None:
+            get_result_cache().put(cache_key, rows)
+        
         # Return appropriate type based on input
         if return_type == "ExecuteQueryOutput":
-            return ExecuteQueryOutput(rows=rows)
+            return ExecuteQueryOutput(rows=rows.to_dicts(), truncated=rows.truncated, truncated_reason=rows.truncated_reason)
         return rows
         
     except Exception as e:
         logger.error(f"Error executing query: {str(e)}")
         raise
     finally:
-        connector.close()
+        if query_id:
+            unregister_query(query_id)
+        if connector:
+            connector.close()
+
+EXPORT_FORMATS = ("parquet", "csv")
+
+def export_query_results(
+    query: str,
+    sink: Any,
+    database: str = None,
+    file_format: str = "parquet",
+    preview_rows: int = 1000
+) -> Dict[str, Any]:
+    """
+    Run a query and write its result to a Parquet or CSV file batch by batch.
+    
+    RecordBatches from execute_query_arrow go straight to the file writer, so
+    exports of millions of rows never hold the full result or per-row Python
+    objects in memory. Fetching is bounded by QUERY_CONFIG's export limits.
+    
+    Args:
+        query (str): SQL query to export
+        sink (Any): Output path or writable binary file object
+        database (str, optional): Database name to use for the query
+        file_format (str): "parquet" or "csv"
+        preview_rows (int): Number of leading rows to keep for display
+        
+    Returns:
+        Dict[str, Any]: rows, truncated, truncated_reason and preview (a pyarrow.Table)
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    if not is_read_only_select(query):
+        raise ValueError("Only a single SELECT statement can be exported")
+    
+    stream = execute_query_arrow(
+        query,
+        database=database,
+        max_rows=QUERY_CONFIG['export_max_rows'],
+        max_bytes=QUERY_CONFIG['export_max_bytes']
+    )
+    writer = None
+    preview = []
+    preview_count = 0
+    try:
+        for batch in stream:
+            if writer is None:
+                if file_format == "parquet":
+                    writer = pq.ParquetWriter(sink, batch.schema)
+                else:
+                    writer = pa_csv.CSVWriter(sink, batch.schema)
+            writer.write_batch(batch)
+            if preview_count < preview_rows:
+                preview.append(batch.slice(0, preview_rows - preview_count))
+                preview_count += preview[-1].num_rows
+        
+        if writer is None:
+            # Empty result: still write a file with the column names
+            schema = pa.schema([pa.field(name, pa.string()) for name in stream.columns])
+            writer = pq.ParquetWriter(sink, schema) if file_format == "parquet" else pa_csv.CSVWriter(sink, schema)
+    except Exception as e:
+        logger.error(f"Error exporting query: {str(e)}")
+        raise
+    finally:
+        stream.close()
+        if writer is not None:
+            writer.close()
+    
+    logger.info("[export_query_results] %d rows exported as %s", stream.row_count, file_format)
+    return {
+        "rows": stream.row_count,
+        "truncated": stream.truncated,
+        "truncated_reason": stream.truncated_reason,
+        "preview": pa.Table.from_batches(preview, schema=stream.schema) if preview else None
+    }
 
 def get_databases() -> List[str]:
     """
@@ -499,15 +843,18 @@ def get_databases() -> List[str]:
     Returns:
         List[str]: List of database names
     """
+    connector = None
     try:
         connector = SQLConnector()
         query = "SELECT name FROM sys.databases WHERE database_id > 4;"  # Skip system DBs
         _, results = connector.execute_query(query)
-        connector.close()
         return [row['name'] for row in results] if results else []
     except Exception as e:
         logger.error(f"Error getting databases: {str(e)}")
         return []
+    finally:
+        if connector:
+            connector.close()
 
 def get_all_schema_names(database_name: str) -> List[str]:
     """
@@ -519,15 +866,18 @@ def get_all_schema_names(database_name: str) -> List[str]:
     Returns:
         List[str]: List of schema names
     """
+    connector = None
     try:
         connector = SQLConnector(database=database_name)
         query = "SELECT name FROM sys.schemas ORDER BY name;"
         _, results = connector.execute_query(query)
-        connector.close()
         return [row['name'] for row in results] if results else []
     except Exception as e:
         logger.error(f"Error getting schema names: {str(e)}")
         return []
+    finally:
+        if connector:
+            connector.close()
 
 def get_schema_map(database_name: str = None) -> Dict:
     """
@@ -746,7 +1096,7 @@ def validate_query(query: str, schema_map: dict) -> dict:
                     "error": f"Table '{table}' must use a fully qualified name (schema.table)"
                 }
             schema_name, table_name = table.split('.', 1)
-            if schema_name not in schema_map or table_name not in schema_map[schema_name]:
+            if schema_name not in schema_map or table_name not in schema_map[schema_name].get('tables', {}):
                 return {
                     "is_valid": False,
                     "error": f"Table {table} not found in schema"
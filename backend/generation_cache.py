@@ -0,0 +1,209 @@
+"""
+Generation Cache Module
+Persistent memoization of validated SQL per (prompt, database, schema version, model)
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from backend.system import GENERATION_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+GENERATION_CACHE_PATH = Path("data/cache/generation_cache.db")
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS sql_generation_cache (
+    cache_key TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    database_name TEXT,
+    schema_version TEXT,
+    model TEXT,
+    generated_sql TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+CREATE_INDEX_SQL = "CREATE INDEX IF NOT EXISTS ix_generation_cache_last_used ON sql_generation_cache (last_used_at);"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation so trivially different prompts share an entry."""
+    prompt = " ".join(prompt.lower().split())
+    return re.sub(r"[\s?.!]+$", "", prompt)
+
+
+class GenerationCache:
+    """
+    SQLite-backed cache of SQL generated for a user prompt.
+
+    Only SQL that passed validation is stored. Entries are keyed by the
+    normalized prompt, database, schema version and model, so any schema
+    change or model switch misses naturally. Entries older than ttl_seconds
+    are ignored, and the least recently used entries are evicted above
+    max_entries.
+    """
+
+    def __init__(self, db_path: Path = GENERATION_CACHE_PATH, max_entries: int = 1000, ttl_seconds: float = 7 * 86400):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(prompt: str, database: str, schema_version: Optional[str], model: str) -> str:
+        """Cache key for a prompt against a database at a schema version with a model."""
+        parts = [normalize_prompt(prompt), database or "default", schema_version or "", model or ""]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, prompt: str, database: str, schema_version: Optional[str], model: str) -> Optional[str]:
+        """
+        Look up previously validated SQL.
+
+        Args:
+            prompt (str): User request
+            database (str): Database name
+            schema_version (str, optional): Schema version stamp
+            model (str): LLM model name
+
+        Returns:
+            Optional[str]: Cached SQL, or None on a miss
+        """
+        key = self.make_key(prompt, database, schema_version, model)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT generated_sql, created_at FROM sql_generation_cache WHERE cache_key = ?",
+                    (key,)
+                ).fetchone()
+                if row is None or now - row[1] > self.ttl_seconds:
+                    self._stats["misses"] += 1
+                    return None
+                with conn:
+                    conn.execute(
+                        "UPDATE sql_generation_cache SET last_used_at = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                        (now, key)
+                    )
+                self._stats["hits"] += 1
+                return row[0]
+        except Exception as e:
+            logger.warning(f"Generation cache lookup failed: {str(e)}")
+            return None
+
+    def put(self, prompt: str, database: str, schema_version: Optional[str], model: str, sql: str) -> None:
+        """Store validated SQL for a prompt, evicting the least recently used entries above max_entries."""
+        key = self.make_key(prompt, database, schema_version, model)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        """
+                        INSERT OR REPLACE INTO sql_generation_cache
+                        (cache_key, prompt, database_name, schema_version, model, generated_sql, created_at, last_used_at, hit_count)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+                        """,
+                        (key, prompt, database, schema_version, model, sql, now, now)
+                    )
+                    evicted = conn.execute(
+                        """
+                        DELETE FROM sql_generation_cache WHERE cache_key IN (
+                            SELECT cache_key FROM sql_generation_cache
+                            ORDER BY last_used_at DESC
+                            LIMIT -1 OFFSET ?
+                        ) OR created_at < ?
+                        """,
+                        (self.max_entries, now - self.ttl_seconds)
+                    ).rowcount
+                self._stats["stores"] += 1
+                self._stats["evictions"] += max(evicted, 0)
+        except Exception as e:
+            logger.warning(f"Generation cache store failed: {str(e)}")
+
+    def remove(self, prompt: str, database: str, schema_version: Optional[str], model: str) -> None:
+        """Forget the SQL stored for a prompt, e.g. after it failed when run."""
+        key = self.make_key(prompt, database, schema_version, model)
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute("DELETE FROM sql_generation_cache WHERE cache_key = ?", (key,))
+        except Exception as e:
+            logger.warning(f"Generation cache removal failed: {str(e)}")
+
+    def invalidate(self, database: str = None, model: str = None) -> int:
+        """
+        Remove cached SQL.
+
+        Args:
+            database (str, optional): Only entries for this database
+            model (str, optional): Only entries generated by this model
+
+        Returns:
+            int: Number of entries removed
+        """
+        clauses, params = [], []
+        if database is not None:
+            clauses.append("database_name = ?")
+            params.append(database)
+        if model is not None:
+            clauses.append("model = ?")
+            params.append(model)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    removed = conn.execute(f"DELETE FROM sql_generation_cache{where}", params).rowcount
+            logger.info(f"Removed {removed} entries from the generation cache")
+            return removed
+        except Exception as e:
+            logger.error(f"Generation cache invalidation failed: {str(e)}")
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process and the number of stored entries."""
+        with self._lock:
+            stats = dict(self._stats)
+            try:
+                stats["entries"] = self._connection().execute("SELECT COUNT(*) FROM sql_generation_cache").fetchone()[0]
+            except Exception:
+                stats["entries"] = None
+        return stats
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the cache database once. Caller must hold the lock."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute(CREATE_TABLE_SQL)
+            conn.execute(CREATE_INDEX_SQL)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+
+# Global cache instance
+_generation_cache = GenerationCache(
+    max_entries=GENERATION_CACHE_CONFIG['max_entries'],
+    ttl_seconds=GENERATION_CACHE_CONFIG['ttl_seconds']
+)
+
+
+def get_generation_cache() -> GenerationCache:
+    """Get the process-wide generation cache."""
+    return _generation_cache
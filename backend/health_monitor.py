@@ -0,0 +1,142 @@
+"""
+Health Monitor Module
+Background probes of the database and LLM with cached, timestamped results
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from backend.system import HEALTH_CONFIG, LLM_CONFIG
+from backend.connection_pool import get_connection_pool
+from backend.llm_transport import get_llm_transport
+from backend.llm_engine import get_llm_instance
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Probes the database and the LLM server on a daemon thread.
+
+    Probes are deliberately cheap: SELECT 1 over a pooled connection and a GET
+    of Ollama's /api/tags (no inference). The latest result of each probe is
+    cached with the time it was taken, so page renders only read memory.
+    """
+
+    def __init__(self, interval: float = 30, probe_timeout: float = 5):
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the probe thread if it is not already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+            self._thread.start()
+        logger.info(f"Started health monitor (interval={self.interval}s)")
+
+    def stop(self) -> None:
+        """Stop the probe thread."""
+        self._stopped.set()
+        self._wakeup.set()
+
+    def refresh(self) -> None:
+        """Ask the probe thread to run the next check now, e.g. after a configuration change."""
+        self._wakeup.set()
+
+    def check_now(self) -> Dict[str, Dict[str, Any]]:
+        """Run both probes synchronously, cache and return the results."""
+        results = {
+            "database": self._timed(self._probe_database),
+            "llm": self._timed(self._probe_llm)
+        }
+        with self._lock:
+            self._status = results
+        return results
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the cached probe results.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: {"database": ..., "llm": ...}, each with ok, message,
+            checked_at (epoch seconds) and latency_ms. Empty until the first check completes.
+        """
+        with self._lock:
+            return {name: dict(result) for name, result in self._status.items()}
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.check_now()
+            except Exception as e:
+                logger.error(f"Health check failed: {str(e)}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    @staticmethod
+    def _timed(probe) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            ok, message = probe()
+        except Exception as e:
+            ok, message = False, str(e)
+        return {
+            "ok": ok,
+            "message": message,
+            "checked_at": time.time(),
+            "latency_ms": round((time.monotonic() - started) * 1000, 1)
+        }
+
+    def _probe_database(self) -> tuple:
+        pool = get_connection_pool()
+        conn = pool.acquire(timeout=self.probe_timeout)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+        except Exception:
+            pool.release(conn, discard=True)
+            raise
+        pool.release(conn)
+        return True, "Database reachable"
+
+    def _probe_llm(self) -> tuple:
+        response = get_llm_transport().get("/api/tags", base_url=LLM_CONFIG['api_base'], timeout=self.probe_timeout)
+        response.raise_for_status()
+        models = {m.get("name", "") for m in response.json().get("models", [])}
+        llm = get_llm_instance()
+        model = llm.model if llm else LLM_CONFIG['model']
+        if model not in models and f"{model}:latest" not in models:
+            return False, f"Ollama reachable but model '{model}' is not installed"
+        return True, "Ollama reachable"
+
+
+# Global monitor instance
+_health_monitor = None
+_health_monitor_lock = threading.Lock()
+
+
+def get_health_monitor() -> HealthMonitor:
+    """Get the process-wide health monitor, starting it on first use."""
+    global _health_monitor
+    if _health_monitor is None:
+        with _health_monitor_lock:
+            if _health_monitor is None:
+                monitor = HealthMonitor(
+                    interval=HEALTH_CONFIG['interval'],
+                    probe_timeout=HEALTH_CONFIG['probe_timeout']
+                )
+                monitor.start()
+                _health_monitor = monitor
+    return _health_monitor
@@ -7,18 +7,29 @@ import os
 import json
 import logging
 import re
+import threading
+import time
 import sqlparse
-from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 from pydantic import BaseModel, Field, field_validator
-import requests
 from sqlparse.sql import Identifier, IdentifierList, Token
 from sqlparse.tokens import DML
 
-from backend.system import LLM_CONFIG
+from backend.system import (
+    LLM_CONFIG,
+    PROMPT_CONFIG,
+    PROMPT_BUDGET_CONFIG,
+    GENERATION_CACHE_CONFIG,
+    SEMANTIC_CACHE_CONFIG,
+    COST_GATE_CONFIG,
+    PARALLEL_GENERATION_CONFIG
+)
 from backend.db_tools import (
     execute_query,
     is_destructive_query,
     get_schema_map,
+    get_schema_version,
     get_cache_path,
     is_cache_valid,
     validate_query_dialect,
@@ -26,7 +37,24 @@ from backend.db_tools import (
     ExecuteQueryInput,
     ExecuteQueryOutput
 )
-from backend.sql_connector import SQLConnector
+from backend.sql_connector import SQLConnector, QueryTimeoutError, QueryCancelledError
+from backend.audit_logger import log_query_event
+from backend.schema_index import get_schema_index
+from backend.schema_renderer import SchemaRenderer, get_schema_renderer
+from backend.prompt_assembler import (
+    AssembledPrompt,
+    SystemPrefix,
+    fill_tables,
+    get_system_prefix,
+    get_token_budget,
+    get_token_counter,
+    prefix_tables,
+    record_prompt_eval
+)
+from backend.llm_transport import get_llm_transport, get_ollama_base_url
+from backend.generation_cache import get_generation_cache
+from backend.semantic_cache import get_semantic_cache
+from backend.cost_gate import get_cost_gate, CONFIRM, REJECT
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -37,51 +65,153 @@ class LocalLLM:
     def __init__(self, model: str = None):
         """Initialize LLM client with configuration."""
         self.model = model or LLM_CONFIG['model']
-        self.api_base = LLM_CONFIG['api_base'].rstrip("/")
-        if self.api_base.endswith("/v1"):
-            self.api_base = self.api_base[:-3].rstrip("/")
+        self.api_base = get_ollama_base_url(LLM_CONFIG['api_base'])
         self.api_key = LLM_CONFIG['api_key']
         
-    def get_completion(self, prompt: str, system_prompt: str = None) -> str:
-        """Get completion from LLM."""
+    def _build_request(
+        self,
+        prompt: str,
+        system_prompt: str = None,
+        stream: bool = False,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Build the /api/chat request body (options override the default sampling options)."""
+        # Prepare messages
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": LLM_CONFIG['keep_alive'],
+            "options": {
+                "temperature": 0.1,
+                "top_p": 0.1,
+                "num_predict": 1024,
+                **(options or {})
+            }
+        }
+        
+    def get_completion(
+        self,
+        prompt: str,
+        system_prompt: str = None,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        Get completion from LLM.
+        
+        Args:
+            prompt (str): User prompt
+            system_prompt (str, optional): System prompt
+            on_token (Callable[[str], None], optional): When given, the completion is streamed
+                and on_token is called with each chunk as it arrives. Generation stops as soon
+                as the first ```sql block is closed.
+                
+        Returns:
+            str: Completion text
+        """
+        if on_token is not None:
+            chunks = []
+            for token in self.stream_completion(prompt, system_prompt):
+                chunks.append(token)
+                on_token(token)
+            return "".join(chunks)
+        
         try:
-            # Prepare messages
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
             # Prepare request
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "model": self.model,
-                "messages": messages,
-                "stream": False,
-                "options": {
-                    "temperature": 0.1,
-                    "top_p": 0.1,
-                    "num_predict": 1024
-                }
-            }
+            data = self._build_request(prompt, system_prompt)
             
             # Make request to Ollama's chat endpoint
-            response = requests.post(
-                f"{self.api_base}/api/chat",
-                headers=headers,
-                json=data
-            )
+            response = get_llm_transport().post("/api/chat", data, base_url=self.api_base)
             response.raise_for_status()
             
             # Extract and return completion
             result = response.json()
+            record_prompt_eval(self.model, prompt, system_prompt, result)
             return result.get('message', {}).get('content', '')
             
         except Exception as e:
             logger.error(f"Error getting LLM completion: {str(e)}")
             raise
+    
+    def stream_completion(
+        self,
+        prompt: str,
+        system_prompt: str = None,
+        stop_at_sql_block: bool = True,
+        options: Optional[Dict[str, Any]] = None,
+        stop_event: Optional[threading.Event] = None
+    ) -> Iterator[str]:
+        """
+        Stream a completion from LLM, yielding content chunks as Ollama's NDJSON lines arrive.
+        
+        Args:
+            prompt (str): User prompt
+            system_prompt (str, optional): System prompt
+            stop_at_sql_block (bool): Stop generating once the first ```sql block is closed.
+                Closing the response makes Ollama abort the rest of the generation.
+            options (Dict[str, Any], optional): Ollama sampling options, e.g. temperature and seed
+            stop_event (threading.Event, optional): Abort the generation once this is set
+                
+        Yields:
+            str: Content chunks in order
+        """
+        data = self._build_request(prompt, system_prompt, stream=True, options=options)
+        text = ""
+        try:
+            with get_llm_transport().post("/api/chat", data, base_url=self.api_base, stream=True) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if stop_event is not None and stop_event.is_set():
+                        logger.debug("Generation stopped by caller")
+                        break
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(chunk["error"])
+                    
+                    token = chunk.get("message", {}).get("content", "")
+                    if token:
+                        text += token
+                        yield token
+                    
+                    if chunk.get("done"):
+                        record_prompt_eval(self.model, prompt, system_prompt, chunk)
+                        break
+                    if stop_at_sql_block and has_complete_sql_block(text):
+                        logger.info(f"SQL block complete after {len(text)} characters, stopping generation")
+                        break
+                        
+        except Exception as e:
+            logger.error(f"Error streaming LLM completion: {str(e)}")
+            raise
+    
+    def prime_prefix(self, system_prompt: str) -> bool:
+        """
+        Load the model and evaluate a system prompt without a question, so that
+        requests starting with the same system prompt reuse Ollama's prompt cache.
+        
+        Args:
+            system_prompt (str): System prefix to evaluate
+            
+        Returns:
+            bool: True if Ollama processed the prefix
+        """
+        data = self._build_request("", system_prompt, options={"num_predict": 1})
+        data["messages"] = data["messages"][:1]
+        try:
+            response = get_llm_transport().post("/api/chat", data, base_url=self.api_base)
+            response.raise_for_status()
+            logger.info(f"Primed {self.model} with a {len(system_prompt)} character system prefix")
+            return True
+        except Exception as e:
+            logger.warning(f"Priming the system prefix failed: {str(e)}")
+            return False
 
 # Global LLM instance
 _llm_instance = None
@@ -105,11 +235,7 @@ def set_llm_instance(model: str) -> None:
 def list_local_models() -> List[str]:
     """List available models from Ollama."""
     try:
-        base_url = LLM_CONFIG['api_base'].rstrip("/")
-        if base_url.endswith("/v1"):
-            base_url = base_url[:-3].rstrip("/")
-        
-        response = requests.get(f"{base_url}/api/tags")
+        response = get_llm_transport().get("/api/tags", base_url=LLM_CONFIG['api_base'])
         response.raise_for_status()
         data = response.json()
         return [m["name"] for m in data.get("models", [])]
@@ -130,32 +256,114 @@ class SQLPrompt(BaseModel):
     prompt: str
     schema_map: Dict
     description: Optional[str] = None
+    schema_version: Optional[str] = None
+    model: Optional[str] = None
     
     def to_full_prompt(self) -> str:
-        """Convert prompt to full prompt with schema information."""
-        # Format schema information
-        schema_info = self._format_schema_info()
+        """Convert prompt to full prompt with schema information (system prefix followed by the request)."""
+        assembled = self.assemble()
+        return f"{assembled.system}\n\n{assembled.text}"
+    
+    def assemble(self) -> AssembledPrompt:
+        """
+        Build the system prefix and the request message within the model's token budget.
         
-        # Build the full prompt
-        full_prompt = f"""IMPORTANT: This is a new question. Ignore any previous queries and focus only on the current request.
-
-GOAL: Write a SQL query that answers the following user request as directly as possible.
-
-USER REQUEST: {self.prompt}
-
-THINK STEP: Before writing the query, answer these questions:
-1. What is the user asking for? (e.g., count, sum, list, etc.)
-2. Which table(s) and column(s) best match this request? List them explicitly.
-3. Why did you choose these tables/columns?
-4. Verify that every column you plan to use is explicitly listed in the schema above.
-
-CRITICAL: You MUST use ONLY the columns listed in the schema above. If a column is not listed, it does NOT exist. Do NOT guess or invent column names.
+        The system prefix holds the rules and as much of the schema as its share
+        of the budget allows, and is the same for every question against this
+        schema version, so Ollama can reuse its prompt cache. The request message
+        carries the question, the likely-tables list and the snippets of selected
+        tables missing from the prefix, added in relevance order while they fit.
+        
+        Returns:
+            AssembledPrompt: System prefix, request text, token counts and the tables described
+        """
+        counter = get_token_counter()
+        budget = get_token_budget(self.model)
+        renderer = self._renderer()
+        prefix = self.system_prefix()
+        
+        # Rank the tables once; selection and the likely-tables list both use the ranking
+        ranked = get_schema_index(self.schema_map, self.schema_version).rank(self.prompt)
+        
+        # Only the tables relevant to the prompt (plus their FK neighbours) are candidates
+        selected_tables = self._select_tables(ranked)
+        likely_tables = self._get_likely_tables(ranked)
+        in_prefix = set(prefix.tables)
+        missing = [table_key for table_key in selected_tables if table_key not in in_prefix]
+        
+        # Without the full list in the prefix, the request names the tables chosen for it
+        available_tables = "" if prefix.lists_all_tables else renderer.available_tables(selected_tables, max_listed=0)
+        fixed_tokens = prefix.tokens + counter.count(self._render_request(likely_tables, available_tables, ""), self.model)
+        tables, omitted = fill_tables(renderer, missing, budget - fixed_tokens, counter, self.model)
+        
+        # Schema headers are not in the snippet estimate; drop the least relevant tables if they tip it over
+        while True:
+            schema_section = self._format_schema_map(tables) if tables else ""
+            if omitted:
+                schema_section += f"\n\n({len(omitted)} more related tables omitted to fit the prompt size)"
+            text = self._render_request(likely_tables, available_tables, schema_section)
+            tokens = prefix.tokens + counter.count(text, self.model)
+            if tokens <= budget or not tables:
+                break
+            tables = tables[:-1]
+            omitted = [table_key for table_key in missing if table_key not in tables]
+        
+        described = [table_key for table_key in selected_tables if table_key in in_prefix or table_key in tables]
+        logger.info(
+            f"Prompt: ~{tokens} tokens of a {budget} budget (~{prefix.tokens} in the cached prefix), "
+            f"{len(described)} tables described" + (f", {len(omitted)} omitted" if omitted else "")
+        )
+        return AssembledPrompt(
+            text=text,
+            system=prefix.text,
+            tokens=tokens,
+            prefix_tokens=prefix.tokens,
+            budget=budget,
+            tables=described,
+            omitted_tables=omitted
+        )
+    
+    def system_prefix(self) -> SystemPrefix:
+        """The rules and schema part of the prompt, byte-identical for every question against this schema version."""
+        budget = get_token_budget(self.model)
+        if self.schema_version is None:
+            return self._build_system_prefix(budget)
+        return get_system_prefix((self.schema_version, self.model, budget), lambda: self._build_system_prefix(budget))
+    
+    def _build_system_prefix(self, budget: int) -> SystemPrefix:
+        """Fill the prefix's share of the budget with the most connected tables."""
+        counter = get_token_counter()
+        renderer = self._renderer()
+        index = get_schema_index(self.schema_map, self.schema_version)
+        
+        lists_all_tables = renderer.table_count <= PROMPT_CONFIG['max_listed_tables']
+        available_tables = renderer.all_tables if lists_all_tables else ""
+        # Sized with the uncalibrated count so the prefix is the same in every process
+        allowance = int(budget * PROMPT_BUDGET_CONFIG['prefix_share']) - counter.count(
+            self._render_system(available_tables, "", partial=True)
+        )
+        tables = prefix_tables(renderer, index.neighbours, allowance, counter)
+        
+        text = self._render_system(available_tables, self._format_schema_map(tables), partial=len(tables) < renderer.table_count)
+        return SystemPrefix(
+            text=text,
+            tokens=counter.count(text, self.model),
+            tables=tables,
+            lists_all_tables=lists_all_tables
+        )
+    
+    def _render_system(self, available_tables: str, schema_section: str, partial: bool) -> str:
+        """Fill the system prefix template."""
+        available_line = f"AVAILABLE TABLES: {available_tables}\n\n" if available_tables else ""
+        partial_note = "\n\nOther tables are described in the request when they are relevant to it." if partial else ""
+        return f"""You write Microsoft SQL Server (T-SQL) queries that answer questions about the database described below.
 
-{schema_info}
+{available_line}Database Schema:
+{schema_section}{partial_note}
 
 IMPORTANT RULES:
-1. ONLY use tables and columns that exist in the schema above. Do NOT invent or guess column names.
-2. If you are unsure which column to use, pick from the columns listed in the schema above.
+1. ONLY use tables and columns that exist in the schema. Do NOT invent or guess column names.
+2. If you are unsure which column to use, pick from the columns listed in the schema.
 3. ALWAYS use fully qualified table names in ALL parts of the query (e.g., 'schema.table', NOT just 'table')
 4. Follow foreign key relationships for joins
 5. Use table aliases consistently
@@ -167,7 +375,7 @@ IMPORTANT RULES:
 11. If the user asks 'how many', 'count', or 'number of', use COUNT(*) or COUNT(column) as appropriate
 12. ALWAYS use fully qualified table names in FROM and JOIN clauses
 
-CHECK: Before returning the query, verify that every column used in the query is explicitly listed in the schema above. If any column is not listed, it does NOT exist.
+CHECK: Before returning the query, verify that every column used in the query is explicitly listed in the schema. If any column is not listed, it does NOT exist.
 
 Example format:
 ```sql
@@ -176,108 +384,55 @@ FROM schema.table
 JOIN schema.other_table ON schema.table.id = schema.other_table.id
 GROUP BY schema.table.column1
 ORDER BY schema.table.column2 DESC
-```
-
-Please generate a SQL query that answers the user's request. The query MUST be wrapped in sql blocks."""
-        
-        return full_prompt
+```"""
     
-    def _format_schema_info(self) -> str:
-        """Format schema information for the prompt."""
-        # Get likely tables based on the prompt
-        likely_tables = self._get_likely_tables()
-        
-        # Format available tables
-        available_tables = self._get_available_tables()
-        
-        # Build schema info
-        schema_info = f"""LIKELY TABLES FOR THIS QUERY:
-{likely_tables}
+    def _render_request(self, likely_tables: str, available_tables: str, schema_section: str) -> str:
+        """Fill the per-question request template."""
+        available_line = f"\n\nTABLES SELECTED FOR THIS QUERY: {available_tables}" if available_tables else ""
+        schema_block = f"\n\nADDITIONAL SCHEMA FOR THIS QUERY:\n{schema_section}" if schema_section else ""
+        return f"""IMPORTANT: This is a new question. Ignore any previous queries and focus only on the current request.
 
-AVAILABLE TABLES: {available_tables}
+GOAL: Write a SQL query that answers the following user request as directly as possible.
 
-Database Schema:
-{self._format_schema_map()}
+USER REQUEST: {self.prompt}
 
-IMPORTANT RULES:
-1. ONLY use tables and columns that exist in the schema above. Do NOT invent or guess column names.
-2. If you are unsure which column to use, pick from the columns listed in the schema above.
-3. ALWAYS use fully qualified table names in ALL parts of the query (e.g., 'schema.table', NOT just 'table')
-4. Follow foreign key relationships for joins
-5. Use table aliases consistently
-6. Include all non-aggregated columns in GROUP BY
-7. Reference columns from the correct aliased tables
-8. Return ONLY the SQL query within ```sql ``` blocks
-9. Do not include any explanations or comments in the SQL block
-10. In the SELECT clause, use fully qualified column names (e.g., 'schema.table.column')
-11. If the user asks 'how many', 'count', or 'number of', use COUNT(*) or COUNT(column) as appropriate
-12. ALWAYS use fully qualified table names in FROM and JOIN clauses
+THINK STEP: Before writing the query, answer these questions:
+1. What is the user asking for? (e.g., count, sum, list, etc.)
+2. Which table(s) and column(s) best match this request? List them explicitly.
+3. Why did you choose these tables/columns?
+4. Verify that every column you plan to use is explicitly listed in the schema.
 
-CHECK: Before returning the query, verify that every column used in the query is explicitly listed in the schema above. If any column is not listed, it does NOT exist.
+CRITICAL: You MUST use ONLY the columns listed in the schema. If a column is not listed, it does NOT exist. Do NOT guess or invent column names.
 
-Example format:
-```sql
-SELECT schema.table.column1, schema.table.column2
-FROM schema.table
-JOIN schema.other_table ON schema.table.id = schema.other_table.id
-GROUP BY schema.table.column1
-ORDER BY schema.table.column2 DESC
-```
+LIKELY TABLES FOR THIS QUERY:
+{likely_tables}{available_line}{schema_block}
 
 Please generate a SQL query that answers the user's request. The query MUST be wrapped in sql blocks."""
-        
-        return schema_info
     
-    def _get_likely_tables(self) -> str:
-        """Get likely tables based on the prompt content."""
-        likely_tables = []
-        prompt_words = set(self.prompt.lower().split())
-        
-        for schema_name, schema_info in self.schema_map.items():
-            if "tables" in schema_info:
-                for table_name, table_info in schema_info["tables"].items():
-                    # Check if any word from the prompt appears in the table name
-                    if any(word in table_name.lower() for word in prompt_words):
-                        columns = table_info.get('columns', {})
-                        columns_str = ", ".join(columns.keys())
-                        likely_tables.append(f"{schema_name}.{table_name}: {columns_str}")
-        return "\n".join(likely_tables)
-    
-    def _get_available_tables(self) -> str:
-        """Get list of all available tables."""
-        tables = []
-        for schema_name, schema_info in self.schema_map.items():
-            if "tables" in schema_info:
-                tables.extend([f"{schema_name}.{table}" for table in schema_info["tables"].keys()])
-        return ", ".join(sorted(tables))
+    def _select_tables(self, ranked: List[Tuple[str, float]] = None) -> List[str]:
+        """Select the tables to describe: top-k ranked for the prompt plus their FK closure."""
+        index = get_schema_index(self.schema_map, self.schema_version)
+        return index.select_tables(
+            self.prompt,
+            top_k=PROMPT_CONFIG['top_k_tables'],
+            max_tables=PROMPT_CONFIG['max_tables'],
+            ranked=ranked
+        )
     
-    def _format_schema_map(self) -> str:
-        """Format the schema map for display."""
-        schema_str = []
-        for schema_name, schema_info in self.schema_map.items():
-            if "tables" in schema_info:
-                schema_str.append(f"\n{schema_name} Schema:\n")
-                for table_name, table_info in schema_info["tables"].items():
-                    schema_str.append(f"\n{schema_name}.{table_name}")
-                    # Add columns
-                    for column_name, column_info in table_info.get('columns', {}).items():
-                        col_type = column_info.get('type', 'unknown')
-                        is_pk = column_name in table_info.get('primary_keys', [])
-                        is_fk = any(fk['column'] == column_name for fk in table_info.get('foreign_keys', []))
-                        
-                        col_str = f"  - {column_name} ({col_type})"
-                        if is_pk:
-                            col_str += " [PRIMARY KEY]"
-                        if is_fk:
-                            col_str += " [FOREIGN KEY]"
-                        schema_str.append(col_str)
-                    
-                    # Add foreign key relationships
-                    if table_info.get('foreign_keys'):
-                        schema_str.append("\n  Foreign Keys:")
-                        for fk in table_info['foreign_keys']:
-                            schema_str.append(f"    - {fk['column']} -> {fk['references']}")
-        return "\n".join(schema_str)
+    def _get_likely_tables(self, ranked: List[Tuple[str, float]] = None) -> str:
+        """Get likely tables ranked by relevance to the prompt content."""
+        if ranked is None:
+            ranked = get_schema_index(self.schema_map, self.schema_version).rank(self.prompt)
+        top_tables = [table_key for table_key, _ in ranked[:PROMPT_CONFIG['top_k_tables']]]
+        return self._renderer().likely_tables(top_tables)
+    
+    def _format_schema_map(self, selected_tables: List[str] = None) -> str:
+        """Format the schema map for display, limited to selected_tables when given."""
+        return self._renderer().schema_section(selected_tables)
+    
+    def _renderer(self) -> SchemaRenderer:
+        """Table snippets for this schema version, rendered once and shared by every prompt."""
+        return get_schema_renderer(self.schema_map, self.schema_version)
 
 def refine_sql_query(query: str, error_message: str, schema_map: dict) -> str:
     """Refine SQL query based on error message and schema details."""
@@ -411,162 +566,263 @@ def validate_tables_in_schema(query: str, schema_map: dict) -> Tuple[bool, str]:
         logger.error(f"Error validating tables in schema: {str(e)}")
         return False, f"Error validating tables: {str(e)}"
 
-def process_user_prompt(prompt: str, database_name: str) -> dict:
-    """Process user prompt and return response"""
+def warmup_prompt_prefix(database_name: str) -> bool:
+    """
+    Prime Ollama with the system prefix of a database's current schema version.
+    
+    Call when a database is selected, so the first question does not pay for
+    loading the model and evaluating the rules and schema.
+    
+    Args:
+        database_name (str): Database that was selected
+        
+    Returns:
+        bool: True if the prefix was primed
+    """
+    try:
+        llm = get_llm_instance()
+        schema_map = get_schema_map(database_name)
+        if llm is None or not schema_map:
+            return False
+        prefix = SQLPrompt(
+            prompt="",
+            schema_map=schema_map,
+            schema_version=get_schema_version(database_name),
+            model=llm.model
+        ).system_prefix()
+        return llm.prime_prefix(prefix.text)
+    except Exception as e:
+        logger.warning(f"Prompt prefix warmup for {database_name} failed: {str(e)}")
+        return False
+
+def start_prefix_warmup(database_name: str) -> threading.Thread:
+    """Run warmup_prompt_prefix on a background thread and return the thread."""
+    thread = threading.Thread(
+        target=warmup_prompt_prefix,
+        args=(database_name,),
+        name=f"prefix-warmup-{database_name}",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+# Progress callback: on_event(event_name, data)
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+def emit_progress(on_event: Optional[ProgressCallback], event: str, **data) -> None:
+    """Send a progress event; a failing callback is logged, but a QueryCancelledError stops the request."""
+    if on_event is None:
+        return
     try:
+        on_event(event, data)
+    except QueryCancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"Progress callback failed for '{event}': {str(e)}")
+
+def with_token_events(
+    on_token: Optional[Callable[[str], None]],
+    on_event: Optional[ProgressCallback]
+) -> Optional[Callable[[str], None]]:
+    """Token callback that also reports each chunk as a "token" progress event."""
+    if on_event is None:
+        return on_token
+    
+    def callback(token: str):
+        if on_token is not None:
+            on_token(token)
+        emit_progress(on_event, "token", text=token)
+    return callback
+
+def process_user_prompt(
+    prompt: str,
+    database_name: str,
+    on_token: Optional[Callable[[str], None]] = None,
+    use_cache: bool = True,
+    query_id: Optional[str] = None,
+    on_event: Optional[ProgressCallback] = None
+) -> dict:
+    """
+    Process user prompt and return response.
+    
+    SQL that passed validation is remembered per prompt, database, schema version
+    and model; asking the same question again skips the LLM and refinement entirely.
+    With the semantic cache enabled, a close paraphrase of an earlier question does too.
+    
+    Args:
+        prompt (str): User request
+        database_name (str): Database to query
+        on_token (Callable[[str], None], optional): Called with each chunk of the initial and
+            any refinement completion as it streams in
+        use_cache (bool): Set to False to always generate new SQL
+        query_id (str, optional): Id under which the generated query can be stopped with
+            sql_connector.cancel_query(); on_token may also raise QueryCancelledError to stop
+            generation
+        on_event (ProgressCallback, optional): Called as each step happens with one of
+            schema_loaded, cache_hit, prompt_built, token, candidate_sql, validation,
+            cost_gate, executing, rows or query_error, and a dict of details
+            
+    Returns:
+        dict: {"response": ..., "debug_info": ...}
+    """
+    try:
+        on_token = with_token_events(on_token, on_event)
+        
         # Get schema map
         schema_map = get_schema_map(database_name)
+        schema_version = get_schema_version(database_name)
+        llm = get_llm_instance()
+        emit_progress(
+            on_event, "schema_loaded",
+            database=database_name,
+            schema_version=schema_version,
+            tables=sum(len(schema.get('tables', {})) for schema in schema_map.values())
+        )
         
-        # Debug logging for schema map
-        logger.info("\n=== Schema Map Contents ===")
-        for schema_name, schema_info in schema_map.items():
-            logger.info(f"\nSchema: {schema_name}")
-            for table_name, table_info in schema_info.get('tables', {}).items():
-                logger.info(f"  Table: {table_name}")
-                logger.info(f"    Columns: {list(table_info.get('columns', {}).keys())}")
-                logger.info(f"    Primary Keys: {table_info.get('primary_keys', [])}")
-                logger.info(f"    Foreign Keys: {[fk['column'] for fk in table_info.get('foreign_keys', [])]}")
+        # Reuse SQL generated earlier for the same question against the same schema and model
+        use_cache = use_cache and GENERATION_CACHE_CONFIG['enabled']
+        if use_cache:
+            cached_query = get_generation_cache().get(prompt, database_name, schema_version, llm.model)
+            if cached_query:
+                debug_info = {
+                    "initial_query": cached_query,
+                    "generation_cache": "hit",
+                    "tool_calls": [
+                        f"USER PROMPT: {prompt}",
+                        f"CACHE HIT: reusing validated SQL for schema version {schema_version}"
+                    ]
+                }
+                emit_progress(on_event, "cache_hit", kind="exact", sql=cached_query)
+                result = _execute_cached_query(cached_query, debug_info, prompt, query_id, schema_version, on_event)
+                if result is not None:
+                    return result
+                get_generation_cache().remove(prompt, database_name, schema_version, llm.model)
+                get_semantic_cache().remove(cached_query, database_name, schema_version, llm.model)
+        
+        # Then SQL validated for a paraphrase of this question
+        prompt_vector = None
+        if use_cache and SEMANTIC_CACHE_CONFIG['enabled']:
+            semantic_cache = get_semantic_cache()
+            prompt_vector = semantic_cache.embed(prompt)
+            match = None
+            if prompt_vector is not None:
+                match = semantic_cache.lookup(prompt_vector, database_name, schema_version, llm.model)
+            if match:
+                cached_query, matched_prompt, similarity = match
+                debug_info = {
+                    "initial_query": cached_query,
+                    "generation_cache": "semantic hit",
+                    "semantic_match": {"prompt": matched_prompt, "similarity": round(similarity, 4)},
+                    "tool_calls": [
+                        f"USER PROMPT: {prompt}",
+                        f"SEMANTIC CACHE HIT: reusing validated SQL of '{matched_prompt}' (similarity {similarity:.3f})"
+                    ]
+                }
+                emit_progress(on_event, "cache_hit", kind="semantic", sql=cached_query, similarity=round(similarity, 4))
+                result = _execute_cached_query(cached_query, debug_info, prompt, query_id, schema_version, on_event)
+                if result is not None:
+                    if result["debug_info"].get("executed"):
+                        get_generation_cache().put(prompt, database_name, schema_version, llm.model, cached_query)
+                    return result
+                semantic_cache.remove(cached_query, database_name, schema_version, llm.model)
+        
+        # Debug logging for schema map (walks every table, so only when debug logging is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\n=== Schema Map Contents ===")
+            for schema_name, schema_info in schema_map.items():
+                logger.debug(f"\nSchema: {schema_name}")
+                for table_name, table_info in schema_info.get('tables', {}).items():
+                    logger.debug(f"  Table: {table_name}")
+                    logger.debug(f"    Columns: {list(table_info.get('columns', {}).keys())}")
+                    logger.debug(f"    Primary Keys: {table_info.get('primary_keys', [])}")
+                    logger.debug(f"    Foreign Keys: {[fk['column'] for fk in table_info.get('foreign_keys', [])]}")
         
         # Create SQL prompt with all required fields
         sql_prompt = SQLPrompt(
             prompt=prompt,
             schema_map=schema_map,
-            description="Generate SQL query for user request"
+            description="Generate SQL query for user request",
+            schema_version=schema_version,
+            model=llm.model
+        )
+        assembled = sql_prompt.assemble()
+        full_prompt = assembled.text
+        emit_progress(
+            on_event, "prompt_built",
+            characters=len(full_prompt),
+            tokens=assembled.tokens,
+            prefix_tokens=assembled.prefix_tokens,
+            budget=assembled.budget,
+            tables=len(assembled.tables),
+            omitted_tables=len(assembled.omitted_tables)
         )
-        full_prompt = sql_prompt.to_full_prompt()
         
-        # Get initial response from LLM
-        initial_response = get_llm_instance().get_completion(full_prompt)
-        initial_query = clean_sql_response(initial_response)
+        # Get initial response from LLM: one completion, or several raced concurrently
+        candidates = None
+        if PARALLEL_GENERATION_CONFIG['candidates'] > 1:
+            initial_response, initial_query, error, candidates = _generate_parallel_candidates(
+                llm, full_prompt, schema_map, PARALLEL_GENERATION_CONFIG['candidates'], on_token,
+                system_prompt=assembled.system
+            )
+        else:
+            initial_response = llm.get_completion(full_prompt, system_prompt=assembled.system, on_token=on_token)
+            initial_query = clean_sql_response(initial_response)
+            # First validate that all tables exist in the schema, then the query dialect
+            error = _validate_generated_query(initial_query, schema_map)
         
         # Initialize debug info
         debug_info = {
             "initial_prompt": full_prompt,
             "initial_response": initial_response,
             "initial_query": initial_query,
+            "system_prompt": assembled.system,
+            "prompt_tokens": {
+                "estimated": assembled.tokens,
+                "prefix": assembled.prefix_tokens,
+                "budget": assembled.budget,
+                "omitted_tables": assembled.omitted_tables
+            },
+            "generation_cache": "miss" if use_cache else "disabled",
             "tool_calls": [
                 f"USER PROMPT: {prompt}"
             ]
         }
+        if candidates is not None:
+            debug_info["candidates"] = candidates
+        emit_progress(on_event, "candidate_sql", stage="initial", sql=initial_query)
+        emit_progress(on_event, "validation", stage="initial", valid=error is None, error=error)
         
-        # First validate that all tables exist in the schema
-        table_validation = validate_tables_in_schema(initial_query, schema_map)
-        if not table_validation[0]:
-            debug_info["validation_error"] = table_validation[1]
-            debug_info["tool_calls"].append(f"ERROR: {table_validation[1]}")
-            
-            # Attempt to refine the query
-            refinement_prompt = refine_sql_query(
-                initial_query,
-                table_validation[1],
-                schema_map
-            )
-            
-            # Add refinement prompt to tool calls
-            debug_info["tool_calls"].append(f"REFINEMENT PROMPT: {refinement_prompt}")
-            
-            # Get refinement response
-            refinement_response = get_llm_instance().get_completion(refinement_prompt)
-            final_query = clean_sql_response(refinement_response)
-            
-            # Add refinement info to debug
-            debug_info.update({
-                "refinement_prompt": refinement_prompt,
-                "refinement_response": refinement_response,
-                "final_query": final_query
-            })
+        final_query = initial_query
+        if error:
+            debug_info["validation_error"] = error
+            debug_info["tool_calls"].append(f"ERROR: {error}")
             
-            # Validate the refined query's tables
-            refined_table_validation = validate_tables_in_schema(final_query, schema_map)
-            if not refined_table_validation[0]:
-                debug_info["tool_calls"].append(f"ERROR: {refined_table_validation[1]}")
+            # Attempt to refine the query once
+            final_query = _refine_generated_query(initial_query, error, schema_map, debug_info, on_token)
+            refined_error = _validate_generated_query(final_query, schema_map)
+            emit_progress(on_event, "candidate_sql", stage="refined", sql=final_query)
+            emit_progress(on_event, "validation", stage="refined", valid=refined_error is None, error=refined_error)
+            if refined_error:
+                debug_info["tool_calls"].append(f"ERROR: {refined_error}")
                 return {
-                    "response": f"I apologize, but I'm having trouble generating a valid SQL query. The error is: {refined_table_validation[1]}",
+                    "response": f"I apologize, but I'm having trouble generating a valid SQL query. The error is: {refined_error}",
                     "debug_info": debug_info
                 }
-            
-            # Then validate the query dialect
-            validation_result = validate_query_dialect(final_query, schema_map)
-            if not validation_result["is_valid"]:
-                debug_info["tool_calls"].append(f"ERROR: {validation_result['error']}")
-                return {
-                    "response": f"I apologize, but I'm having trouble generating a valid SQL query. The error is: {validation_result['error']}",
-                    "debug_info": debug_info
-                }
-            
-            # Track tool call for final query execution
-            debug_info["tool_calls"].append(f"DB CALL: execute_query({final_query})")
-            
-            # Execute the refined query
-            result = execute_query(final_query)
-            return {
-                "response": format_query_result(result),
-                "debug_info": debug_info
-            }
         
-        # If initial query tables are valid, validate the query dialect
-        validation_result = validate_query_dialect(initial_query, schema_map)
-        if not validation_result["is_valid"]:
-            debug_info["validation_error"] = validation_result["error"]
-            debug_info["tool_calls"].append(f"ERROR: {validation_result['error']}")
-            
-            # Attempt to refine the query
-            refinement_prompt = refine_sql_query(
-                initial_query,
-                validation_result["error"],
-                schema_map
-            )
-            
-            # Add refinement prompt to tool calls
-            debug_info["tool_calls"].append(f"REFINEMENT PROMPT: {refinement_prompt}")
-            
-            # Get refinement response
-            refinement_response = get_llm_instance().get_completion(refinement_prompt)
-            final_query = clean_sql_response(refinement_response)
-            
-            # Add refinement info to debug
-            debug_info.update({
-                "refinement_prompt": refinement_prompt,
-                "refinement_response": refinement_response,
-                "final_query": final_query
-            })
-            
-            # Validate the refined query's tables
-            refined_table_validation = validate_tables_in_schema(final_query, schema_map)
-            if not refined_table_validation[0]:
-                debug_info["tool_calls"].append(f"ERROR: {refined_table_validation[1]}")
-                return {
-                    "response": f"I apologize, but I'm having trouble generating a valid SQL query. The error is: {refined_table_validation[1]}",
-                    "debug_info": debug_info
-                }
-            
-            # Then validate the query dialect
-            refined_validation = validate_query_dialect(final_query, schema_map)
-            if not refined_validation["is_valid"]:
-                debug_info["tool_calls"].append(f"ERROR: {refined_validation['error']}")
-                return {
-                    "response": f"I apologize, but I'm having trouble generating a valid SQL query. The error is: {refined_validation['error']}",
-                    "debug_info": debug_info
-                }
-            
-            # Track tool call for final query execution
-            debug_info["tool_calls"].append(f"DB CALL: execute_query({final_query})")
-            
-            # Execute the refined query
-            result = execute_query(final_query)
-            return {
-                "response": format_query_result(result),
-                "debug_info": debug_info
-            }
+        result = _execute_validated_query(final_query, debug_info, prompt, query_id, schema_version, on_event=on_event)
+        # Only SQL that actually ran is worth replaying for the same question
+        if use_cache and result["debug_info"].get("executed"):
+            get_generation_cache().put(prompt, database_name, schema_version, llm.model, final_query)
+            if prompt_vector is not None:
+                get_semantic_cache().add(prompt_vector, prompt, final_query, database_name, schema_version, llm.model)
+        return result
         
-        # If initial query is valid, execute it
-        debug_info["tool_calls"].append(f"DB CALL: execute_query({initial_query})")
-        result = execute_query(initial_query)
+    except QueryCancelledError:
+        logger.info("Request stopped before its query ran")
         return {
-            "response": format_query_result(result),
-            "debug_info": debug_info
+            "response": "⏹️ Stopped.",
+            "debug_info": {"cancelled": True}
         }
-        
     except Exception as e:
         logger.error(f"Error in process_user_prompt: {str(e)}")
         return {
@@ -574,6 +830,299 @@ def process_user_prompt(prompt: str, database_name: str) -> dict:
             "debug_info": {}
         }
 
+def _generate_parallel_candidates(
+    llm: LocalLLM,
+    full_prompt: str,
+    schema_map: dict,
+    count: int,
+    on_token: Optional[Callable[[str], None]] = None,
+    system_prompt: Optional[str] = None
+) -> Tuple[str, Optional[str], Optional[str], List[Dict[str, Any]]]:
+    """
+    Generate several SQL candidates concurrently and keep the first valid one.
+    
+    Each candidate streams with its own temperature and seed and is validated
+    as soon as its SQL block is complete. The first valid candidate wins and
+    the other generations are aborted. Only the first candidate's tokens are
+    passed to on_token.
+    
+    Args:
+        llm (LocalLLM): LLM client
+        full_prompt (str): Generation prompt
+        schema_map (dict): Schema used for validation
+        count (int): Number of candidates
+        on_token (Callable[[str], None], optional): Called with the first candidate's chunks
+        system_prompt (str, optional): System prefix shared by every candidate
+        
+    Returns:
+        Tuple[str, Optional[str], Optional[str], List[Dict[str, Any]]]: Response text, query and
+        validation error (None when valid) of the winner, or of the first candidate if none was
+        valid, plus a summary of every finished candidate
+    """
+    temperatures = PARALLEL_GENERATION_CONFIG['temperatures'] or [0.1]
+    stop_event = threading.Event()
+    started = time.monotonic()
+    
+    def generate(index: int) -> Optional[Dict[str, Any]]:
+        options = {
+            "temperature": temperatures[index % len(temperatures)],
+            "seed": PARALLEL_GENERATION_CONFIG['seed'] + index
+        }
+        chunks = []
+        for token in llm.stream_completion(full_prompt, system_prompt, options=options, stop_event=stop_event):
+            chunks.append(token)
+            if index == 0 and on_token is not None:
+                on_token(token)
+        if stop_event.is_set():
+            # Another candidate already won; this one was cut short
+            return None
+        response = "".join(chunks)
+        query = clean_sql_response(response)
+        return {
+            "index": index,
+            **options,
+            "response": response,
+            "query": query,
+            "error": _validate_generated_query(query, schema_map),
+            "latency_ms": int((time.monotonic() - started) * 1000)
+        }
+    
+    finished = []
+    winner = None
+    executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix="sql-candidate")
+    try:
+        futures = [executor.submit(generate, index) for index in range(count)]
+        for future in as_completed(futures):
+            try:
+                candidate = future.result()
+            except QueryCancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"SQL candidate failed: {str(e)}")
+                continue
+            if candidate is None:
+                continue
+            finished.append(candidate)
+            if candidate["error"] is None and not stop_event.is_set():
+                winner = candidate
+                stop_event.set()
+                break
+    finally:
+        # Abort the remaining generations; their streams close on the next chunk
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    if winner is not None:
+        logger.info(f"SQL candidate {winner['index']} won after {winner['latency_ms']} ms")
+    elif finished:
+        winner = min(finished, key=lambda candidate: candidate["index"])
+    else:
+        raise RuntimeError("All SQL candidates failed")
+    
+    summary = [
+        {key: value for key, value in candidate.items() if key != "response"}
+        for candidate in sorted(finished, key=lambda candidate: candidate["index"])
+    ]
+    return winner["response"], winner["query"], winner["error"], summary
+
+def _validate_generated_query(query: Optional[str], schema_map: dict) -> Optional[str]:
+    """Run table and dialect validation on generated SQL. Returns the first error, or None if valid."""
+    table_validation = validate_tables_in_schema(query, schema_map)
+    if not table_validation[0]:
+        return table_validation[1]
+    
+    validation_result = validate_query_dialect(query, schema_map)
+    if not validation_result["is_valid"]:
+        return validation_result["error"]
+    return None
+
+def _refine_generated_query(
+    query: str,
+    error: str,
+    schema_map: dict,
+    debug_info: dict,
+    on_token: Optional[Callable[[str], None]] = None
+) -> Optional[str]:
+    """Ask the LLM to fix a query that failed validation and record the exchange in debug_info."""
+    refinement_prompt = refine_sql_query(query, error, schema_map)
+    
+    # Add refinement prompt to tool calls
+    debug_info["tool_calls"].append(f"REFINEMENT PROMPT: {refinement_prompt}")
+    
+    # Get refinement response
+    refinement_response = get_llm_instance().get_completion(refinement_prompt, on_token=on_token)
+    final_query = clean_sql_response(refinement_response)
+    
+    # Add refinement info to debug
+    debug_info.update({
+        "refinement_prompt": refinement_prompt,
+        "refinement_response": refinement_response,
+        "final_query": final_query
+    })
+    return final_query
+
+def execute_confirmed_query(prompt: str, query: str, query_id: Optional[str] = None) -> dict:
+    """
+    Run a query the cost gate held for confirmation, after the user confirmed it.
+    
+    Args:
+        prompt (str): The user request the query was generated for
+        query (str): The held query (debug_info["cost_gate"]["sql"])
+        query_id (str, optional): Id under which the query can be cancelled
+        
+    Returns:
+        dict: {"response": ..., "debug_info": ...} like process_user_prompt
+    """
+    debug_info = {
+        "initial_query": query,
+        "tool_calls": [
+            f"USER PROMPT: {prompt}",
+            "CONFIRMED: running query above the cost gate thresholds"
+        ]
+    }
+    return _execute_validated_query(query, debug_info, prompt, query_id, confirmed=True)
+
+def _execute_validated_query(
+    query: str,
+    debug_info: dict,
+    prompt: str = None,
+    query_id: Optional[str] = None,
+    schema_version: Optional[str] = None,
+    confirmed: bool = False,
+    on_event: Optional[ProgressCallback] = None
+) -> dict:
+    """
+    Execute SQL that passed validation and build the process_user_prompt response.
+    
+    With the cost gate enabled, the estimated plan is checked first: expensive
+    queries are rejected, or held until the user confirms them (debug_info["cost_gate"]).
+    Queries that are rejected, time out or are stopped are recorded in the
+    audit log and answered with a message instead of an error.
+    """
+    if COST_GATE_CONFIG['enabled'] and not confirmed:
+        decision = get_cost_gate().check(query, schema_version=schema_version)
+        emit_progress(on_event, "cost_gate", decision=decision.decision, reasons=decision.reasons)
+        if decision.decision in (CONFIRM, REJECT):
+            debug_info["cost_gate"] = {
+                "decision": decision.decision,
+                "reasons": decision.reasons,
+                "estimate": decision.estimate.model_dump() if decision.estimate else None,
+                "sql": query
+            }
+            reasons = "\n".join(f"- {reason}" for reason in decision.reasons)
+            if decision.decision == REJECT:
+                log_query_event(prompt, query, False, f"Rejected by cost gate: {'; '.join(decision.reasons)}")
+                debug_info["tool_calls"].append("COST GATE: rejected")
+                message = f"🛑 This query was not run because its estimated plan is too expensive:\n{reasons}\n\nTry narrowing the question."
+            else:
+                debug_info["tool_calls"].append("COST GATE: confirmation required")
+                message = f"⚠️ This query looks expensive and needs confirmation before it runs:\n{reasons}"
+            return {
+                "response": message,
+                "debug_info": debug_info
+            }
+    
+    # Track tool call for query execution
+    debug_info["tool_calls"].append(f"DB CALL: execute_query({query})")
+    emit_progress(on_event, "executing", sql=query)
+    started = time.monotonic()
+    try:
+        result = execute_query(query, query_id=query_id)
+    except (QueryTimeoutError, QueryCancelledError) as e:
+        elapsed_ms = int((time.monotonic() - started) * 1000)
+        emit_progress(on_event, "query_error", error=str(e), timed_out=isinstance(e, QueryTimeoutError))
+        log_query_event(prompt, query, False, str(e), elapsed_ms)
+        if isinstance(e, QueryTimeoutError):
+            debug_info["timed_out"] = True
+            message = f"⏱️ {str(e)}. Add filters or check the joins, then try again."
+        else:
+            debug_info["cancelled"] = True
+            message = "⏹️ Query stopped."
+        debug_info["tool_calls"].append(f"ERROR: {str(e)}")
+        return {
+            "response": message,
+            "debug_info": debug_info
+        }
+    debug_info["executed"] = True
+    if getattr(result, "truncated", False):
+        debug_info["truncated"] = result.truncated_reason
+    emit_progress(
+        on_event, "rows",
+        row_count=len(result) if result is not None else 0,
+        truncated=getattr(result, "truncated", False),
+        truncated_reason=getattr(result, "truncated_reason", None)
+    )
+    return {
+        "response": format_query_result(result),
+        "debug_info": debug_info
+    }
+
+def _rejected_by_cost_gate(result: dict) -> bool:
+    """True if _execute_validated_query refused to run the query because of its estimated cost."""
+    return result.get("debug_info", {}).get("cost_gate", {}).get("decision") == REJECT
+
+def _execute_cached_query(
+    query: str,
+    debug_info: dict,
+    prompt: str,
+    query_id: Optional[str],
+    schema_version: Optional[str],
+    on_event: Optional[ProgressCallback] = None
+) -> Optional[dict]:
+    """
+    Execute SQL reused from a cache.
+    
+    Returns:
+        Optional[dict]: The response, or None if the SQL failed when run or was
+        rejected by the cost gate, in which case the caller generates new SQL
+    """
+    try:
+        result = _execute_validated_query(query, debug_info, prompt, query_id, schema_version, on_event=on_event)
+    except QueryCancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"Cached SQL failed, generating new SQL: {str(e)}")
+        return None
+    if _rejected_by_cost_gate(result):
+        logger.warning("Cached SQL was rejected by the cost gate, generating new SQL")
+        return None
+    return result
+
+# Rows shown in a chat answer; the full result is available from the SQL itself
+MAX_RESULT_ROWS_IN_RESPONSE = 50
+
+def format_query_result(result: List[Dict]) -> str:
+    """
+    Format query rows as a markdown table for the chat response.
+    
+    Args:
+        result (List[Dict]): Rows returned by execute_query
+        
+    Returns:
+        str: Markdown table, truncated to MAX_RESULT_ROWS_IN_RESPONSE rows
+    """
+    if not result:
+        return "The query returned no results."
+    
+    columns = list(result[0].keys())
+    
+    def cell(value) -> str:
+        return "" if value is None else str(value).replace("|", "\\|").replace("\n", " ")
+    
+    lines = [
+        "| " + " | ".join(cell(column) for column in columns) + " |",
+        "|" + "---|" * len(columns)
+    ]
+    for row in result[:MAX_RESULT_ROWS_IN_RESPONSE]:
+        lines.append("| " + " | ".join(cell(row.get(column)) for column in columns) + " |")
+    
+    summary = f"**{len(result)} row{'s' if len(result) != 1 else ''} returned**"
+    if len(result) > MAX_RESULT_ROWS_IN_RESPONSE:
+        summary += f" (showing the first {MAX_RESULT_ROWS_IN_RESPONSE})"
+    if getattr(result, "truncated", False):
+        summary += f"\n\n⚠️ Result truncated: {result.truncated_reason}. Add filters or TOP to narrow the query."
+    return summary + "\n\n" + "\n".join(lines)
+
 def print_schema_map(schema_map: Dict) -> None:
     """Print schema map in a readable format"""
     logger.info("\n=== Schema Map Contents ===")
@@ -804,6 +1353,14 @@ def format_schema_details(schema_map: dict, truncate: bool = False) -> str:
     # Original full schema details formatting logic here
     ...
 
+# A ```sql block whose closing fence has been generated
+SQL_BLOCK_PATTERN = re.compile(r"```sql\s*\n(.*?)```", re.DOTALL | re.IGNORECASE)
+
+def has_complete_sql_block(text: str) -> bool:
+    """Check whether text already contains a closed ```sql block with a query in it."""
+    match = SQL_BLOCK_PATTERN.search(text)
+    return bool(match and match.group(1).strip())
+
 def extract_sql_query(response: str) -> Optional[str]:
     """
     Extract SQL query from LLM response.
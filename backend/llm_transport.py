@@ -0,0 +1,145 @@
+"""
+LLM Transport Module
+Shared keep-alive HTTP session for all Ollama traffic
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from backend.system import LLM_CONFIG, LLM_TRANSPORT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def get_ollama_base_url(api_base: str = None) -> str:
+    """Native Ollama base URL for an API base, which may point at the OpenAI-compatible /v1 path."""
+    base_url = (api_base or LLM_CONFIG['api_base']).rstrip("/")
+    if base_url.endswith("/v1"):
+        base_url = base_url[:-3].rstrip("/")
+    return base_url
+
+
+class LLMTransport:
+    """
+    Pooled requests.Session for talking to Ollama.
+
+    Connections are kept alive and reused across calls and threads. Connection
+    failures and 502/503/504 responses are retried with exponential backoff;
+    read errors are not, so a slow generation is never silently started twice.
+    Every request has a connect and a read timeout, so a hung server cannot
+    block the caller forever.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        connect_timeout: float = 5,
+        read_timeout: float = 120,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            backoff_factor=backoff_factor,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, path: str, base_url: str = None, timeout: Optional[Timeout] = None) -> requests.Response:
+        """
+        GET an Ollama endpoint.
+
+        Args:
+            path (str): Endpoint path, e.g. '/api/tags'
+            base_url (str, optional): Ollama base URL. Defaults to the configured one.
+            timeout (float or (connect, read), optional): Overrides the default timeouts
+
+        Returns:
+            requests.Response: The response; status is not checked
+        """
+        return self.session.get(self._url(path, base_url), timeout=self._timeout(timeout))
+
+    def post(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        base_url: str = None,
+        timeout: Optional[Timeout] = None,
+        stream: bool = False
+    ) -> requests.Response:
+        """
+        POST JSON to an Ollama endpoint.
+
+        Args:
+            path (str): Endpoint path, e.g. '/api/chat'
+            payload (Dict[str, Any]): JSON body
+            base_url (str, optional): Ollama base URL. Defaults to the configured one.
+            timeout (float or (connect, read), optional): Overrides the default timeouts.
+                For streamed responses the read timeout applies between chunks.
+            stream (bool): Stream the response body instead of reading it eagerly
+
+        Returns:
+            requests.Response: The response; status is not checked
+        """
+        return self.session.post(
+            self._url(path, base_url),
+            json=payload,
+            timeout=self._timeout(timeout),
+            stream=stream
+        )
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+    def _url(self, path: str, base_url: str = None) -> str:
+        return f"{get_ollama_base_url(base_url)}/{path.lstrip('/')}"
+
+    def _timeout(self, timeout: Optional[Timeout]) -> Tuple[float, float]:
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, tuple):
+            return timeout
+        return (self.connect_timeout, timeout)
+
+
+# Global transport instance
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_llm_transport() -> LLMTransport:
+    """Get or create the shared LLM transport."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = LLMTransport(
+                    pool_size=LLM_TRANSPORT_CONFIG['pool_size'],
+                    connect_timeout=LLM_TRANSPORT_CONFIG['connect_timeout'],
+                    read_timeout=LLM_TRANSPORT_CONFIG['read_timeout'],
+                    max_retries=LLM_TRANSPORT_CONFIG['max_retries'],
+                    backoff_factor=LLM_TRANSPORT_CONFIG['backoff_factor']
+                )
+                logger.info(f"Created LLM transport ({LLM_TRANSPORT_CONFIG})")
+    return _transport
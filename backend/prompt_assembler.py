@@ -0,0 +1,237 @@
+"""
+Prompt Assembler Module
+Token counting and budget-limited filling of schema snippets into generation prompts
+"""
+
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from backend.system import PROMPT_BUDGET_CONFIG
+from backend.schema_renderer import SchemaRenderer
+
+logger = logging.getLogger(__name__)
+
+# Calibration samples outside this range are ignored: a prompt served partly from
+# Ollama's KV cache reports only the newly evaluated tokens
+MIN_CHARS_PER_TOKEN = 1.5
+MAX_CHARS_PER_TOKEN = 8.0
+
+
+class SystemPrefix(BaseModel):
+    text: str
+    tokens: int
+    tables: List[str] = Field(default_factory=list)
+    lists_all_tables: bool = False
+
+
+class AssembledPrompt(BaseModel):
+    text: str
+    system: str = ""
+    tokens: int
+    prefix_tokens: int = 0
+    budget: int
+    tables: List[str] = Field(default_factory=list)
+    omitted_tables: List[str] = Field(default_factory=list)
+
+
+class TokenCounter:
+    """
+    Counts prompt tokens for a model.
+
+    With a tokenizer_path (the served model's tokenizer.json) tokens are counted
+    exactly with the tokenizers package. Otherwise they are estimated from a
+    characters-per-token ratio that starts at chars_per_token and is calibrated
+    per model from the prompt_eval_count Ollama reports for each completion.
+    """
+
+    def __init__(self, chars_per_token: float = 3.5, tokenizer_path: Optional[str] = None, smoothing: float = 0.2):
+        self.default_chars_per_token = chars_per_token
+        self.smoothing = smoothing
+        self._ratios: Dict[str, float] = {}
+        self._samples: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._tokenizer = _load_tokenizer(tokenizer_path) if tokenizer_path else None
+
+    def count(self, text: str, model: Optional[str] = None) -> int:
+        """Number of tokens in text for model (exact with a tokenizer, estimated otherwise)."""
+        if not text:
+            return 0
+        if self._tokenizer is not None:
+            return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+        return math.ceil(len(text) / self.chars_per_token(model))
+
+    def chars_per_token(self, model: Optional[str] = None) -> float:
+        """Current characters-per-token estimate for model."""
+        return self._ratios.get(model, self.default_chars_per_token)
+
+    def observe(self, model: str, prompt_chars: int, prompt_tokens: int) -> None:
+        """
+        Calibrate the estimate with a prompt's actual token count.
+
+        Args:
+            model (str): Model that evaluated the prompt
+            prompt_chars (int): Characters sent (prompt plus system prompt)
+            prompt_tokens (int): prompt_eval_count reported by Ollama
+        """
+        if self._tokenizer is not None or prompt_chars <= 0 or prompt_tokens <= 0:
+            return
+        ratio = prompt_chars / prompt_tokens
+        if not MIN_CHARS_PER_TOKEN <= ratio <= MAX_CHARS_PER_TOKEN:
+            return
+        with self._lock:
+            current = self._ratios.get(model)
+            self._ratios[model] = ratio if current is None else current + self.smoothing * (ratio - current)
+            self._samples[model] = self._samples.get(model, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the counting method and the calibrated ratio per model."""
+        with self._lock:
+            return {
+                "method": "tokenizer" if self._tokenizer is not None else "estimate",
+                "default_chars_per_token": self.default_chars_per_token,
+                "models": {
+                    model: {"chars_per_token": round(ratio, 3), "samples": self._samples[model]}
+                    for model, ratio in self._ratios.items()
+                }
+            }
+
+
+def _load_tokenizer(path: str):
+    """Load a Hugging Face tokenizer.json, or None (with a warning) if that is not possible."""
+    try:
+        from tokenizers import Tokenizer
+        tokenizer = Tokenizer.from_file(path)
+        logger.info(f"Counting prompt tokens with tokenizer {path}")
+        return tokenizer
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer {path}, estimating tokens instead: {str(e)}")
+        return None
+
+
+def get_token_budget(model: Optional[str] = None) -> int:
+    """Prompt token budget for a model."""
+    return PROMPT_BUDGET_CONFIG['model_budgets'].get(model, PROMPT_BUDGET_CONFIG['token_budget'])
+
+
+def fill_tables(
+    renderer: SchemaRenderer,
+    selected_tables: List[str],
+    available_tokens: int,
+    counter: "TokenCounter",
+    model: Optional[str] = None
+) -> Tuple[List[str], List[str]]:
+    """
+    Choose the table snippets that fit in a token allowance, most relevant first.
+
+    Tables are taken in selected_tables order; one that does not fit is skipped
+    so smaller, less relevant tables can still use the remaining room. The most
+    relevant table is always included.
+
+    Args:
+        renderer (SchemaRenderer): Rendered snippets of the schema version
+        selected_tables (List[str]): Candidate 'schema.table' keys, most relevant first
+        available_tokens (int): Tokens left for the schema section
+        counter (TokenCounter): Token counter
+        model (str, optional): Model the prompt is for
+
+    Returns:
+        Tuple[List[str], List[str]]: Included and omitted table keys, each in priority order
+    """
+    included, omitted = [], []
+    remaining = available_tokens
+    for table_key in selected_tables:
+        snippet = renderer.snippets.get(table_key)
+        if snippet is None:
+            continue
+        # +1 for the newline joining it to the section
+        tokens = counter.count(snippet, model) + 1
+        if tokens <= remaining or not included:
+            included.append(table_key)
+            remaining -= tokens
+        else:
+            omitted.append(table_key)
+    return included, omitted
+
+
+def prefix_tables(
+    renderer: SchemaRenderer,
+    neighbours: Dict[str, Set[str]],
+    available_tokens: int,
+    counter: "TokenCounter"
+) -> List[str]:
+    """
+    Choose the tables described in the system prefix, independently of any question.
+
+    The most connected tables come first (ties by name) and snippets are sized
+    with the uncalibrated count, so every process picks the same tables for a
+    schema version and the prefix stays byte-identical.
+
+    Args:
+        renderer (SchemaRenderer): Rendered snippets of the schema version
+        neighbours (Dict[str, Set[str]]): FK neighbours per table (SchemaIndex.neighbours)
+        available_tokens (int): Tokens the prefix may spend on table snippets
+        counter (TokenCounter): Token counter
+
+    Returns:
+        List[str]: Table keys for the prefix
+    """
+    ordered = sorted(renderer.snippets, key=lambda key: (-len(neighbours.get(key, ())), key))
+    tables, _ = fill_tables(renderer, ordered, available_tokens, counter)
+    return tables
+
+
+# System prefixes for the most recently used (schema version, model, budget) combinations
+_PREFIX_CACHE_SIZE = 16
+_prefix_cache: "OrderedDict[Tuple, SystemPrefix]" = OrderedDict()
+_prefix_lock = threading.Lock()
+
+
+def get_system_prefix(key: Tuple, build: Callable[[], SystemPrefix]) -> SystemPrefix:
+    """
+    Get the system prefix for key, building it once.
+
+    Keeping the first build for as long as the key is cached means the prefix
+    does not change when the token estimate is recalibrated.
+
+    Args:
+        key (Tuple): (schema_version, model, budget)
+        build (Callable[[], SystemPrefix]): Builds the prefix on a miss
+
+    Returns:
+        SystemPrefix: The cached prefix
+    """
+    with _prefix_lock:
+        prefix = _prefix_cache.get(key)
+        if prefix is not None:
+            _prefix_cache.move_to_end(key)
+            return prefix
+
+    prefix = build()
+    logger.info(f"Built system prefix for {key[0]} / {key[1]}: ~{prefix.tokens} tokens, {len(prefix.tables)} tables")
+    with _prefix_lock:
+        prefix = _prefix_cache.setdefault(key, prefix)
+        while len(_prefix_cache) > _PREFIX_CACHE_SIZE:
+            _prefix_cache.popitem(last=False)
+    return prefix
+
+
+# Global counter instance
+_token_counter = TokenCounter(
+    chars_per_token=PROMPT_BUDGET_CONFIG['chars_per_token'],
+    tokenizer_path=PROMPT_BUDGET_CONFIG['tokenizer_path']
+)
+
+
+def get_token_counter() -> TokenCounter:
+    """Get the process-wide token counter."""
+    return _token_counter
+
+
+def record_prompt_eval(model: str, prompt: str, system_prompt: Optional[str], response: Dict[str, Any]) -> None:
+    """Calibrate the token estimate from the prompt_eval_count of a final Ollama /api/chat chunk."""
+    get_token_counter().observe(model, len(prompt) + len(system_prompt or ""), response.get("prompt_eval_count") or 0)
@@ -0,0 +1,237 @@
+"""
+Query Result Module
+Columnar query results with zero-copy pandas/Arrow conversion and lazy row views
+"""
+
+import datetime
+import logging
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _to_column_array(values: List[Any]):
+    """
+    Pack one column's values into the most compact array that round-trips them.
+
+    Returns:
+        Tuple[np.ndarray, Optional[np.ndarray]]: Values (read-only) and a null mask
+        for int64/float64 columns that contained None
+    """
+    non_null = [value for value in values if value is not None]
+    has_nulls = len(non_null) != len(values)
+    kinds = {type(value) for value in non_null}
+    array, mask = None, None
+
+    if non_null and kinds == {bool}:
+        if not has_nulls:
+            array = np.array(values, dtype=np.bool_)
+    elif non_null and kinds <= {int, float}:
+        # Ints stay int64 (NULLs stored as 0 under the mask); a mix of ints and
+        # floats stays as Python objects rather than rounding ints to float
+        try:
+            if kinds == {int}:
+                array = np.array([0 if value is None else value for value in values], dtype=np.int64)
+            elif kinds == {float}:
+                array = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        except OverflowError:
+            array = None
+        if array is not None and has_nulls:
+            mask = np.fromiter((value is None for value in values), dtype=np.bool_, count=len(values))
+    elif non_null and kinds == {datetime.datetime} and all(value.tzinfo is None for value in non_null):
+        array = np.array(values, dtype="datetime64[us]")
+
+    if array is None:
+        mask = None
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+    array.flags.writeable = False
+    if mask is not None:
+        mask.flags.writeable = False
+    return array, mask
+
+
+class RowView(Mapping):
+    """
+    Lazy, read-only view of one row of a ColumnarResult.
+
+    Behaves like a dict keyed by column name (iteration, keys(), get(), dict(row))
+    and also accepts a column position: row[0] == row[columns[0]].
+    """
+
+    __slots__ = ("_result", "_index")
+
+    def __init__(self, result: "ColumnarResult", index: int):
+        self._result = result
+        self._index = index
+
+    def __getitem__(self, key: Union[str, int]) -> Any:
+        position = key if isinstance(key, int) else self._result.column_index(key)
+        return self._result.value(self._index, position)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._result.columns)
+
+    def __len__(self) -> int:
+        return len(self._result.columns)
+
+    def __repr__(self) -> str:
+        return f"RowView({dict(self)!r})"
+
+
+class ColumnarResult(Sequence):
+    """
+    Query result stored as one array per column.
+
+    Column names are kept once instead of once per row, numeric and datetime
+    columns are packed into typed NumPy arrays, and to_pandas()/to_arrow() wrap
+    those arrays without copying them. Indexing yields lazy RowView mappings,
+    so code written against a list of dicts keeps working. Results are
+    immutable and can be shared between callers.
+    """
+
+    def __init__(
+        self,
+        columns: List[str],
+        arrays: List[np.ndarray],
+        masks: Optional[List[Optional[np.ndarray]]] = None,
+        truncated: bool = False,
+        truncated_reason: Optional[str] = None
+    ):
+        self.columns = list(columns)
+        self._arrays = arrays
+        self._masks = masks or [None] * len(arrays)
+        self._positions = {name: position for position, name in enumerate(self.columns)}
+        self._length = len(arrays[0]) if arrays else 0
+        self.truncated = truncated
+        self.truncated_reason = truncated_reason
+
+    @classmethod
+    def from_batches(
+        cls,
+        columns: List[str],
+        batches: Iterable[List[tuple]],
+        truncated: bool = False,
+        truncated_reason: Optional[str] = None
+    ) -> "ColumnarResult":
+        """
+        Build a result from row batches (e.g. a RowStream), transposing each batch into the column lists.
+
+        Args:
+            columns (List[str]): Column names
+            batches (Iterable[List[tuple]]): Batches of row tuples
+
+        Returns:
+            ColumnarResult: The packed result
+        """
+        values: List[List[Any]] = [[] for _ in columns]
+        for batch in batches:
+            for position, column_values in enumerate(zip(*batch)):
+                values[position].extend(column_values)
+        packed = [_to_column_array(column_values) for column_values in values]
+        return cls(
+            columns,
+            [array for array, _ in packed],
+            [mask for _, mask in packed],
+            truncated=truncated,
+            truncated_reason=truncated_reason
+        )
+
+    @classmethod
+    def from_stream(cls, stream) -> "ColumnarResult":
+        """Build a result by draining a sql_connector.RowStream, keeping its truncation info."""
+        result = cls.from_batches(stream.columns, stream)
+        result.truncated = stream.truncated
+        result.truncated_reason = stream.truncated_reason
+        return result
+
+    @classmethod
+    def from_dicts(cls, rows: List[Dict[str, Any]]) -> "ColumnarResult":
+        """Build a result from a list of row dicts (columns taken from the first row)."""
+        columns = list(rows[0].keys()) if rows else []
+        return cls.from_batches(columns, [[tuple(row.get(column) for column in columns) for row in rows]])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RowView(self, i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("row index out of range")
+        return RowView(self, index)
+
+    def __repr__(self) -> str:
+        return f"ColumnarResult(columns={self.columns!r}, rows={self._length}, truncated={self.truncated})"
+
+    def column_index(self, name: str) -> int:
+        """Position of a column, raising KeyError for unknown names."""
+        return self._positions[name]
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only array of one column's values."""
+        return self._arrays[self._positions[name]]
+
+    def value(self, row: int, position: int) -> Any:
+        """Single value as a Python object (None for SQL NULL)."""
+        mask = self._masks[position]
+        if mask is not None and mask[row]:
+            return None
+        value = self._arrays[position][row]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialize every row as a dict."""
+        return [dict(RowView(self, i)) for i in range(self._length)]
+
+    def to_pandas(self) -> pd.DataFrame:
+        """
+        DataFrame backed by the result's arrays (no copy; the frame is read-only).
+
+        Integer columns with NULLs become nullable Int64 columns. Columns are
+        built by position, so duplicate column names are all kept.
+        """
+        frame = pd.DataFrame(
+            {position: self._pandas_column(position) for position in range(len(self.columns))},
+            copy=False
+        )
+        frame.columns = self.columns
+        return frame
+
+    def _pandas_column(self, position: int):
+        array, mask = self._arrays[position], self._masks[position]
+        if mask is not None and array.dtype == np.int64:
+            return pd.arrays.IntegerArray(array, mask)
+        return array
+
+    def to_arrow(self):
+        """pyarrow.Table of the result; numeric and datetime columns are wrapped without copying."""
+        import pyarrow as pa
+
+        arrays = [
+            pa.array(array, mask=mask) if mask is not None else pa.array(array)
+            for array, mask in zip(self._arrays, self._masks)
+        ]
+        return pa.Table.from_arrays(arrays, names=self.columns)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the result, including Python objects in object columns."""
+        total = 0
+        for array, mask in zip(self._arrays, self._masks):
+            total += array.nbytes + (mask.nbytes if mask is not None else 0)
+            if array.dtype == object:
+                total += sum(_object_size(value) for value in array)
+        return total
+
+
+def _object_size(value: Any) -> int:
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value) + 49
+    return 32
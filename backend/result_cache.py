@@ -0,0 +1,182 @@
+"""
+Result Cache Module
+In-memory LRU/TTL cache of query results keyed by canonical SQL, database and schema version
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlglot import exp, parse
+
+from backend.system import RESULT_CACHE_CONFIG
+from backend.query_result import ColumnarResult
+
+logger = logging.getLogger(__name__)
+
+# Functions whose result changes between executions; queries using them are never cached
+VOLATILE_PATTERN = re.compile(
+    r"\b(GETDATE|GETUTCDATE|SYSDATETIME|SYSUTCDATETIME|SYSDATETIMEOFFSET|CURRENT_TIMESTAMP|"
+    r"NEWID|NEWSEQUENTIALID|RAND|CRYPT_GEN_RANDOM|TABLESAMPLE)\b|@@",
+    re.IGNORECASE
+)
+
+# Only plain reads are cacheable
+READ_ONLY_PATTERN = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+WRITE_PATTERN = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|DROP|TRUNCATE|ALTER|CREATE|EXEC|EXECUTE|INTO)\b", re.IGNORECASE)
+
+
+def _parse_statements(sql: str) -> Optional[List[exp.Expression]]:
+    """Every statement of a T-SQL batch, or None if it does not parse."""
+    try:
+        return [statement for statement in parse(sql, read="tsql") if statement is not None]
+    except Exception:
+        return None
+
+
+def canonicalize_sql(sql: str) -> str:
+    """
+    Canonical form of a query, so formatting differences do not defeat the cache.
+
+    Every statement of a batch is canonicalized, so batches that differ only
+    after the first statement get different forms.
+
+    Args:
+        sql (str): T-SQL query
+
+    Returns:
+        str: The statements re-generated by sqlglot and joined with "; ",
+        or the query whitespace-collapsed if it does not parse
+    """
+    sql = sql.strip().rstrip(";").strip()
+    statements = _parse_statements(sql)
+    if not statements:
+        return " ".join(sql.split())
+    return "; ".join(statement.sql(dialect="tsql") for statement in statements)
+
+
+def is_cacheable(sql: str) -> bool:
+    """Check whether a query is a single read without volatile functions."""
+    if not READ_ONLY_PATTERN.match(sql) or WRITE_PATTERN.search(sql) or VOLATILE_PATTERN.search(sql):
+        return False
+    statements = _parse_statements(sql)
+    return statements is None or len(statements) == 1
+
+
+def _estimate_size(rows: ColumnarResult) -> int:
+    """Approximate memory held by a cached result."""
+    return rows.nbytes
+
+
+class ResultCache:
+    """
+    Bounded cache of query results.
+
+    Entries expire after ttl_seconds, and the least recently used entries are
+    evicted when either max_entries or max_bytes is exceeded. Results are
+    immutable ColumnarResult objects, so every caller shares the cached one.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # A single result may use at most a quarter of the budget
+        self.max_entry_bytes = max_bytes // 4
+
+        self._entries: "OrderedDict[Tuple, Tuple[ColumnarResult, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "skipped_volatile": 0,
+            "skipped_too_large": 0
+        }
+
+    @staticmethod
+    def make_key(sql: str, database: str, schema_version: Optional[str], variant: Any = None) -> Tuple:
+        """Cache key for a query against a database at a schema version (variant: e.g. a row cap)."""
+        return (database or "default", schema_version, canonicalize_sql(sql), variant)
+
+    def get(self, key: Tuple) -> Optional[ColumnarResult]:
+        """Return the cached result for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            rows, expires_at, size = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return rows
+
+    def put(self, key: Tuple, rows: ColumnarResult) -> bool:
+        """Store rows under key. Returns False if the result is too large to cache."""
+        size = _estimate_size(rows)
+        if size > self.max_entry_bytes:
+            with self._lock:
+                self._stats["skipped_too_large"] += 1
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (rows, time.monotonic() + self.ttl_seconds, size)
+            self._bytes += size
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+        return True
+
+    def record_skip(self) -> None:
+        """Count a query that bypassed the cache because it is volatile or not a read."""
+        with self._lock:
+            self._stats["skipped_volatile"] += 1
+
+    def invalidate(self, database: str = None) -> None:
+        """Drop cached results for one database, or all results when database is None."""
+        with self._lock:
+            for key in list(self._entries):
+                if database is None or key[0] == database:
+                    self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, hit rate and current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes})
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _remove(self, key: Tuple) -> None:
+        """Remove an entry. Caller must hold the lock."""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+# Global cache instance
+_result_cache = ResultCache(
+    max_entries=RESULT_CACHE_CONFIG['max_entries'],
+    max_bytes=RESULT_CACHE_CONFIG['max_bytes'],
+    ttl_seconds=RESULT_CACHE_CONFIG['ttl_seconds']
+)
+
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide query result cache."""
+    return _result_cache
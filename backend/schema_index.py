@@ -0,0 +1,212 @@
+"""
+Schema Index Module
+Inverted index over table names, column names and FK neighbours for prompt-time table retrieval
+"""
+
+import logging
+import math
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Field weights: a hit on the table name counts more than a hit on one of its columns
+TABLE_NAME_WEIGHT = 3.0
+COLUMN_NAME_WEIGHT = 1.0
+NEIGHBOUR_NAME_WEIGHT = 0.5
+SCHEMA_NAME_WEIGHT = 0.5
+
+# Words that say nothing about which table a question is about
+STOPWORDS = {
+    "a", "all", "an", "and", "any", "are", "as", "at", "be", "by", "can", "do", "does", "each", "for",
+    "from", "get", "give", "has", "have", "how", "i", "in", "is", "it", "list", "many", "me", "much",
+    "my", "of", "on", "or", "our", "per", "please", "show", "that", "the", "their", "there", "this",
+    "to", "top", "us", "was", "we", "were", "what", "when", "where", "which", "who", "with", "id"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Split identifiers and free text into lowercase, crudely stemmed tokens (CamelCase and snake_case aware)."""
+    words = re.findall(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+", text)
+    tokens = []
+    for word in words:
+        token = _stem(word.lower())
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def _stem(word: str) -> str:
+    """Reduce simple English plurals to their singular form."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("sses", "xes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+class SchemaIndex:
+    """
+    Retrieval index for one version of a schema map.
+
+    Tables are keyed as 'schema.table'. rank() scores tables against a user
+    prompt with IDF-weighted token matches; select_tables() returns the top-k
+    tables plus the tables they are joined to by foreign keys.
+    """
+
+    def __init__(self, schema_map: Dict):
+        self.tables: Dict[str, Dict] = {}
+        self.name_tokens: Dict[str, Set[str]] = {}
+        self.neighbours: Dict[str, Set[str]] = defaultdict(set)
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+
+        for schema_name, schema_info in schema_map.items():
+            for table_name, table_info in schema_info.get("tables", {}).items():
+                self.tables[f"{schema_name}.{table_name}"] = table_info
+
+        for table_key, table_info in self.tables.items():
+            for fk in table_info.get("foreign_keys", []):
+                referenced = _referenced_table(fk)
+                if referenced in self.tables and referenced != table_key:
+                    self.neighbours[table_key].add(referenced)
+                    self.neighbours[referenced].add(table_key)
+
+        for table_key, table_info in self.tables.items():
+            schema_name, table_name = table_key.split(".", 1)
+            self.name_tokens[table_key] = set(tokenize(table_name))
+            self._add(table_key, tokenize(table_name), TABLE_NAME_WEIGHT)
+            self._add(table_key, tokenize(schema_name), SCHEMA_NAME_WEIGHT)
+            for column_name in _column_names(table_info):
+                self._add(table_key, tokenize(column_name), COLUMN_NAME_WEIGHT)
+            for neighbour in self.neighbours.get(table_key, ()):
+                self._add(table_key, tokenize(neighbour.split(".", 1)[1]), NEIGHBOUR_NAME_WEIGHT)
+
+        table_count = max(len(self.tables), 1)
+        self.idf = {token: math.log(1 + table_count / len(posting)) for token, posting in self.postings.items()}
+
+    def _add(self, table_key: str, tokens: List[str], weight: float) -> None:
+        for token in tokens:
+            posting = self.postings[token]
+            if posting.get(table_key, 0) < weight:
+                posting[table_key] = weight
+
+    def rank(self, prompt: str) -> List[Tuple[str, float]]:
+        """
+        Score tables against a prompt.
+
+        Args:
+            prompt (str): User request
+
+        Returns:
+            List[Tuple[str, float]]: (table_key, score) for tables with a positive score, best first
+        """
+        prompt_tokens = set(tokenize(prompt))
+        scores: Dict[str, float] = defaultdict(float)
+        for token in prompt_tokens:
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+            idf = self.idf[token]
+            for table_key, weight in posting.items():
+                scores[table_key] += weight * idf
+        # Prefer tables whose whole name is mentioned (Customers over CustomerCategories)
+        for table_key in scores:
+            name_tokens = self.name_tokens[table_key]
+            if name_tokens:
+                scores[table_key] += TABLE_NAME_WEIGHT * len(name_tokens & prompt_tokens) / len(name_tokens)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def select_tables(
+        self,
+        prompt: str,
+        top_k: int,
+        max_tables: int,
+        ranked: Optional[List[Tuple[str, float]]] = None
+    ) -> List[str]:
+        """
+        Pick the tables to show the model for a prompt.
+
+        Takes the top_k ranked tables and adds their FK neighbours (best ranked,
+        then most connected first) up to max_tables. Falls back to the most
+        connected tables when nothing in the prompt matches the schema.
+
+        Args:
+            prompt (str): User request
+            top_k (int): Number of directly matched tables
+            max_tables (int): Upper bound on the number of tables returned
+            ranked (List[Tuple[str, float]], optional): rank(prompt), if the caller already computed it
+
+        Returns:
+            List[str]: Selected 'schema.table' keys, most relevant first
+        """
+        if ranked is None:
+            ranked = self.rank(prompt)
+        scores = dict(ranked)
+        if ranked:
+            selected = [table_key for table_key, _ in ranked[:top_k]]
+        else:
+            selected = sorted(self.tables, key=lambda key: (-len(self.neighbours.get(key, ())), key))[:top_k]
+
+        chosen = set(selected)
+        closure = {
+            neighbour
+            for table_key in selected
+            for neighbour in self.neighbours.get(table_key, ())
+            if neighbour not in chosen
+        }
+        closure = sorted(closure, key=lambda key: (-scores.get(key, 0), -len(self.neighbours.get(key, ())), key))
+        return (selected + closure)[:max_tables]
+
+
+def _referenced_table(fk: Dict) -> str:
+    """'schema.table' referenced by a foreign key entry from either schema map format."""
+    if "references" in fk:
+        return fk["references"].rsplit(".", 1)[0]
+    return f"{fk.get('referenced_schema')}.{fk.get('referenced_table')}"
+
+
+def _column_names(table_info: Dict) -> List[str]:
+    """Column names from either the dict-based or the list-based column format."""
+    columns = table_info.get("columns", {})
+    if isinstance(columns, dict):
+        return list(columns.keys())
+    return [column.get("name", "") for column in columns]
+
+
+# Indexes for the most recently used schema versions
+_INDEX_CACHE_SIZE = 8
+_index_cache: "OrderedDict[str, SchemaIndex]" = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def get_schema_index(schema_map: Dict, schema_version: Optional[str] = None) -> SchemaIndex:
+    """
+    Get the index for a schema map, building it once per schema version.
+
+    Args:
+        schema_map (Dict): Schema map to index
+        schema_version (str, optional): Version stamp of schema_map. Without one the index is not cached.
+
+    Returns:
+        SchemaIndex: Index for schema_map
+    """
+    if schema_version is None:
+        return SchemaIndex(schema_map)
+
+    with _index_lock:
+        index = _index_cache.get(schema_version)
+        if index is not None:
+            _index_cache.move_to_end(schema_version)
+            return index
+
+    index = SchemaIndex(schema_map)
+    logger.info(f"Built schema index for version {schema_version} ({len(index.tables)} tables, {len(index.postings)} terms)")
+    with _index_lock:
+        _index_cache[schema_version] = index
+        while len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
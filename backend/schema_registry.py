@@ -0,0 +1,139 @@
+"""
+Schema Registry Module
+Process-wide, read-only schema maps shared by every session
+"""
+
+import hashlib
+import logging
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaEntry:
+    """A loaded schema map with its version stamp and memory footprint."""
+
+    __slots__ = ("database", "schema_map", "version", "loaded_at", "source_mtime", "size_bytes", "table_count")
+
+    def __init__(self, database: str, schema_map: Dict, version: str, source_mtime: Optional[float] = None):
+        self.database = database
+        self.schema_map = schema_map
+        self.version = version
+        self.loaded_at = time.time()
+        self.source_mtime = source_mtime
+        self.size_bytes = _deep_sizeof(schema_map)
+        self.table_count = sum(len(schema_info.get("tables", {})) for schema_info in schema_map.values())
+
+
+class SchemaRegistry:
+    """
+    One schema map per database for the whole process.
+
+    Every caller receives the same dict object, so entries must be treated as
+    read-only; updates replace an entry wholesale via put(). Each entry carries
+    a version stamp derived from the serialized map, which stays stable across
+    restarts and changes whenever the schema does.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, SchemaEntry] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, database: str = None) -> Optional[SchemaEntry]:
+        """Return the entry for a database, or None if it has not been loaded."""
+        return self._entries.get(database or "default")
+
+    def get_version(self, database: str = None) -> Optional[str]:
+        """Return the current version stamp for a database, or None if it has not been loaded."""
+        entry = self.get(database)
+        return entry.version if entry else None
+
+    def put(self, database: str, schema_map: Dict, payload: str, source_mtime: Optional[float] = None) -> SchemaEntry:
+        """
+        Publish a schema map for a database, replacing any previous entry.
+
+        Args:
+            database (str): Database name
+            schema_map (Dict): Schema map; must not be mutated after publishing
+            payload (str): The JSON serialization of schema_map, used for the version stamp
+            source_mtime (float, optional): mtime of the cache file the map was read from or written to
+
+        Returns:
+            SchemaEntry: The new entry
+        """
+        key = database or "default"
+        entry = SchemaEntry(key, schema_map, schema_version_for(payload), source_mtime)
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = entry
+        if previous is None or previous.version != entry.version:
+            logger.info(
+                f"Published schema '{key}' version {entry.version} "
+                f"({entry.table_count} tables, ~{entry.size_bytes / 1024:.0f} KB)"
+            )
+        return entry
+
+    def invalidate(self, database: str = None) -> None:
+        """Drop the entry for one database, or every entry when database is None."""
+        with self._lock:
+            if database is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(database, None)
+
+    def load_lock(self, database: str = None) -> threading.Lock:
+        """Per-database lock so concurrent sessions load or build a schema only once."""
+        key = database or "default"
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-database version, age and memory usage plus the process total."""
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "total_bytes": sum(entry.size_bytes for entry in entries),
+            "databases": {
+                entry.database: {
+                    "version": entry.version,
+                    "tables": entry.table_count,
+                    "size_bytes": entry.size_bytes,
+                    "loaded_at": entry.loaded_at,
+                    "age_seconds": round(time.time() - entry.loaded_at, 1)
+                }
+                for entry in entries
+            }
+        }
+
+
+def schema_version_for(payload: str) -> str:
+    """Version stamp for a serialized schema map."""
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """Approximate memory held by a JSON-like structure of dicts, lists and scalars."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(key, seen) + _deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+# Global registry instance
+_schema_registry = SchemaRegistry()
+
+
+def get_schema_registry() -> SchemaRegistry:
+    """Get the process-wide schema registry."""
+    return _schema_registry
@@ -0,0 +1,148 @@
+"""
+Schema Renderer Module
+Prompt text for a schema map, rendered once per schema version and reused for every question
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def render_table(schema_name: str, table_name: str, table_info: Dict) -> str:
+    """
+    Render one table as it appears in the prompt's schema section.
+
+    Args:
+        schema_name (str): Schema the table belongs to
+        table_name (str): Table name
+        table_info (Dict): Table entry of the schema map
+
+    Returns:
+        str: The table's name, its columns with PK/FK markers and its foreign keys
+    """
+    primary_keys = set(table_info.get('primary_keys', []))
+    foreign_keys = table_info.get('foreign_keys', [])
+    fk_columns = {fk['column'] for fk in foreign_keys}
+
+    lines = [f"\n{schema_name}.{table_name}"]
+    for column_name, column_info in table_info.get('columns', {}).items():
+        col_str = f"  - {column_name} ({column_info.get('type', 'unknown')})"
+        if column_name in primary_keys:
+            col_str += " [PRIMARY KEY]"
+        if column_name in fk_columns:
+            col_str += " [FOREIGN KEY]"
+        lines.append(col_str)
+
+    if foreign_keys:
+        lines.append("\n  Foreign Keys:")
+        for fk in foreign_keys:
+            lines.append(f"    - {fk['column']} -> {fk['references']}")
+    return "\n".join(lines)
+
+
+class SchemaRenderer:
+    """
+    Pre-rendered prompt fragments for one version of a schema map.
+
+    Each table is rendered to its snippet once, together with its column list
+    and the sorted list of every table, so building a prompt only selects and
+    joins strings instead of walking the schema map for every question.
+    """
+
+    def __init__(self, schema_map: Dict):
+        self.snippets: Dict[str, str] = {}
+        self.column_lists: Dict[str, str] = {}
+        # Tables grouped by schema, in schema map order
+        self.schemas: List[Tuple[str, List[str]]] = []
+
+        for schema_name, schema_info in schema_map.items():
+            if "tables" not in schema_info:
+                continue
+            table_keys = []
+            for table_name, table_info in schema_info["tables"].items():
+                table_key = f"{schema_name}.{table_name}"
+                self.snippets[table_key] = render_table(schema_name, table_name, table_info)
+                self.column_lists[table_key] = ", ".join(table_info.get('columns', {}).keys())
+                table_keys.append(table_key)
+            self.schemas.append((schema_name, table_keys))
+
+        self.table_count = len(self.snippets)
+        self.all_tables = ", ".join(sorted(self.snippets))
+
+    def available_tables(self, selected_tables: Optional[Iterable[str]] = None, max_listed: Optional[int] = None) -> str:
+        """
+        List the available tables, or only the selected ones for very large schemas.
+
+        Args:
+            selected_tables (Iterable[str], optional): Tables chosen for the prompt
+            max_listed (int, optional): Above this many tables only selected_tables are listed
+
+        Returns:
+            str: Comma-separated 'schema.table' names
+        """
+        if selected_tables is None or max_listed is None or self.table_count <= max_listed:
+            return self.all_tables
+        selected_tables = sorted(selected_tables)
+        omitted = self.table_count - len(selected_tables)
+        return ", ".join(selected_tables) + f" (and {omitted} other tables not relevant to this request)"
+
+    def schema_section(self, selected_tables: Optional[Iterable[str]] = None) -> str:
+        """
+        Join the snippets of the selected tables (all tables when None) under their schema headers.
+
+        Args:
+            selected_tables (Iterable[str], optional): 'schema.table' keys to include
+
+        Returns:
+            str: The prompt's "Database Schema" section
+        """
+        selected = set(selected_tables) if selected_tables is not None else None
+        parts = []
+        for schema_name, table_keys in self.schemas:
+            snippets = [self.snippets[key] for key in table_keys if selected is None or key in selected]
+            if snippets:
+                parts.append(f"\n{schema_name} Schema:\n")
+                parts.extend(snippets)
+        return "\n".join(parts)
+
+    def likely_tables(self, table_keys: Iterable[str]) -> str:
+        """One 'schema.table: col1, col2, ...' line per table."""
+        return "\n".join(f"{key}: {self.column_lists.get(key, '')}" for key in table_keys)
+
+
+# Renderers for the most recently used schema versions
+_RENDERER_CACHE_SIZE = 8
+_renderer_cache: "OrderedDict[str, SchemaRenderer]" = OrderedDict()
+_renderer_lock = threading.Lock()
+
+
+def get_schema_renderer(schema_map: Dict, schema_version: Optional[str] = None) -> SchemaRenderer:
+    """
+    Get the rendered fragments for a schema map, rendering them once per schema version.
+
+    Args:
+        schema_map (Dict): Schema map to render
+        schema_version (str, optional): Version stamp of schema_map. Without one the fragments are not cached.
+
+    Returns:
+        SchemaRenderer: Fragments for schema_map
+    """
+    if schema_version is None:
+        return SchemaRenderer(schema_map)
+
+    with _renderer_lock:
+        renderer = _renderer_cache.get(schema_version)
+        if renderer is not None:
+            _renderer_cache.move_to_end(schema_version)
+            return renderer
+
+    renderer = SchemaRenderer(schema_map)
+    logger.info(f"Rendered schema fragments for version {schema_version} ({renderer.table_count} tables)")
+    with _renderer_lock:
+        _renderer_cache[schema_version] = renderer
+        while len(_renderer_cache) > _RENDERER_CACHE_SIZE:
+            _renderer_cache.popitem(last=False)
+    return renderer
@@ -0,0 +1,222 @@
+"""
+Semantic Cache Module
+Embedding-similarity lookup of validated SQL for paraphrased questions
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.system import LLM_CONFIG, SEMANTIC_CACHE_CONFIG
+from backend.llm_transport import get_llm_transport
+
+logger = logging.getLogger(__name__)
+
+
+def embed_text(text: str, model: str = None) -> np.ndarray:
+    """
+    Embed text with Ollama's /api/embed endpoint.
+
+    Args:
+        text (str): Text to embed
+        model (str, optional): Embedding model. Defaults to the configured one.
+
+    Returns:
+        np.ndarray: Unit-length float32 vector
+    """
+    response = get_llm_transport().post(
+        "/api/embed",
+        {"model": model or SEMANTIC_CACHE_CONFIG['embedding_model'], "input": text},
+        base_url=LLM_CONFIG['api_base']
+    )
+    response.raise_for_status()
+    vector = np.asarray(response.json()["embeddings"][0], dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """
+    Compact cosine-similarity index: one float32 matrix of unit vectors plus a
+    parallel list of payloads. The matrix starts small and doubles as entries
+    are added, up to capacity; full at capacity, the oldest rows are overwritten.
+    """
+
+    INITIAL_ROWS = 64
+
+    def __init__(self, dimensions: int, capacity: int):
+        self.capacity = capacity
+        self._vectors = np.zeros((min(self.INITIAL_ROWS, capacity), dimensions), dtype=np.float32)
+        self._payloads: List[Optional[Tuple[str, str]]] = []
+        self._removed: Set[int] = set()
+        self._next = 0
+
+    @property
+    def dimensions(self) -> int:
+        return self._vectors.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self._vectors.nbytes
+
+    def add(self, vector: np.ndarray, prompt: str, sql: str) -> None:
+        if self._next == len(self._vectors) and len(self._vectors) < self.capacity:
+            grown = np.zeros((min(len(self._vectors) * 2, self.capacity), self.dimensions), dtype=np.float32)
+            grown[:len(self._vectors)] = self._vectors
+            self._vectors = grown
+        self._vectors[self._next] = vector
+        self._removed.discard(self._next)
+        if self._next < len(self._payloads):
+            self._payloads[self._next] = (prompt, sql)
+        else:
+            self._payloads.append((prompt, sql))
+        self._next = (self._next + 1) % self.capacity
+
+    def remove(self, sql: str) -> int:
+        """Drop every row storing sql; returns the number of rows dropped."""
+        removed = 0
+        for row, payload in enumerate(self._payloads):
+            if payload is not None and payload[1] == sql:
+                self._vectors[row] = 0
+                self._payloads[row] = None
+                self._removed.add(row)
+                removed += 1
+        return removed
+
+    def nearest(self, vector: np.ndarray) -> Optional[Tuple[float, str, str]]:
+        """Return (similarity, prompt, sql) of the most similar stored vector."""
+        if not len(self):
+            return None
+        scores = self._vectors[:len(self._payloads)] @ vector
+        for row in self._removed:
+            scores[row] = -np.inf
+        best = int(np.argmax(scores))
+        prompt, sql = self._payloads[best]
+        return float(scores[best]), prompt, sql
+
+    def __len__(self) -> int:
+        return len(self._payloads) - len(self._removed)
+
+
+class SemanticCache:
+    """
+    Reuses validated SQL of the most similar earlier prompt.
+
+    Prompts are partitioned by (database, schema version, model), like the
+    exact-match generation cache, so a hit never crosses a schema change or a
+    model switch. A stored prompt is reused only when its cosine similarity
+    to the new prompt is at least threshold.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 2000, embedding_model: str = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+        self._indexes: Dict[Tuple[str, Optional[str], str], VectorIndex] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    def embed(self, prompt: str) -> Optional[np.ndarray]:
+        """Embed a prompt, returning None (and counting an error) if the embedding model is unavailable."""
+        try:
+            return embed_text(prompt, self.embedding_model)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {str(e)}")
+            with self._lock:
+                self._stats["errors"] += 1
+            return None
+
+    def lookup(
+        self,
+        vector: np.ndarray,
+        database: str,
+        schema_version: Optional[str],
+        model: str
+    ) -> Optional[Tuple[str, str, float]]:
+        """
+        Find validated SQL for the nearest earlier prompt.
+
+        Args:
+            vector (np.ndarray): Embedding of the new prompt
+            database (str): Database name
+            schema_version (str, optional): Schema version stamp
+            model (str): LLM model name
+
+        Returns:
+            Optional[Tuple[str, str, float]]: (sql, matched_prompt, similarity) above threshold, else None
+        """
+        key = (database or "default", schema_version, model)
+        with self._lock:
+            self._evict_stale(key)
+            index = self._indexes.get(key)
+            match = index.nearest(vector) if index is not None and index.dimensions == len(vector) else None
+            if match is None or match[0] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+        similarity, matched_prompt, sql = match
+        return sql, matched_prompt, similarity
+
+    def add(
+        self,
+        vector: np.ndarray,
+        prompt: str,
+        sql: str,
+        database: str,
+        schema_version: Optional[str],
+        model: str
+    ) -> None:
+        """Remember validated SQL for an embedded prompt."""
+        key = (database or "default", schema_version, model)
+        with self._lock:
+            self._evict_stale(key)
+            index = self._indexes.get(key)
+            if index is None or index.dimensions != len(vector):
+                index = VectorIndex(len(vector), self.max_entries)
+                self._indexes[key] = index
+            index.add(vector, prompt, sql)
+            self._stats["stores"] += 1
+
+    def remove(self, sql: str, database: str, schema_version: Optional[str], model: str) -> None:
+        """Forget SQL that failed when reused, so it is not offered again."""
+        with self._lock:
+            index = self._indexes.get((database or "default", schema_version, model))
+            if index is not None and index.remove(sql):
+                logger.info("Removed failing SQL from the semantic cache")
+
+    def _evict_stale(self, key: Tuple[str, Optional[str], str]) -> None:
+        """Drop partitions of key's database built for another schema version (lock held)."""
+        for other in list(self._indexes):
+            if other[0] == key[0] and other[1] != key[1]:
+                del self._indexes[other]
+                logger.info(f"Evicted semantic cache partition for schema version {other[1]} of {other[0]}")
+
+    def invalidate(self, database: str = None) -> None:
+        """Drop stored prompts for one database, or all of them when database is None."""
+        with self._lock:
+            for key in list(self._indexes):
+                if database is None or key[0] == database:
+                    del self._indexes[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters, the number of stored prompts and the bytes their vectors use."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = sum(len(index) for index in self._indexes.values())
+            stats["bytes"] = sum(index.nbytes for index in self._indexes.values())
+        return stats
+
+
+# Global cache instance
+_semantic_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_CONFIG['threshold'],
+    max_entries=SEMANTIC_CACHE_CONFIG['max_entries'],
+    embedding_model=SEMANTIC_CACHE_CONFIG['embedding_model']
+)
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get the process-wide semantic cache."""
+    return _semantic_cache
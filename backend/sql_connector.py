@@ -4,11 +4,19 @@ Handles database connections and query execution
 """
 
 import pyodbc
+import datetime
+import decimal
 import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from typing import Optional, Any, List, Dict, Tuple
-from backend.system import DB_CONFIG
+from typing import TYPE_CHECKING, Optional, Any, Iterator, List, Dict, Tuple
+from backend.system import QUERY_CONFIG
+from backend.connection_pool import get_connection_pool
+
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 # Configure logging
 logger = logging.getLogger("backend.sql_connector")
@@ -16,62 +24,399 @@ logger = logging.getLogger("backend.sql_connector")
 # Load environment variables
 load_dotenv()
 
+# ODBC SQLSTATEs raised when a statement is interrupted
+TIMEOUT_SQLSTATES = ("HYT00", "HYT01")
+CANCELLED_SQLSTATE = "HY008"
+
+class QueryTimeoutError(Exception):
+    """Raised when a query runs longer than its timeout and is cancelled on the server."""
+    
+    def __init__(self, timeout: float):
+        super().__init__(f"Query exceeded the {timeout:g} second timeout and was cancelled")
+        self.timeout = timeout
+
+class QueryCancelledError(Exception):
+    """Raised when a running query is stopped with cancel_query()."""
+    
+    def __init__(self, message: str = "Query was cancelled"):
+        super().__init__(message)
+
+def _interrupt_error(error: Exception, timeout: Optional[float]) -> Optional[Exception]:
+    """Map a pyodbc timeout/cancel error to QueryTimeoutError/QueryCancelledError, or None for other errors."""
+    sqlstate = error.args[0] if getattr(error, "args", None) else None
+    if sqlstate in TIMEOUT_SQLSTATES:
+        return QueryTimeoutError(timeout or 0)
+    if sqlstate == CANCELLED_SQLSTATE:
+        return QueryCancelledError()
+    return None
+
+# Connectors running a query on behalf of a caller-supplied query id
+_active_queries: Dict[str, "SQLConnector"] = {}
+_cancelled_queries = set()
+_active_queries_lock = threading.Lock()
+
+def register_query(query_id: str, connector: "SQLConnector") -> None:
+    """
+    Make a connector's running query cancellable by id.
+    
+    Raises:
+        QueryCancelledError: If cancel_query(query_id) was called before the query started
+    """
+    with _active_queries_lock:
+        if query_id in _cancelled_queries:
+            _cancelled_queries.discard(query_id)
+            raise QueryCancelledError()
+        _active_queries[query_id] = connector
+
+def unregister_query(query_id: str) -> None:
+    """Forget a finished query."""
+    with _active_queries_lock:
+        _active_queries.pop(query_id, None)
+        _cancelled_queries.discard(query_id)
+
+def cancel_query(query_id: str) -> bool:
+    """
+    Cancel a running query from another thread (e.g. a Stop button).
+    
+    A query id that is not running yet is remembered, so the query is refused
+    as soon as it registers.
+    
+    Args:
+        query_id (str): Id passed to execute_query
+        
+    Returns:
+        bool: True if a running query was signalled
+    """
+    with _active_queries_lock:
+        connector = _active_queries.get(query_id)
+        if connector is None:
+            _cancelled_queries.add(query_id)
+            return False
+    return connector.cancel()
+
+class RowStream:
+    """
+    Iterator over the row batches of an executed query, bounded by a fetch budget.
+    
+    Rows are pulled with cursor.fetchmany(batch_size) and yielded as lists of
+    tuples. Fetching stops once max_rows rows or roughly max_bytes bytes have
+    been read; truncated and truncated_reason then say why, and the rest of the
+    result set is cancelled on the server instead of being transferred.
+    """
+    
+    def __init__(
+        self,
+        cursor,
+        batch_size: int = 1000,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        self.cursor = cursor
+        self.batch_size = max(1, batch_size)
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        # The ODBC query timeout only covers execution, so fetching gets its own deadline
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.columns = [column[0] for column in cursor.description] if cursor.description else []
+        self.row_count = 0
+        self.byte_count = 0
+        self.truncated = False
+        self.truncated_reason = None
+    
+    def __iter__(self) -> Iterator[List[tuple]]:
+        if not self.columns:
+            return
+        while True:
+            size = self.batch_size
+            if self.max_rows is not None:
+                # Ask for one row past the cap so hitting it exactly is not reported as truncation
+                size = min(size, self.max_rows - self.row_count + 1)
+            rows = _fetch_batch(self.cursor, size, self.timeout, self.deadline)
+            if not rows:
+                return
+            
+            batch = []
+            for row in rows:
+                if self.max_rows is not None and self.row_count >= self.max_rows:
+                    self._truncate(f"row limit of {self.max_rows} reached")
+                    break
+                row = tuple(row)
+                self.byte_count += _estimate_row_bytes(row)
+                batch.append(row)
+                self.row_count += 1
+                if self.max_bytes is not None and self.byte_count >= self.max_bytes:
+                    self._truncate(f"size limit of {self.max_bytes // (1024 * 1024)} MB reached")
+                    break
+            
+            if batch:
+                yield batch
+            if self.truncated:
+                return
+    
+    def _truncate(self, reason: str) -> None:
+        self.truncated = True
+        self.truncated_reason = reason
+        logger.warning(f"Result truncated after {self.row_count} rows: {reason}")
+        try:
+            # Stop the server from sending the rest of the result set
+            self.cursor.cancel()
+        except Exception as e:
+            logger.debug(f"Cursor cancel after truncation failed: {str(e)}")
+
+def _fetch_batch(cursor, size: int, timeout: Optional[float], deadline: Optional[float]) -> List:
+    """fetchmany() that enforces a fetch deadline and maps timeout/cancel errors."""
+    if deadline is not None and time.monotonic() >= deadline:
+        try:
+            cursor.cancel()
+        except Exception as e:
+            logger.debug(f"Cursor cancel after timeout failed: {str(e)}")
+        raise QueryTimeoutError(timeout)
+    try:
+        return cursor.fetchmany(size)
+    except Exception as e:
+        interrupt = _interrupt_error(e, timeout)
+        if interrupt is not None:
+            raise interrupt from e
+        raise
+
+def _estimate_row_bytes(row: tuple) -> int:
+    """Rough in-memory size of a fetched row: string/binary lengths plus a fixed cost per value."""
+    size = 56 + 8 * len(row)
+    for value in row:
+        if isinstance(value, (str, bytes, bytearray)):
+            size += len(value) + 49
+        else:
+            size += 24
+    return size
+
+def _arrow_type(column: tuple):
+    """
+    Arrow type for a cursor.description entry, or None to infer it from the data.
+    
+    pyodbc reports the Python type of each column plus precision and scale,
+    which is enough to fix the schema before the first row arrives.
+    """
+    import pyarrow as pa
+    
+    type_code, precision, scale = column[1], column[4], column[5]
+    if type_code is bool:
+        return pa.bool_()
+    if type_code is int:
+        return pa.int64()
+    if type_code is float:
+        return pa.float64()
+    if type_code is decimal.Decimal and precision and 0 < precision <= 38:
+        return pa.decimal128(precision, scale or 0)
+    if type_code is datetime.datetime:
+        return pa.timestamp("us")
+    if type_code is datetime.date:
+        return pa.date32()
+    if type_code is datetime.time:
+        return pa.time64("us")
+    if type_code is str:
+        return pa.string()
+    if type_code in (bytes, bytearray):
+        return pa.binary()
+    return None
+
+class ArrowBatchStream:
+    """
+    Iterator over an executed query as pyarrow RecordBatches, bounded like RowStream.
+    
+    Each fetchmany() chunk is transposed and converted column by column into
+    Arrow arrays typed from cursor.description, so no per-row dicts or tuples
+    are built and the batches can go straight to st.dataframe, pandas or a
+    Parquet/CSV writer. max_bytes is measured on the Arrow buffers. When the
+    stream owns its connector (see execute_query_arrow), the connection goes
+    back to the pool as soon as iteration ends or close() is called.
+    """
+    
+    def __init__(
+        self,
+        cursor,
+        batch_size: int = 1000,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        timeout: Optional[float] = None,
+        connector: "SQLConnector" = None
+    ):
+        self.cursor = cursor
+        self.batch_size = max(1, batch_size)
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.columns = [column[0] for column in cursor.description] if cursor.description else []
+        self._types = [_arrow_type(column) for column in cursor.description] if cursor.description else []
+        self._connector = connector
+        self.schema = None
+        self.row_count = 0
+        self.byte_count = 0
+        self.truncated = False
+        self.truncated_reason = None
+    
+    def __iter__(self) -> Iterator["pa.RecordBatch"]:
+        try:
+            if not self.columns:
+                return
+            while True:
+                size = self.batch_size
+                if self.max_rows is not None:
+                    # One row past the cap tells a truncated result from one that fits exactly
+                    size = min(size, self.max_rows - self.row_count + 1)
+                rows = _fetch_batch(self.cursor, size, self.timeout, self.deadline)
+                if not rows:
+                    return
+                
+                batch = self._to_record_batch(rows)
+                if self.max_rows is not None and self.row_count + batch.num_rows > self.max_rows:
+                    batch = batch.slice(0, self.max_rows - self.row_count)
+                    self._truncate(f"row limit of {self.max_rows} reached")
+                self.row_count += batch.num_rows
+                self.byte_count += batch.nbytes
+                if not self.truncated and self.max_bytes is not None and self.byte_count >= self.max_bytes:
+                    self._truncate(f"size limit of {self.max_bytes // (1024 * 1024)} MB reached")
+                
+                if batch.num_rows:
+                    yield batch
+                if self.truncated:
+                    return
+        finally:
+            self.close()
+    
+    def close(self) -> None:
+        """Return the owned connection to the pool (no-op for a borrowed cursor)."""
+        if self._connector is not None:
+            self._connector.close()
+            self._connector = None
+    
+    def _to_record_batch(self, rows: List) -> "pa.RecordBatch":
+        import pyarrow as pa
+        
+        arrays = []
+        for position, values in enumerate(zip(*rows)):
+            arrow_type = self._types[position]
+            array = pa.array(values, type=arrow_type)
+            if arrow_type is None and not pa.types.is_null(array.type):
+                # Pin the inferred type so every batch shares one schema
+                self._types[position] = array.type
+            arrays.append(array)
+        batch = pa.RecordBatch.from_arrays(arrays, names=self.columns)
+        if self.schema is None:
+            self.schema = batch.schema
+        elif batch.schema != self.schema:
+            batch = batch.cast(self.schema)
+        return batch
+    
+    def _truncate(self, reason: str) -> None:
+        self.truncated = True
+        self.truncated_reason = reason
+        logger.warning(f"Arrow result truncated after {self.row_count} rows: {reason}")
+        try:
+            self.cursor.cancel()
+        except Exception as e:
+            logger.debug(f"Cursor cancel after truncation failed: {str(e)}")
+
 class SQLConnector:
-    """SQL Server connection handler"""
+    """SQL Server connection handler backed by the shared connection pool"""
     
     def __init__(self, database: str = None):
         """Initialize connection with optional database override"""
         self.conn = None
         self.cursor = None
+        self._pool = None
         self.connect(database)
     
     def connect(self, database: str = None) -> None:
-        """Establish database connection"""
+        """Check a connection out of the pool for the given database"""
         try:
-            if DB_CONFIG["mode"] == "DSN":
-                conn_str = (
-                    f"DSN={DB_CONFIG['dsn']};"
-                    f"UID={DB_CONFIG['user']};"
-                    f"PWD={DB_CONFIG['password']}"
-                )
-            else:
-                conn_str = (
-                    f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                    f"SERVER={DB_CONFIG['server']};"
-                    f"DATABASE={database or DB_CONFIG['database']};"
-                    f"UID={DB_CONFIG['user']};"
-                    f"PWD={DB_CONFIG['password']}"
-                )
-            
-            self.conn = pyodbc.connect(conn_str)
+            if self.conn:
+                self.close()
+            self._pool = get_connection_pool(database)
+            self.conn = self._pool.acquire()
             self.cursor = self.conn.cursor()
-            logger.info("Database connection established successfully")
+            logger.debug("Database connection checked out from pool")
             
         except Exception as e:
             logger.error(f"Database connection failed: {str(e)}")
             raise
     
-    def close(self) -> None:
-        """Close database connection"""
+    def cancel(self) -> bool:
+        """
+        Cancel the statement running on this connector's cursor.
+        
+        Safe to call from another thread; the executing thread then gets a
+        QueryCancelledError.
+        
+        Returns:
+            bool: True if the cancel request was sent
+        """
+        cursor = self.cursor
+        if cursor is None:
+            return False
+        try:
+            cursor.cancel()
+            logger.info("Cancel requested for running query")
+            return True
+        except Exception as e:
+            logger.warning(f"Query cancel failed: {str(e)}")
+            return False
+    
+    def _execute(self, query: str, params: List = None, timeout: Optional[float] = None) -> None:
+        """Execute on the cursor with a server-side query timeout (None or 0 disables it)."""
+        # pyodbc copies Connection.timeout into SQL_ATTR_QUERY_TIMEOUT only when a cursor
+        # is created, so set it first and then open the cursor this statement runs on
+        self.conn.timeout = max(1, round(timeout)) if timeout and timeout > 0 else 0
+        if self.cursor is not None:
+            try:
+                self.cursor.close()
+            except Exception as e:
+                logger.debug(f"Closing previous cursor failed: {str(e)}")
+        self.cursor = self.conn.cursor()
+        try:
+            self.cursor.execute(query, params or [])
+        except Exception as e:
+            interrupt = _interrupt_error(e, timeout)
+            if interrupt is not None:
+                logger.warning(f"Query interrupted: {str(interrupt)}")
+                raise interrupt from e
+            raise
+    
+    def close(self, discard: bool = False) -> None:
+        """Return the connection to the pool, or close it when discard is True"""
         if self.cursor:
-            self.cursor.close()
+            try:
+                self.cursor.close()
+            except Exception:
+                # A broken cursor usually means a broken session
+                discard = True
+            self.cursor = None
         if self.conn:
-            self.conn.close()
-            logger.info("Database connection closed")
+            # Do not hand this caller's query timeout to the next borrower
+            try:
+                self.conn.timeout = 0
+            except Exception:
+                discard = True
+            self._pool.release(self.conn, discard=discard)
+            self.conn = None
+            logger.debug("Database connection returned to pool")
     
-    def execute_query(self, query: str, params: List = None) -> Tuple[List[str], List[dict]]:
+    def execute_query(self, query: str, params: List = None, timeout: Optional[float] = None) -> Tuple[List[str], List[dict]]:
         """
         Execute SQL query and return results as list of dictionaries
         
         Args:
             query (str): SQL query to execute
             params (List, optional): Query parameters
+            timeout (float, optional): Seconds before the server cancels the query
             
         Returns:
             Tuple[List[str], List[dict]]: Column names and results as dicts
         """
         try:
-            self.cursor.execute(query, params or [])
+            self._execute(query, params, timeout)
             # Get column names
             columns = [column[0] for column in self.cursor.description] if self.cursor.description else []
             # Fetch results
@@ -94,6 +439,86 @@ class SQLConnector:
             logger.error(f"Parameters: {params}")
             raise
 
+    def stream_query(
+        self,
+        query: str,
+        params: List = None,
+        batch_size: int = None,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> RowStream:
+        """
+        Execute SQL query and stream its rows in bounded batches
+        
+        Args:
+            query (str): SQL query to execute
+            params (List, optional): Query parameters
+            batch_size (int, optional): Rows per fetchmany() call. Defaults to QUERY_CONFIG['fetch_batch_size'].
+            max_rows (int, optional): Stop fetching after this many rows
+            max_bytes (int, optional): Stop fetching after roughly this many bytes
+            timeout (float, optional): Seconds allowed for execution and fetching
+            
+        Returns:
+            RowStream: Iterable of row batches; check truncated after iterating
+            
+        Raises:
+            QueryTimeoutError: The query ran past its timeout
+            QueryCancelledError: The query was stopped with cancel()
+        """
+        try:
+            self._execute(query, params, timeout)
+            return RowStream(
+                self.cursor,
+                batch_size=batch_size or QUERY_CONFIG['fetch_batch_size'],
+                max_rows=max_rows,
+                max_bytes=max_bytes,
+                timeout=timeout
+            )
+        except Exception as e:
+            logger.error(f"Query execution failed: {str(e)}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Parameters: {params}")
+            raise
+
+    def stream_query_arrow(
+        self,
+        query: str,
+        params: List = None,
+        batch_size: int = None,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> ArrowBatchStream:
+        """
+        Execute SQL query and stream its rows as pyarrow RecordBatches
+        
+        Args:
+            query (str): SQL query to execute
+            params (List, optional): Query parameters
+            batch_size (int, optional): Rows per fetchmany() call and per RecordBatch
+            max_rows (int, optional): Stop fetching after this many rows
+            max_bytes (int, optional): Stop fetching after this many bytes of Arrow data
+            timeout (float, optional): Seconds allowed for execution and fetching
+            
+        Returns:
+            ArrowBatchStream: Iterable of RecordBatches; check truncated after iterating
+        """
+        try:
+            self._execute(query, params, timeout)
+            return ArrowBatchStream(
+                self.cursor,
+                batch_size=batch_size or QUERY_CONFIG['fetch_batch_size'],
+                max_rows=max_rows,
+                max_bytes=max_bytes,
+                timeout=timeout
+            )
+        except Exception as e:
+            logger.error(f"Query execution failed: {str(e)}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Parameters: {params}")
+            raise
+
     def get_databases(self):
         """Get list of available databases."""
         try:
@@ -128,27 +553,30 @@ class SQLConnector:
         return []
 
     def __del__(self):
-        """Cleanup connection on object destruction"""
+        """Return a leaked connection to the pool on object destruction"""
         try:
-            if hasattr(self, 'conn') and self.conn:
-                self.conn.close()
+            if getattr(self, 'conn', None):
+                self.close()
         except:
             pass  # Silently handle cleanup errors
 
 def validate_db_connection(database_override: Optional[str] = None) -> bool:
+    connector = None
     try:
         connector = SQLConnector(database=database_override)
         connector.cursor.execute("SELECT 1 AS test")
         result = connector.cursor.fetchone()
-        connector.close()
         return result is not None
     except Exception as e:
         logging.warning(f"Database connection test failed: {e}")
         return False
+    finally:
+        if connector:
+            connector.close()
     
 def execute_sql_query(query: str, params: List = None) -> Tuple[List[str], List[dict]]:
     """
-    Execute SQL query using a temporary connection
+    Execute SQL query using a pooled connection
     
     Args:
         query (str): SQL query to execute
@@ -163,6 +591,49 @@ def execute_sql_query(query: str, params: List = None) -> Tuple[List[str], List[
     finally:
         connector.close()
 
+def execute_query_arrow(
+    query: str,
+    params: List = None,
+    database: str = None,
+    batch_size: int = None,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    timeout: Optional[float] = None
+) -> ArrowBatchStream:
+    """
+    Execute SQL query on a pooled connection and stream the result as pyarrow RecordBatches
+    
+    The connection is held until the stream is exhausted or closed, so
+    consume it (e.g. pa.Table.from_batches(stream) or a Parquet writer) or call close().
+    
+    Args:
+        query (str): SQL query to execute
+        params (List, optional): Query parameters
+        database (str, optional): Database name to use for the query
+        batch_size (int, optional): Rows per RecordBatch. Defaults to QUERY_CONFIG['fetch_batch_size'].
+        max_rows (int, optional): Row cap. Defaults to QUERY_CONFIG['max_rows'].
+        max_bytes (int, optional): Arrow data cap. Defaults to QUERY_CONFIG['max_bytes'].
+        timeout (float, optional): Seconds allowed for execution and fetching
+        
+    Returns:
+        ArrowBatchStream: Iterable of RecordBatches with truncated / truncated_reason
+    """
+    connector = SQLConnector(database=database)
+    try:
+        stream = connector.stream_query_arrow(
+            query,
+            params,
+            batch_size=batch_size,
+            max_rows=max_rows if max_rows is not None else QUERY_CONFIG['max_rows'],
+            max_bytes=max_bytes if max_bytes is not None else QUERY_CONFIG['max_bytes'],
+            timeout=timeout
+        )
+    except Exception:
+        connector.close()
+        raise
+    stream._connector = connector
+    return stream
+
 def mask_sensitive_info(config: Dict[str, Any]) -> Dict[str, Any]:
     """Mask sensitive information in configuration for logging."""
     masked_config = config.copy()
@@ -92,23 +92,134 @@ except Exception as e:
     logger.error(f"Failed to load database configuration: {e}")
     raise
 
+# Connection pool configuration
+POOL_CONFIG = {
+    'max_size': int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    'acquire_timeout': float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "30")),
+    'max_idle_seconds': float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300")),
+    'validate_after_seconds': float(os.getenv("DB_POOL_VALIDATE_AFTER_SECONDS", "30"))
+}
+
+# Row fetching for generated queries
+QUERY_CONFIG = {
+    'fetch_batch_size': int(os.getenv("QUERY_FETCH_BATCH_SIZE", "1000")),
+    'max_rows': int(os.getenv("QUERY_MAX_ROWS", "10000")),
+    'max_bytes': int(float(os.getenv("QUERY_MAX_MB", "50")) * 1024 * 1024),
+    'timeout_seconds': float(os.getenv("QUERY_TIMEOUT_SECONDS", "60")),
+    'export_max_rows': int(os.getenv("QUERY_EXPORT_MAX_ROWS", "5000000")),
+    'export_max_bytes': int(float(os.getenv("QUERY_EXPORT_MAX_MB", "1024")) * 1024 * 1024)
+}
+
+# Query result cache
+RESULT_CACHE_CONFIG = {
+    'enabled': os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true",
+    'ttl_seconds': float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300")),
+    'max_entries': int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256")),
+    'max_bytes': int(float(os.getenv("RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024)
+}
+
+# Estimated-plan cost gate for generated queries
+COST_GATE_CONFIG = {
+    'enabled': os.getenv("COST_GATE_ENABLED", "false").lower() == "true",
+    'confirm_cost': float(os.getenv("COST_GATE_CONFIRM_COST", "50")),
+    'reject_cost': float(os.getenv("COST_GATE_REJECT_COST", "1000")),
+    'confirm_rows': float(os.getenv("COST_GATE_CONFIRM_ROWS", "1000000")),
+    'reject_rows': float(os.getenv("COST_GATE_REJECT_ROWS", "100000000")),
+    'scan_rows': float(os.getenv("COST_GATE_SCAN_ROWS", "1000000")),
+    'plan_cache_size': int(os.getenv("COST_GATE_PLAN_CACHE_SIZE", "500"))
+}
+
+def _keep_alive(value: str):
+    """Ollama keep_alive: numbers are sent as seconds, anything else as a duration string like '30m'."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
 # LLM Configuration
 LLM_CONFIG = {
     'model': os.getenv("LLM_MODEL", "qwen2.5-coder:7b"),
     'api_base': os.getenv("OPENAI_API_BASE", "http://localhost:11434/").rstrip("/") + "/",
-    'api_key': os.getenv("OPENAI_API_KEY", "ollama")
+    'api_key': os.getenv("OPENAI_API_KEY", "ollama"),
+    # How long Ollama keeps the model (and its prompt cache) loaded after a request; a number is seconds, -1 is forever
+    'keep_alive': _keep_alive(os.getenv("LLM_KEEP_ALIVE", "30m"))
+}
+
+# HTTP transport for Ollama calls
+LLM_TRANSPORT_CONFIG = {
+    'pool_size': int(os.getenv("LLM_POOL_SIZE", "10")),
+    'connect_timeout': float(os.getenv("LLM_CONNECT_TIMEOUT", "5")),
+    'read_timeout': float(os.getenv("LLM_READ_TIMEOUT", "120")),
+    'max_retries': int(os.getenv("LLM_MAX_RETRIES", "3")),
+    'backoff_factor': float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+}
+
+# Concurrent SQL candidates per question (1 = generate one query, then refine it if needed)
+PARALLEL_GENERATION_CONFIG = {
+    'candidates': int(os.getenv("LLM_PARALLEL_CANDIDATES", "1")),
+    'temperatures': [float(t) for t in os.getenv("LLM_CANDIDATE_TEMPERATURES", "0.1,0.4,0.7,0.9").split(",") if t.strip()],
+    'seed': int(os.getenv("LLM_CANDIDATE_SEED", "42"))
+}
+
+# asyncio request pipeline (backend/async_pipeline.py)
+ASYNC_PIPELINE_CONFIG = {
+    'db_workers': int(os.getenv("ASYNC_DB_WORKERS", "8"))
+}
+
+# HTTP API service (api/server.py)
+API_CONFIG = {
+    'host': os.getenv("API_HOST", "0.0.0.0"),
+    'port': int(os.getenv("API_PORT", "8000")),
+    'workers': int(os.getenv("API_WORKERS", "4"))
+}
+
+# Memoized prompt -> SQL generations
+GENERATION_CACHE_CONFIG = {
+    'enabled': os.getenv("GENERATION_CACHE_ENABLED", "true").lower() == "true",
+    'max_entries': int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "1000")),
+    'ttl_seconds': float(os.getenv("GENERATION_CACHE_TTL_DAYS", "7")) * 86400
+}
+
+# Embedding-similarity reuse of generated SQL for paraphrased questions
+SEMANTIC_CACHE_CONFIG = {
+    'enabled': os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true",
+    'embedding_model': os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "nomic-embed-text"),
+    'threshold': float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    'max_entries': int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+}
+
+# Prompt schema selection
+PROMPT_CONFIG = {
+    'top_k_tables': int(os.getenv("PROMPT_TOP_K_TABLES", "8")),
+    'max_tables': int(os.getenv("PROMPT_MAX_TABLES", "20")),
+    'max_listed_tables': int(os.getenv("PROMPT_MAX_LISTED_TABLES", "200"))
+}
+
+# Prompt size control: token budget per model and how tokens are counted
+PROMPT_BUDGET_CONFIG = {
+    'token_budget': int(os.getenv("PROMPT_TOKEN_BUDGET", "6000")),
+    'model_budgets': {
+        name.strip(): int(budget)
+        for name, budget in (
+            item.split("=", 1) for item in os.getenv("PROMPT_MODEL_TOKEN_BUDGETS", "").split(",") if "=" in item
+        )
+    },
+    'chars_per_token': float(os.getenv("PROMPT_CHARS_PER_TOKEN", "3.5")),
+    'prefix_share': float(os.getenv("PROMPT_PREFIX_SHARE", "0.75")),
+    'tokenizer_path': os.getenv("PROMPT_TOKENIZER_PATH") or None
 }
 
 def test_llm_connection() -> Tuple[bool, str]:
     """Test LLM connection using current configuration."""
+    # Imported here: the transport module reads its configuration from this one
+    from backend.llm_transport import get_llm_transport
+    
     try:
-        base_url = LLM_CONFIG['api_base'].rstrip("/")
-        if base_url.endswith("/v1"):
-            base_url = base_url[:-3].rstrip("/")
+        transport = get_llm_transport()
         
         # First test if Ollama API is accessible
         try:
-            response = requests.get(f"{base_url}/api/tags")
+            response = transport.get("/api/tags", base_url=LLM_CONFIG['api_base'], timeout=10)
             response.raise_for_status()
         except Exception as e:
             return False, f"Could not connect to Ollama API: {str(e)}"
@@ -116,10 +227,6 @@ def test_llm_connection() -> Tuple[bool, str]:
         # Then test if the model is available and working
         try:
             # Prepare a simple test request
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
             data = {
                 "model": LLM_CONFIG['model'],
                 "messages": [{"role": "user", "content": "Hello, are you working?"}],
@@ -132,10 +239,10 @@ def test_llm_connection() -> Tuple[bool, str]:
             }
             
             # Make request to Ollama's chat endpoint
-            response = requests.post(
-                f"{base_url}/api/chat",
-                headers=headers,
-                json=data,
+            response = transport.post(
+                "/api/chat",
+                data,
+                base_url=LLM_CONFIG['api_base'],
                 timeout=10  # Add timeout to prevent hanging
             )
             response.raise_for_status()
@@ -156,6 +263,12 @@ def test_llm_connection() -> Tuple[bool, str]:
         logger.error(f"LLM connection test failed: {str(e)}")
         return False, f"LLM connection failed: {str(e)}"
 
+# Background health checks
+HEALTH_CONFIG = {
+    'interval': float(os.getenv("HEALTH_CHECK_INTERVAL", "30")),
+    'probe_timeout': float(os.getenv("HEALTH_CHECK_TIMEOUT", "5"))
+}
+
 # Logging configuration
 LOG_CONFIG = {
     "version": 1,
@@ -190,12 +303,19 @@ def get_system_status() -> Tuple[bool, bool]:
     """
     Get system status for database and LLM connections.
     
+    Reads the results cached by the background health monitor, so it is cheap
+    enough to call on every page render. Only the very first call waits for
+    the probes to run.
+    
     Returns:
         Tuple[bool, bool]: (database_status, llm_status)
     """
-    db_status, _ = test_db_connection()
-    llm_status, _ = test_llm_connection()
-    return db_status, llm_status
+    # Imported here: the health monitor reads its configuration from this module
+    from backend.health_monitor import get_health_monitor
+    
+    monitor = get_health_monitor()
+    status = monitor.get_status() or monitor.check_now()
+    return status["database"]["ok"], status["llm"]["ok"]
 
 # Future system-related functions could include:
 # - System health metrics
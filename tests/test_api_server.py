@@ -0,0 +1,56 @@
+"""
+Tests for the read-only guard of the SQL execution endpoint
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import server
+from backend.query_result import ColumnarResult
+
+
+@pytest.fixture
+def executed(monkeypatch):
+    queries = []
+
+    def fake_execute_query(query, database, use_cache=True, max_rows=None):
+        queries.append(query)
+        return ColumnarResult.from_dicts([{"CustomerID": 1}])
+
+    monkeypatch.setattr(server, "execute_query", fake_execute_query)
+    return queries
+
+
+@pytest.fixture
+def client():
+    return TestClient(server.app)
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT CustomerID FROM Sales.Customers WHERE IsDeleted = 0",
+    "SELECT TOP 10 OrderID, LastUpdatedAt FROM Sales.Orders ORDER BY LastUpdatedAt DESC;",
+    "WITH recent AS (SELECT OrderID FROM Sales.Orders) SELECT * FROM recent",
+    "SELECT 1 AS n UNION ALL SELECT 2",
+])
+def test_reads_are_executed(client, executed, query):
+    response = client.post("/v1/sql/execute", json={"query": query, "database": "db"})
+
+    assert response.status_code == 200
+    assert executed == [query]
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * INTO Sales.CustomersCopy FROM Sales.Customers",
+    "EXEC sp_configure 'show advanced options', 1",
+    "MERGE INTO Sales.Customers AS t USING Staging.Customers AS s ON t.CustomerID = s.CustomerID "
+    "WHEN MATCHED THEN DELETE;",
+    "CREATE TABLE dbo.Scratch (id INT)",
+    "GRANT SELECT ON Sales.Customers TO guest",
+    "SELECT 1; DROP TABLE Sales.Customers",
+    "SELECT FROM WHERE",
+])
+def test_anything_but_one_select_is_rejected(client, executed, query):
+    response = client.post("/v1/sql/execute", json={"query": query, "database": "db"})
+
+    assert response.status_code == 400
+    assert executed == []
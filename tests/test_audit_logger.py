@@ -0,0 +1,75 @@
+"""
+Tests for the JSONL audit log's fsync timer and legacy migration
+"""
+
+import json
+import multiprocessing
+import time
+from pathlib import Path
+
+import pytest
+
+from backend import audit_logger
+from backend.audit_logger import AuditLogger
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "logs"
+
+
+def write_legacy(log_dir, count):
+    log_dir.mkdir(exist_ok=True)
+    entries = [{"query": f"SELECT {i}", "status": "completed"} for i in range(count)]
+    (log_dir / "audit_log.json").write_text(json.dumps(entries))
+
+
+def test_last_entries_of_a_burst_are_fsynced_without_further_writes(log_dir, monkeypatch):
+    monkeypatch.setattr(audit_logger, "FSYNC_INTERVAL_SECONDS", 0.05)
+    log = AuditLogger()
+    try:
+        log.log_query_event("SELECT 1")
+        assert log._pending_fsync == 1
+
+        deadline = time.monotonic() + 2
+        while log._pending_fsync and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert log._pending_fsync == 0
+    finally:
+        log.close()
+
+
+def test_migration_keeps_appends_of_an_already_open_writer(log_dir):
+    writer = AuditLogger()
+    write_legacy(log_dir, 3)
+    migrating = AuditLogger()
+    try:
+        writer.log_query_event("SELECT 'after migration'")
+
+        queries = [log["query"] for log in migrating.get_logs()]
+        assert queries == ["SELECT 0", "SELECT 1", "SELECT 2", "SELECT 'after migration'"]
+        assert (log_dir / "audit_log.json.migrated").exists()
+    finally:
+        writer.close()
+        migrating.close()
+
+
+def _open_logger(directory):
+    import os
+    os.chdir(directory)
+    AuditLogger().close()
+
+
+def test_concurrent_migrations_copy_entries_once(log_dir):
+    write_legacy(log_dir, 200)
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_open_logger, args=(str(log_dir.parent),)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    lines = Path(log_dir / "audit_log.jsonl").read_text().splitlines()
+    assert len(lines) == 200
+    assert not (log_dir / "audit_log.json").exists()
@@ -0,0 +1,42 @@
+"""
+Tests for the read-only guard of query exports
+"""
+
+import io
+
+import pytest
+
+from backend import db_tools
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    queries = []
+
+    def fake_execute_query_arrow(query, **kwargs):
+        queries.append(query)
+        raise RuntimeError("stop after the guard")
+
+    monkeypatch.setattr(db_tools, "execute_query_arrow", fake_execute_query_arrow)
+    return queries
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * INTO dbo.Copy FROM Sales.Customers",
+    "EXEC sp_who",
+    "MERGE INTO Sales.Customers AS t USING Staging.Customers AS s ON t.CustomerID = s.CustomerID "
+    "WHEN MATCHED THEN DELETE;",
+    "CREATE TABLE dbo.Scratch (id INT)",
+    "SELECT 1; SELECT 2",
+])
+def test_export_rejects_anything_but_one_select(sent, query):
+    with pytest.raises(ValueError):
+        db_tools.export_query_results(query, io.BytesIO())
+    assert sent == []
+
+
+def test_export_allows_reads_of_audit_columns(sent):
+    query = "SELECT CustomerID, LastUpdated FROM Sales.Customers WHERE IsDeleted = 0"
+    with pytest.raises(RuntimeError):
+        db_tools.export_query_results(query, io.BytesIO())
+    assert sent == [query]
@@ -0,0 +1,51 @@
+"""
+Tests for ColumnarResult packing and conversions
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from backend.query_result import ColumnarResult, _to_column_array
+
+BIG = 2**60 + 1
+
+
+def test_int_column_with_nulls_stays_int64():
+    array, mask = _to_column_array([1, None, BIG])
+
+    assert array.dtype == np.int64
+    assert mask.tolist() == [False, True, False]
+
+    result = ColumnarResult.from_batches(["id"], [[(1,), (None,), (BIG,)]])
+    assert [row["id"] for row in result] == [1, None, BIG]
+
+
+def test_int_column_with_nulls_in_pandas_and_arrow():
+    result = ColumnarResult.from_batches(["id"], [[(2,), (None,), (BIG,)]])
+
+    series = result.to_pandas()["id"]
+    assert series.dtype == pd.Int64Dtype()
+    assert series.tolist() == [2, pd.NA, BIG]
+
+    column = result.to_arrow().column("id")
+    assert column.type == pa.int64()
+    assert column.to_pylist() == [2, None, BIG]
+
+
+def test_mixed_ints_and_floats_are_not_rounded():
+    array, mask = _to_column_array([BIG, 0.5])
+
+    assert array.dtype == object
+    assert mask is None
+    assert array.tolist() == [BIG, 0.5]
+
+
+def test_to_pandas_keeps_duplicate_column_names():
+    result = ColumnarResult.from_batches(["Name", "Name", "Total"], [[("a", "b", 1), ("c", "d", 2)]])
+
+    frame = result.to_pandas()
+    assert list(frame.columns) == ["Name", "Name", "Total"]
+    assert frame.iloc[:, 0].tolist() == ["a", "c"]
+    assert frame.iloc[:, 1].tolist() == ["b", "d"]
+    assert frame["Total"].tolist() == [1, 2]
@@ -0,0 +1,20 @@
+"""
+Tests for result cache keys
+"""
+
+from backend.result_cache import canonicalize_sql, is_cacheable
+
+
+def test_formatting_differences_share_a_key():
+    assert canonicalize_sql("select  CustomerID\nfrom Sales.Customers;") == \
+        canonicalize_sql("SELECT CustomerID FROM Sales.Customers")
+
+
+def test_batches_differing_after_the_first_statement_get_different_keys():
+    assert canonicalize_sql("SELECT 1; SELECT 2") != canonicalize_sql("SELECT 1; SELECT 3")
+    assert canonicalize_sql("SELECT 1; SELECT 2") != canonicalize_sql("SELECT 1")
+
+
+def test_only_single_statements_are_cacheable():
+    assert is_cacheable("SELECT CustomerID FROM Sales.Customers;")
+    assert not is_cacheable("SELECT 1; SELECT 2")
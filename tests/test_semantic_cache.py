@@ -0,0 +1,54 @@
+"""
+Tests for the semantic cache's vector index and partitions
+"""
+
+import numpy as np
+
+from backend.semantic_cache import SemanticCache, VectorIndex
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_index_grows_with_entries():
+    index = VectorIndex(dimensions=2, capacity=1000)
+    assert index.nbytes == VectorIndex.INITIAL_ROWS * 2 * 4
+
+    for i in range(VectorIndex.INITIAL_ROWS + 1):
+        index.add(unit(1, i), f"q{i}", f"SELECT {i}")
+
+    assert len(index) == VectorIndex.INITIAL_ROWS + 1
+    assert index.nbytes == VectorIndex.INITIAL_ROWS * 2 * 2 * 4
+    assert index.nearest(unit(1, 0))[2] == "SELECT 0"
+
+
+def test_index_overwrites_oldest_at_capacity():
+    index = VectorIndex(dimensions=2, capacity=2)
+    index.add(unit(1, 0), "a", "SELECT 'a'")
+    index.add(unit(0, 1), "b", "SELECT 'b'")
+    index.add(unit(1, 0.1), "c", "SELECT 'c'")
+
+    assert len(index) == 2
+    assert index.nearest(unit(1, 0))[2] == "SELECT 'c'"
+
+
+def test_removed_sql_is_not_returned():
+    index = VectorIndex(dimensions=2, capacity=10)
+    index.add(unit(1, 0), "a", "SELECT bad")
+    index.add(unit(0, 1), "b", "SELECT good")
+
+    assert index.remove("SELECT bad") == 1
+    assert len(index) == 1
+    assert index.nearest(unit(1, 0))[2] == "SELECT good"
+
+
+def test_partitions_of_old_schema_versions_are_evicted():
+    cache = SemanticCache(threshold=0.5)
+    cache.add(unit(1, 0), "q", "SELECT 1", "db", "v1", "model")
+    cache.add(unit(1, 0), "q", "SELECT 1", "other", "v1", "model")
+
+    assert cache.lookup(unit(1, 0), "db", "v2", "model") is None
+    assert cache.stats()["entries"] == 1
+    assert cache.lookup(unit(1, 0), "other", "v1", "model")[0] == "SELECT 1"
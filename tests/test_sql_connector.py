@@ -0,0 +1,83 @@
+"""
+Tests for SQLConnector query timeouts on pooled connections
+"""
+
+import pytest
+
+from backend import sql_connector
+from backend.sql_connector import SQLConnector
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        # What pyodbc's Cursor_New copies into SQL_ATTR_QUERY_TIMEOUT
+        self.query_timeout = conn.timeout
+        self.closed = False
+        self.executed = []
+
+    def execute(self, query, params):
+        self.executed.append(query)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self):
+        self.timeout = 0
+        self.cursors = []
+
+    def cursor(self):
+        cursor = FakeCursor(self)
+        self.cursors.append(cursor)
+        return cursor
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConnection()
+        self.released = []
+
+    def acquire(self):
+        return self.conn
+
+    def release(self, conn, discard=False):
+        self.released.append((conn, conn.timeout, discard))
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(sql_connector, "get_connection_pool", lambda database=None: pool)
+    return pool
+
+
+def test_execute_opens_cursor_after_setting_timeout(pool):
+    connector = SQLConnector()
+    connector._execute("SELECT 1", timeout=7)
+
+    cursor = connector.cursor
+    assert cursor is pool.conn.cursors[-1]
+    assert cursor.query_timeout == 7
+    assert cursor.executed == ["SELECT 1"]
+    # The cursor opened by connect() is not reused
+    assert pool.conn.cursors[0].closed
+
+
+def test_execute_without_timeout_uses_no_limit(pool):
+    connector = SQLConnector()
+    connector._execute("SELECT 1", timeout=5)
+    connector._execute("SELECT 2")
+
+    assert connector.cursor.query_timeout == 0
+
+
+def test_close_resets_timeout_before_release(pool):
+    connector = SQLConnector()
+    connector._execute("SELECT 1", timeout=30)
+    connector.close()
+
+    conn, timeout_at_release, discard = pool.released[-1]
+    assert timeout_at_release == 0
+    assert not discard